@@ -1,14 +1,16 @@
 import json
-import os
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-
-import httpx
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from config import settings
 from daily_report_builder import DailyReportBuilder
+from json_stream import JSONStreamParser
+from llm_client import get_llm_client
+from news_ranking import SORTED_BY_FINAL_SCORE, SORTED_BY_KEY, is_sorted_by_score, ranked_news
+from prompt_builder import PromptBuilder
 from storage_manager import StorageManager
 
 
@@ -27,35 +29,46 @@ class AIAnalyzerV3:
     DEFAULT_DIMENSION_VALUE = "今日无显著动态"
 
     def __init__(self):
-        self.api_url = settings.AI_API_URL
-        self.api_key = settings.AI_API_KEY
-        self.model = settings.AI_MODEL
         self.storage = StorageManager()
         self.daily_builder = DailyReportBuilder()
+        self.llm_client = get_llm_client()
+        self.prompt_builder = PromptBuilder()
+        self.last_timings: Dict[str, float] = {}
+        self.last_prompt_tokens: Dict[str, int] = {}
 
     def analyze_daily_report_v3(
         self,
         filter_payload: Dict[str, Any],
         raw_news_count: Optional[int] = None,
+        mode: Optional[str] = None,
     ) -> Optional[Dict[str, Any]]:
         news_items = filter_payload.get("news", [])
-        if not news_items or not self.api_key:
+        if not news_items or not self.llm_client.api_key:
             return None
+        if not is_sorted_by_score(filter_payload):
+            # 旧 payload 没有排序标记：在这里排一次，builder 与 prompt 打包都复用该顺序
+            news_items = ranked_news(filter_payload)
+            filter_payload = {**filter_payload, "news": news_items, SORTED_BY_KEY: SORTED_BY_FINAL_SCORE}
 
         date_str = filter_payload.get("date") or datetime.now().strftime("%Y-%m-%d")
         fallback_report = self.daily_builder.build(filter_payload, raw_news_count=raw_news_count)
 
-        signal_interpretation = self._generate_signal_interpretation(news_items, fallback_report)
-        if not signal_interpretation:
-            return None
-
-        deep_analysis = self._generate_deep_analysis(signal_interpretation, news_items, fallback_report)
-        if not deep_analysis:
-            return None
-
-        action_suggestions = self._generate_action_suggestions(deep_analysis, fallback_report)
-        if not action_suggestions:
+        # 新闻上下文只打包一次，两个阶段共用完全相同的前缀，便于服务端前缀缓存命中
+        news_context = self.prompt_builder.build_news_context(news_items, presorted=True)
+
+        mode = mode or settings.AI_ANALYSIS_MODE
+        started_at = time.perf_counter()
+        self.last_timings = {}
+        self.last_prompt_tokens = {"news_context": self.prompt_builder.estimate_tokens(news_context)}
+        if mode == "parallel":
+            stages = self._run_parallel_stages(news_context, fallback_report)
+        else:
+            stages = self._run_sequential_stages(news_context, fallback_report)
+        self.last_timings["total"] = round(time.perf_counter() - started_at, 3)
+        print(f"V3 AI 分析耗时：mode={mode} {self.last_timings} prompt_tokens={self.last_prompt_tokens}")
+        if stages is None:
             return None
+        signal_interpretation, deep_analysis, action_suggestions = stages
 
         report = {
             "meta": {
@@ -68,17 +81,89 @@ class AIAnalyzerV3:
             "deep_analysis": deep_analysis,
             "action_suggestions": action_suggestions,
             "internal_candidates": self._build_internal_candidates(deep_analysis, date_str),
+            "referenced_news": self.daily_builder.build_referenced_news(deep_analysis, news_items),
         }
         self.storage.write_json(self.storage.get_daily_report_path(date_str), report)
         return report
 
+    def _run_sequential_stages(
+        self,
+        news_context: str,
+        fallback_report: Dict[str, Any],
+    ) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]], Dict[str, Any]]]:
+        signal_interpretation = self._timed(
+            "signal_interpretation", self._generate_signal_interpretation, news_context, fallback_report
+        )
+        if not signal_interpretation:
+            return None
+
+        deep_analysis = self._timed(
+            "deep_analysis", self._generate_deep_analysis, signal_interpretation, news_context, fallback_report
+        )
+        if not deep_analysis:
+            return None
+
+        action_suggestions = self._timed(
+            "action_suggestions", self._generate_action_suggestions, deep_analysis, fallback_report
+        )
+        if not action_suggestions:
+            return None
+        return signal_interpretation, deep_analysis, action_suggestions
+
+    def _run_parallel_stages(
+        self,
+        news_context: str,
+        fallback_report: Dict[str, Any],
+    ) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]], Dict[str, Any]]]:
+        """信号解读与深度分析并发执行，深度分析先基于 builder 的 fallback 信号解读。
+
+        开启 AI_ANALYSIS_REFINE 时，先基于 AI 信号解读重跑深度分析，行动建议再基于精修后的深度分析生成，
+        保证两者一致。
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            signal_future = executor.submit(
+                self._timed, "signal_interpretation", self._generate_signal_interpretation, news_context, fallback_report
+            )
+            deep_future = executor.submit(
+                self._timed,
+                "deep_analysis",
+                self._generate_deep_analysis,
+                fallback_report["signal_interpretation"],
+                news_context,
+                fallback_report,
+            )
+            signal_interpretation = signal_future.result()
+            deep_analysis = deep_future.result()
+            if not signal_interpretation or not deep_analysis:
+                return None
+
+        if settings.AI_ANALYSIS_REFINE:
+            refined = self._timed(
+                "deep_analysis_refine", self._generate_deep_analysis, signal_interpretation, news_context, fallback_report
+            )
+            deep_analysis = refined or deep_analysis
+
+        action_suggestions = self._timed(
+            "action_suggestions", self._generate_action_suggestions, deep_analysis, fallback_report
+        )
+        if not action_suggestions:
+            return None
+        return signal_interpretation, deep_analysis, action_suggestions
+
+    def _timed(self, stage: str, func: Callable[..., Any], *args: Any) -> Any:
+        started_at = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.last_timings[stage] = round(time.perf_counter() - started_at, 3)
+
     def _generate_signal_interpretation(
         self,
-        news_items: List[Dict[str, Any]],
+        news_context: str,
         fallback_report: Dict[str, Any],
     ) -> Optional[Dict[str, Any]]:
-        prompt = f"""
-任务：基于给定的 filter_news，为 Trend Radar 生成"信号解读"模块。
+        prompt = f"""{self._news_context_block(news_context)}
+任务：基于上方输入新闻（filter_news），为 Trend Radar 生成"信号解读"模块。
 
 输出要求：
 1. 只能输出 JSON，不要 Markdown，不要解释。
@@ -110,10 +195,8 @@ class AIAnalyzerV3:
 4. top_events 的 so_what 必须具体，不能是"值得关注"等空话。
 5. six_dimension_briefs 每个维度用一句话组合该维度下的 2-3 个事实，例如"事实 A，事实 B，事实 C"。不要做趋势判断（如"正从...转向..."）。
 6. six_dimension_briefs 某维度无内容时写"今日无显著动态"。
-
-输入新闻：
-{json.dumps(self._compact_news_for_prompt(news_items), ensure_ascii=False, indent=2)}
 """
+        self._record_prompt_tokens("signal_interpretation", prompt)
         result = self._call_json(prompt)
         if not isinstance(result, dict):
             return None
@@ -125,11 +208,11 @@ class AIAnalyzerV3:
     def _generate_deep_analysis(
         self,
         signal_interpretation: Dict[str, Any],
-        news_items: List[Dict[str, Any]],
+        news_context: str,
         fallback_report: Dict[str, Any],
     ) -> Optional[List[Dict[str, Any]]]:
-        prompt = f"""
-任务：基于信号解读和 filter_news，生成"深度分析"模块。
+        prompt = f"""{self._news_context_block(news_context)}
+任务：基于信号解读和上方输入新闻（filter_news），生成"深度分析"模块。
 本模块输出 3-5 条趋势观察（trend_observation）。
 
 输出要求：
@@ -157,11 +240,9 @@ class AIAnalyzerV3:
 5. news_ids 只能引用输入新闻的 id。
 
 信号解读：
-{json.dumps(signal_interpretation, ensure_ascii=False, indent=2)}
-
-输入新闻：
-{json.dumps(self._compact_news_for_prompt(news_items), ensure_ascii=False, indent=2)}
-"""
+{self.prompt_builder.dumps(signal_interpretation)}
+{self._trend_history_block(fallback_report["meta"]["date"])}"""
+        self._record_prompt_tokens("deep_analysis", prompt)
         result = self._call_json(prompt)
         if not isinstance(result, list):
             return None
@@ -193,8 +274,9 @@ class AIAnalyzerV3:
 }}
 
 深度分析：
-{json.dumps(deep_analysis, ensure_ascii=False, indent=2)}
+{self.prompt_builder.dumps(deep_analysis)}
 """
+        self._record_prompt_tokens("action_suggestions", prompt)
         result = self._call_json(prompt)
         if not isinstance(result, dict):
             return None
@@ -204,54 +286,42 @@ class AIAnalyzerV3:
             fallback_report["meta"]["date"],
         )
 
+    def _trend_history_block(self, date_str: str) -> str:
+        """跨日主题统计，让 evidence 可以引用真实的 7/30 天变化；无历史数据时不输出。"""
+        trend_index = self.daily_builder.trend_index
+        if not trend_index.has_history(date_str):
+            return ""
+        snapshot = trend_index.snapshot(date_str)
+        if not snapshot:
+            return ""
+        return f"""
+跨日主题统计（count_7d/count_prev_7d 为近 7 天与前 7 天条数，可用于判断单点事件还是模式雏形）：
+{self.prompt_builder.dumps(snapshot)}
+"""
+
+    def _news_context_block(self, news_context: str) -> str:
+        return f"输入新闻（按 final_score 从高到低，已按 token 预算压缩）：\n{news_context}\n"
+
+    def _record_prompt_tokens(self, stage: str, prompt: str):
+        self.last_prompt_tokens[stage] = self.prompt_builder.estimate_tokens(prompt)
+
     def _call_json(self, prompt: str) -> Optional[Any]:
+        if settings.AI_STREAMING:
+            return self.llm_client.complete_stream(
+                "你是一个严格遵守 JSON 输出格式的 AI 行业分析师。",
+                prompt,
+                parser_factory=JSONStreamParser,
+            )
         text = self._call_ai_api(prompt)
         if not text:
             return None
         return self._extract_json(text)
 
     def _call_ai_api(self, prompt: str) -> Optional[str]:
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
-        }
-        payload = {
-            "model": self.model,
-            "messages": [
-                {"role": "system", "content": "你是一个严格遵守 JSON 输出格式的 AI 行业分析师。"},
-                {"role": "user", "content": prompt},
-            ],
-            "stream": False,
-            "max_tokens": 4096,
-        }
-
-        delay = settings.THIRD_LAYER_RETRY_DELAY
-        for attempt in range(settings.THIRD_LAYER_RETRIES):
-            try:
-                with httpx.Client(
-                    proxy=self._http_proxy(),
-                    trust_env=False,
-                ) as client:
-                    response = client.post(
-                        self.api_url,
-                        headers=headers,
-                        json=payload,
-                        timeout=settings.THIRD_LAYER_TIMEOUT,
-                    )
-
-                if response.status_code == 200:
-                    return response.json()["choices"][0]["message"]["content"]
-                print(f"V3 AI 调用失败：{response.status_code} {response.text[:300]}")
-            except Exception as exc:
-                print(f"V3 AI 调用异常：{exc}")
-
-            if attempt < settings.THIRD_LAYER_RETRIES - 1:
-                time.sleep(delay)
-                delay *= 2
-        return None
-
-    def _http_proxy(self) -> Optional[str]:
-        return os.environ.get("https_proxy") or os.environ.get("http_proxy") or None
+        return self.llm_client.complete(
+            "你是一个严格遵守 JSON 输出格式的 AI 行业分析师。",
+            prompt,
+        )
 
     def _extract_json(self, text: str) -> Optional[Any]:
         text = text.strip()
@@ -370,21 +440,6 @@ class AIAnalyzerV3:
     def _build_internal_candidates(self, deep_analysis: List[Dict[str, Any]], date_str: str) -> Dict[str, Any]:
         return self.daily_builder.build_internal_candidates(deep_analysis, date_str)
 
-    def _compact_news_for_prompt(self, news_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        compact = []
-        for item in news_items[:20]:
-            compact.append({
-                "news_id": item.get("id"),
-                "title": item.get("title"),
-                "source": item.get("source"),
-                "url": item.get("url"),
-                "content": item.get("content", "")[:280],
-                "theme_tags": item.get("theme_tags", []),
-                "final_score": item.get("final_score"),
-                "signal_level": item.get("signal_level"),
-            })
-        return compact
-
     def _normalize_news_refs(self, value: Any, fallback: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         refs = self._ensure_dict_list(value)
         if not refs:
@@ -0,0 +1,67 @@
+"""
+全文检索基准：向临时 SQLite FTS5 索引写入合成新闻存档，统计几类典型查询的耗时。
+
+合成语料词表很小，常见词几乎命中全部文档，需要对所有命中计算 BM25 后排序，是最坏情况；
+罕见词查询只命中少量文档，耗时主要取决于命中数。
+
+用法：python benchmarks/news_search_benchmark.py [文档数，默认 30000]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_search import NewsSearchIndex  # noqa: E402
+
+WORDS = [
+    "推理模型", "智能体", "工作流", "开源", "融资", "芯片", "编程助手", "多模态", "监管", "数据中心",
+    "发布", "上线", "降价", "合作", "评测", "设计工具", "商业化", "算力", "安全", "隐私",
+]
+ENGLISH = ["OpenAI", "Cursor", "Claude", "Gemini", "GPT-5", "MCP", "agent", "benchmark", "API", "Figma"]
+RARE_WORDS = ["量子计算", "脑机接口", "Neuralink"]  # 约千分之一的文档包含，对应实际中更常见的选择性查询
+QUERIES = ["推理模型", "cursor 编程助手", "GPT-5 发布", "智能体 工作流 开源", "芯", "figma", "量子计算", "neuralink 脑机接口"]
+
+
+def build_news(index: int, rng: random.Random) -> dict:
+    title = "".join(rng.sample(WORDS, 3)) + " " + rng.choice(ENGLISH)
+    if rng.random() < 0.001:
+        title += " " + " ".join(RARE_WORDS)
+    content = " ".join(rng.choice(WORDS) + rng.choice(ENGLISH) for _ in range(60))
+    return {
+        "id": f"news_{index}",
+        "title": title,
+        "content": content,
+        "source": rng.choice(["36kr", "ifanr", "机器之心", "量子位"]),
+        "final_score": round(rng.uniform(5.5, 9.5), 2),
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    rng = random.Random(40)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index = NewsSearchIndex(os.path.join(temp_dir, "news_search.db"))
+        started_at = time.perf_counter()
+        per_day = 300
+        for day in range(0, count, per_day):
+            date_str = f"2026-{1 + day // per_day // 28 % 12:02d}-{1 + day // per_day % 28:02d}"
+            index.index_news([build_news(n, rng) for n in range(day, min(day + per_day, count))], date_str, kind="filter")
+        print(f"写入 {count} 条新闻：{time.perf_counter() - started_at:.2f}s")
+
+        rounds = 20
+        for query in QUERIES:
+            index.search(query)  # 预热页缓存
+            started_at = time.perf_counter()
+            for _ in range(rounds):
+                results = index.search(query)
+            elapsed = (time.perf_counter() - started_at) / rounds * 1000
+            print(f"{query!r:28} {elapsed:8.2f} ms/次  命中前 {len(results)} 条")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+邮件渲染基准：对比逐段 str.replace 的旧实现与预编译模板的单次拼接，
+以及同一份报告发给多位收件人时逐人完整渲染与"渲染一次、按人拼接"的差距。
+
+用法：python benchmarks/render_email_benchmark.py [渲染次数 / 收件人数，默认 1000]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import v3_email_renderer as renderer  # noqa: E402
+
+
+def build_report(index: int) -> dict:
+    return {
+        "meta": {"date": "2026-04-14", "filtered_count": 20 + index % 10},
+        "signal_interpretation": {
+            "main_conclusion": f"第 {index} 份日报：AI Agent 工作流进入规模化落地阶段",
+            "why_it_matters": "工具链成熟度决定个人效率上限。",
+            "top_events": [
+                {"title": f"事件 {n}", "description": "事件描述" * 5, "so_what": "对我意味什么" * 3}
+                for n in range(3)
+            ],
+            "six_dimension_briefs": {
+                "model_and_capability": "推理模型降价。",
+                "ai_product_and_interaction": "Agent 产品形态收敛。",
+                "design_and_experience": "今日无显著动态",
+                "technology_and_platform": "MCP 生态扩张。",
+                "business_and_monetization": "按结果计费出现。",
+                "policy_and_ethics": "今日无显著动态",
+            },
+        },
+        "deep_analysis": [
+            {
+                "title": f"趋势 {n}",
+                "evidence": "证据" * 20,
+                "reasoning": "推理" * 40,
+                "so_what_for_me": "影响" * 20,
+                "news_ids": [f"news_{n}_{m}" for m in range(3)],
+            }
+            for n in range(4)
+        ],
+        "action_suggestions": {
+            bucket: [{"action": f"{bucket} 行动 {n}"} for n in range(3)]
+            for bucket in ("today", "this_week", "this_month")
+        },
+    }
+
+
+def legacy_render(report_data: dict, news_map: dict) -> str:
+    """旧实现：每次读盘，再对整份 HTML 逐个占位符 replace。"""
+    template = renderer.load_template()
+    meta = report_data.get("meta", {})
+    signals = report_data.get("signal_interpretation", {})
+    today_html, this_week_html, this_month_html = renderer.render_actions(report_data.get("action_suggestions", {}))
+    replacements = [
+        ("{{header_bg}}", renderer.get_header_bg_base64()),
+        ("{{meta.date}}", meta.get("date", "")),
+        ("{{meta.day_of_week}}", renderer.get_day_of_week(meta.get("date", ""))),
+        ("{{meta.filtered_count}}", str(meta.get("filtered_count", 0))),
+        ("{{signal_interpretation.main_conclusion}}", signals.get("main_conclusion", "")),
+        ("{{signal_interpretation.why_it_matters}}", signals.get("why_it_matters", "")),
+        ("{{top_events_html}}", renderer.render_top_events(signals.get("top_events", []))),
+        ("{{six_dimensions_html}}", renderer.render_six_dimensions(signals.get("six_dimension_briefs", {}))),
+        ("{{trend_watch_html}}", renderer.render_trend_watch(report_data.get("deep_analysis", []), news_map)),
+        ("{{actions_today_html}}", today_html),
+        ("{{actions_this_week_html}}", this_week_html),
+        ("{{actions_this_month_html}}", this_month_html),
+        ("{{recipient.greeting_html}}", ""),
+        ("{{recipient.footer_html}}", ""),
+    ]
+    for placeholder, value in replacements:
+        template = template.replace(placeholder, value)
+    return template
+
+
+def run(render, reports, news_map) -> float:
+    started_at = time.perf_counter()
+    for report in reports:
+        render(report, news_map)
+    return time.perf_counter() - started_at
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    reports = [build_report(index) for index in range(count)]
+    news_map = {
+        f"news_{n}_{m}": {"title": f"引用新闻 {n}-{m}", "url": f"https://example.com/{n}/{m}"}
+        for n in range(4)
+        for m in range(3)
+    }
+    def compiled_render(report, news_map):
+        # 与旧实现一致地内联 base64 背景图且不压缩，保证输出可逐字节比对
+        return renderer.render_email(report, news_map, header_image_mode="inline", minify=False)
+
+    assert legacy_render(reports[0], news_map) == compiled_render(reports[0], news_map)
+
+    legacy = run(legacy_render, reports, news_map)
+    compiled = run(compiled_render, reports, news_map)
+    print(f"渲染 {count} 份日报")
+    print(f"旧实现（读盘 + 多轮 replace）：{legacy:.3f}s，{legacy / count * 1000:.3f} ms/份")
+    print(f"预编译模板（单次 join）：  {compiled:.3f}s，{compiled / count * 1000:.3f} ms/份")
+    print(f"加速比：{legacy / compiled:.2f}x")
+
+    html_before, html_after = renderer.prepare_email(reports[0], news_map, header_image_mode="none", minify=True).html_size
+    print(f"HTML 压缩（不含 Header 图）：{html_before} → {html_after} 字节")
+
+    sections = [None, ["models", "business"], ["Design", "policy_and_ethics", "platform"]]
+    recipients = [
+        {"email": f"reader{index}@example.com", "name": f"读者{index}", "sections": sections[index % 3]}
+        for index in range(count)
+    ]
+    report = reports[0]
+    prepared = renderer.prepare_email(report, news_map, header_image_mode="inline")
+    assert prepared.render(recipients[1]) == renderer.render_email(
+        report, news_map, header_image_mode="inline", recipient=recipients[1]
+    )
+
+    started_at = time.perf_counter()
+    for recipient in recipients:
+        renderer.render_email(report, news_map, header_image_mode="inline", recipient=recipient)
+    per_recipient = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    prepared = renderer.prepare_email(report, news_map, header_image_mode="inline")
+    for recipient in recipients:
+        prepared.render(recipient)
+    render_once = time.perf_counter() - started_at
+    print(f"\n同一份日报发给 {count} 位收件人")
+    print(f"逐人完整渲染：  {per_recipient:.3f}s")
+    print(f"渲染一次按人拼接：{render_once:.3f}s")
+    print(f"加速比：{per_recipient / render_once:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
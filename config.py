@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 from datetime import time
 
 
@@ -18,6 +18,10 @@ class Settings(BaseSettings):
     FILTER_NEWS_DIR: str = "data/news/filter_news"
     REPORT_DIR: str = "data/report"
     DAILY_REPORT_DIR: str = "data/report/daily"
+    CACHE_DIR: str = "data/cache"
+    INDEX_DIR: str = "data/index"
+    OUTBOX_DIR: str = "data/outbox"
+    SITE_DIR: str = "data/site"
 
     # 新闻抓取配置
     NEWS_RETENTION_DAYS: int = 60  # 2个月
@@ -31,11 +35,69 @@ class Settings(BaseSettings):
     AI_MODEL: str = "deepseek-chat"  # 默认使用DeepSeek模型
     AI_API_URL: str = "https://api.deepseek.com/v1/chat/completions"
     AI_SCORE_THRESHOLD: float = 5.5
+    AI_SCORE_WEIGHTS: Dict[str, float] = {
+        "importance": 0.35,
+        "relevance_to_me": 0.3,
+        "signal_strength": 0.2,
+        "actionability": 0.15,
+    }
+    AI_BATCH_SCORING_MIN_ITEMS: int = 200  # 条目数达到该值且安装了 numpy 时走列式批量打分
+    URL_CANONICAL_CACHE_SIZE: int = 4096
+
+    # 近似重复聚类配置
+    NEAR_DUPLICATE_ENABLED: bool = True
+    NEAR_DUPLICATE_THRESHOLD: float = 0.6  # MinHash 估计的 Jaccard 相似度阈值
+
+    # 本地相关性预筛配置：只把画像得分最高的 top-K 条交给 LLM 评分
+    AI_PREFILTER_ENABLED: bool = True
+    AI_PREFILTER_TOP_K: int = 30
+    AI_PREFILTER_PROFILE_DAYS: int = 30  # 用最近多少天的 filter_news 构建兴趣画像
+    AI_PREFILTER_MIN_RELEVANCE: int = 7  # relevance_to_me 达到该值的历史条目计入画像
+    AI_PREFILTER_MIN_PROFILE_ITEMS: int = 5  # 画像条目不足时退化为按原顺序取前 top-K
+
+    # 离线训练的兜底评分模型配置（python main.py train-scorer 生成）
+    SCORE_MODEL_ENABLED: bool = True
+    SCORE_MODEL_HASH_BITS: int = 18  # 特征哈希空间为 2^bits
+    SCORE_MODEL_EPOCHS: int = 8
+    SCORE_MODEL_LEARNING_RATE: float = 0.1
+    SCORE_SAMPLE_LOG_ENABLED: bool = True  # 记录每条 LLM 评分结果（含未过阈值的条目）作为训练样本
+    SCORE_SAMPLE_RETENTION_DAYS: int = 180
+
+    # 跨日趋势索引配置
+    TREND_INDEX_RETENTION_DAYS: int = 90
+    TREND_INDEX_TOP_ITEMS: int = 3  # 每个主题每天保留的高分新闻数
+
+    # 全文检索配置（SQLite FTS5）
+    SEARCH_INDEX_ENABLED: bool = True
+
+    # 静态归档站配置（python main.py build-site 生成）
+    SITE_BUILD_WORKERS: int = 0  # 渲染进程数，0 表示按 CPU 核数
+    SITE_BUILD_PARALLEL_MIN: int = 8  # 待渲染日报达到该数量（如首次回填）时才启用进程池
+
+    # 本地预览服务配置（python main.py serve）
+    PREVIEW_HOST: str = "127.0.0.1"
+    PREVIEW_PORT: int = 8000
+    PREVIEW_CACHE_SIZE: int = 32  # 缓存的渲染结果份数
+
+    # 实体倒排索引配置
+    ENTITY_INDEX_SHARDS: int = 32  # 按词项哈希分片，查询只需读取一个分片
+
+    # AI 评分缓存配置
+    AI_SCORE_CACHE_ENABLED: bool = True
+    AI_SCORE_CACHE_TTL_HOURS: int = 72  # 缓存有效期（小时）
+    AI_SCORE_PROMPT_VERSION: str = "v3.1"  # 评分 prompt 变更时需同步更新，旧缓存随之失效
     
     # 第三层分析配置
     THIRD_LAYER_TIMEOUT: int = 120  # 超时时间（秒）
     THIRD_LAYER_RETRIES: int = 3  # 重试次数
     THIRD_LAYER_RETRY_DELAY: int = 3  # 初始重试延迟（秒）
+    AI_PROMPT_TOKEN_BUDGET: int = 6000  # 日报分析 prompt 中新闻上下文的 token 预算
+    AI_PROMPT_MAX_ITEMS: int = 30  # 新闻上下文最多纳入的条目数
+    AI_ANALYSIS_MODE: str = "sequential"  # sequential | parallel
+    AI_ANALYSIS_REFINE: bool = False  # parallel 模式下是否基于 AI 信号解读再精修一次深度分析
+    AI_STREAMING: bool = False  # 以 SSE 流式接收 LLM 输出并增量解析 JSON
+    AI_HTTP2: bool = True  # 安装 h2 时启用 HTTP/2
+    AI_MAX_CONNECTIONS: int = 10  # LLM 连接池上限
     
     # Tavily配置
     TAVILY_API_KEY: str = ""
@@ -46,6 +108,22 @@ class Settings(BaseSettings):
     EMAIL_PASSWORD: str = ""
     EMAIL_SMTP_SERVER: str = "smtp.163.com"
     EMAIL_SMTP_PORT: int = 465
+    EMAIL_RECIPIENTS: str = ""  # 订阅者列表，逗号或分号分隔；为空时只发给 EMAIL_RECEIVER
+    EMAIL_RECIPIENTS_FILE: str = ""  # 可选：订阅者文件，每行一个地址，# 开头为注释
+    EMAIL_SMTP_TIMEOUT: int = 30  # 秒
+    EMAIL_HTML_MINIFY: bool = True  # 发送前压缩 V3 邮件 HTML（去注释、折叠空白）
+    EMAIL_HTML_EXTRACT_STYLES: bool = False  # 把重复的内联样式提取到 <style>；部分客户端会丢弃 <style>，默认关闭
+    EMAIL_UNSUBSCRIBE_URL: str = ""  # 退订链接，{email} 会替换为收件人地址；为空时不显示退订页脚
+    EMAIL_MAX_MESSAGES_PER_CONNECTION: int = 50  # 单条 SMTP 连接最多发送的邮件数，超过后重连
+    EMAIL_SEND_CONCURRENCY: int = 3  # 并发 SMTP 连接数
+    EMAIL_SEND_RETRIES: int = 3  # 4xx 暂时失败的收件人最多重试次数
+    EMAIL_RETRY_DELAY: float = 5.0  # 首次重试等待秒数，之后指数退避
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 6  # 发件箱中单个收件人的最多投递轮数，超过后标记为 failed
+    EMAIL_OUTBOX_RETRY_DELAY: int = 600  # 发件箱首次重投间隔（秒），之后指数退避
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 30
+    EMAIL_HEADER_IMAGE_MODE: str = "cid"  # cid（multipart/related 内嵌附件）| inline（base64 data URI）| none
+    EMAIL_HEADER_IMAGE_OPTIMIZE: bool = False  # 安装 Pillow 时按展示宽度缩放并量化 Header 背景图
+    EMAIL_HEADER_IMAGE_WIDTH: int = 600
     
     # 定时任务配置
     DAILY_SCHEDULE_TIME: time = time(8, 0, 0)  # 每天早上8点
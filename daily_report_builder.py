@@ -1,6 +1,9 @@
 from collections import defaultdict
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from news_ranking import ranked_news
+from trend_index import TrendIndex
 
 
 class DailyReportBuilder:
@@ -38,10 +41,13 @@ class DailyReportBuilder:
         "general_ai": "AI 动态追踪",
     }
 
+    def __init__(self, trend_index: Optional[TrendIndex] = None):
+        self.trend_index = trend_index or TrendIndex()
+
     def build(self, filter_payload: Dict[str, Any], raw_news_count: int = None) -> Dict[str, Any]:
         date_str = filter_payload.get("date") or datetime.now().strftime("%Y-%m-%d")
         news_items = filter_payload.get("news", [])
-        top_news = sorted(news_items, key=lambda item: item.get("final_score", 0), reverse=True)
+        top_news = ranked_news(filter_payload)
 
         report = {
             "meta": {
@@ -61,11 +67,28 @@ class DailyReportBuilder:
 
         report["action_suggestions"] = self._build_action_suggestions(report["deep_analysis"], date_str)
         report["internal_candidates"] = self._build_internal_candidates(report["deep_analysis"], date_str)
+        report["referenced_news"] = self.build_referenced_news(report["deep_analysis"], news_items)
         return report
 
     def build_internal_candidates(self, deep_analysis: List[Dict[str, Any]], date_str: str) -> Dict[str, List[Dict[str, Any]]]:
         return self._build_internal_candidates(deep_analysis, date_str)
 
+    def build_referenced_news(
+        self, deep_analysis: List[Dict[str, Any]], news_items: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """只摘取 deep_analysis 引用到的新闻，渲染时无需再读整天的 filter_news。"""
+        referenced_ids = {news_id for trend in deep_analysis for news_id in trend.get("news_ids", [])}
+        return {
+            item["id"]: {
+                "title": item.get("title", ""),
+                "url": item.get("url", ""),
+                "source": item.get("source", ""),
+                "theme_tags": list(item.get("theme_tags", [])),
+            }
+            for item in news_items
+            if item.get("id") in referenced_ids
+        }
+
     def _build_signal_interpretation(self, news_items: List[Dict[str, Any]], date_str: str) -> Dict[str, Any]:
         """Build signal_interpretation fallback with V3.5 schema."""
         # Build top_events (3 items)
@@ -134,7 +157,7 @@ class DailyReportBuilder:
                 "type": "trend_observation",
                 "id": "obs_%s_%s" % (date_str, index),
                 "title": trend_name,
-                "evidence": "%s 在多条新闻中重复出现，说明不是单点噪音。" % trend_name,
+                "evidence": self._trend_evidence(tag, trend_name, len(items), date_str),
                 "news_ids": [item.get("id", "") for item in items[:3]],
                 "reasoning": "%s 正在通过产品、能力和市场反馈的联动逐渐放大影响。短期内会提高相关信息的决策优先级，长期可能重塑个人能力结构和项目选择。" % trend_name,
                 "so_what_for_me": self._for_me_summary(lead),
@@ -142,6 +165,30 @@ class DailyReportBuilder:
 
         return observations
 
+    def _trend_evidence(self, tag: str, trend_name: str, today_count: int, date_str: str) -> str:
+        if not self.trend_index.has_history(date_str):
+            if today_count > 1:
+                return "%s 今日在 %s 条新闻中出现，暂无历史数据判断是否为持续趋势。" % (trend_name, today_count)
+            return "%s 今日仅有单条新闻，属于单点事件，暂无历史数据佐证。" % trend_name
+
+        stats = self.trend_index.stats("tag:%s" % tag, date_str)
+        if stats["count_7d"] > stats["count_prev_7d"] * 1.5 and stats["count_7d"] >= 3:
+            judgement = "热度明显上升，已呈模式雏形"
+        elif stats["count_7d"] < stats["count_prev_7d"]:
+            judgement = "热度较前一周回落"
+        elif stats["active_days_30d"] <= 1:
+            judgement = "近期首次出现，暂属单点事件"
+        else:
+            judgement = "保持稳定出现，属于持续性主题"
+        return "%s 近 7 天出现 %s 条（前 7 天 %s 条），近 30 天有 %s 天出现，近 7 天均分 %s，%s。" % (
+            trend_name,
+            stats["count_7d"],
+            stats["count_prev_7d"],
+            stats["active_days_30d"],
+            stats["avg_score_7d"],
+            judgement,
+        )
+
     def _build_action_suggestions(self, deep_analysis: List[Dict[str, Any]], date_str: str) -> Dict[str, List[Dict[str, Any]]]:
         """Build action_suggestions fallback with V3.5 schema."""
         buckets = {"today": [], "this_week": [], "this_month": []}
@@ -0,0 +1,210 @@
+import atexit
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import settings
+
+
+@dataclass
+class DeliveryJob:
+    """一封已序列化的邮件及其信封收件人；同一 job 的收件人收到完全相同的内容。"""
+
+    recipients: List[str]
+    message: str
+
+
+@dataclass
+class DeliveryResult:
+    delivered: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)  # 收件人 -> 最后一次失败原因
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+class _PooledConnection:
+    """已登录的 SMTP 连接，记录已发送的邮件数以便达到上限后轮换。"""
+
+    def __init__(self, factory: Callable[[], smtplib.SMTP]):
+        self.server = factory()
+        self.sent = 0
+
+    def close(self):
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+
+
+class SMTPDeliveryEngine:
+    """复用已登录连接的 SMTP 投递引擎。
+
+    每个 worker 从池中借一条连接，发满 max_messages_per_connection 封后关闭重建；
+    sendmail 返回的逐收件人拒绝中，4xx 视为暂时失败，只对这些收件人退避重试，5xx 直接记为失败。
+    连接在 deliver 调用之间保留在池中，再次借出前用 NOOP 探活。
+    登录失败（SMTPAuthenticationError）记在引擎上，之后的 job 不再重连，直接记为失败。
+    """
+
+    def __init__(
+        self,
+        sender: str,
+        password: str,
+        host: str,
+        port: int,
+        max_messages_per_connection: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_delay: Optional[float] = None,
+        connection_factory: Optional[Callable[[], smtplib.SMTP]] = None,
+    ):
+        self.sender = sender
+        self.password = password
+        self.host = host
+        self.port = port
+        self.max_messages_per_connection = max_messages_per_connection or settings.EMAIL_MAX_MESSAGES_PER_CONNECTION
+        self.concurrency = concurrency or settings.EMAIL_SEND_CONCURRENCY
+        self.max_retries = settings.EMAIL_SEND_RETRIES if max_retries is None else max_retries
+        self.retry_delay = settings.EMAIL_RETRY_DELAY if retry_delay is None else retry_delay
+        self._connection_factory = connection_factory or self._connect
+        self._idle: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue()
+        self._auth_error: Optional[smtplib.SMTPAuthenticationError] = None
+
+    def deliver(self, jobs: List[DeliveryJob]) -> DeliveryResult:
+        result = DeliveryResult()
+        if not jobs:
+            return result
+        workers = max(1, min(self.concurrency, len(jobs)))
+        if workers == 1:
+            outcomes = [self._deliver_job(job) for job in jobs]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                outcomes = list(executor.map(self._deliver_job, jobs))
+        for delivered, failed in outcomes:
+            result.delivered.extend(delivered)
+            result.failed.update(failed)
+        return result
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _deliver_job(self, job: DeliveryJob) -> Tuple[List[str], Dict[str, str]]:
+        pending = list(dict.fromkeys(job.recipients))
+        delivered: List[str] = []
+        failed: Dict[str, str] = {}
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.retry_delay * (2 ** (attempt - 1)))
+            transient: Dict[str, str] = {}
+            try:
+                refused = self._send(pending, job.message)
+            except smtplib.SMTPRecipientsRefused as exc:
+                refused = exc.recipients
+            except smtplib.SMTPAuthenticationError as exc:
+                # 账号或授权码错误不会因重试恢复，反复登录还可能触发邮箱风控
+                self._auth_error = exc
+                failed.update({recipient: f"{exc.smtp_code} {exc.smtp_error!r}" for recipient in pending})
+                pending = []
+                refused = None
+            except smtplib.SMTPResponseException as exc:
+                reason = f"{exc.smtp_code} {exc.smtp_error!r}"
+                if 400 <= exc.smtp_code < 500:
+                    transient = {recipient: reason for recipient in pending}
+                else:
+                    failed.update({recipient: reason for recipient in pending})
+                    pending = []
+                refused = None
+            except (smtplib.SMTPException, OSError) as exc:
+                # 连接中断等网络错误：本批收件人整体重试
+                transient = {recipient: str(exc) for recipient in pending}
+                refused = None
+
+            if refused is not None:
+                for recipient in pending:
+                    if recipient not in refused:
+                        delivered.append(recipient)
+                        continue
+                    code, message = refused[recipient]
+                    reason = f"{code} {message!r}"
+                    if 400 <= code < 500:
+                        transient[recipient] = reason
+                    else:
+                        failed[recipient] = reason
+
+            pending = list(transient)
+            if not pending:
+                break
+        else:
+            failed.update(transient)
+        return delivered, failed
+
+    def _send(self, recipients: List[str], message: str) -> Dict[str, Tuple[int, bytes]]:
+        connection = self._acquire()
+        try:
+            refused = connection.server.sendmail(self.sender, recipients, message)
+        except smtplib.SMTPRecipientsRefused:
+            self._release(connection)
+            raise
+        except (smtplib.SMTPServerDisconnected, OSError):
+            connection.close()
+            raise
+        except smtplib.SMTPException:
+            self._release(connection)
+            raise
+        self._release(connection)
+        return refused
+
+    def _acquire(self) -> _PooledConnection:
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                if self._auth_error is not None:
+                    raise self._auth_error
+                return _PooledConnection(self._connection_factory)
+            try:
+                if connection.server.noop()[0] == 250:
+                    return connection
+            except (smtplib.SMTPException, OSError):
+                pass
+            connection.close()
+
+    def _release(self, connection: _PooledConnection):
+        connection.sent += 1
+        if connection.sent >= self.max_messages_per_connection:
+            connection.close()
+        else:
+            self._idle.put(connection)
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP_SSL(self.host, self.port, timeout=settings.EMAIL_SMTP_TIMEOUT)
+        server.login(self.sender, self.password)
+        return server
+
+
+_shared_engine: Optional[SMTPDeliveryEngine] = None
+_shared_lock = threading.Lock()
+
+
+def get_delivery_engine() -> SMTPDeliveryEngine:
+    """进程内共享的投递引擎，日报与错误通知邮件复用同一个连接池。"""
+    global _shared_engine
+    with _shared_lock:
+        if _shared_engine is None:
+            _shared_engine = SMTPDeliveryEngine(
+                sender=settings.EMAIL_SENDER,
+                password=settings.EMAIL_PASSWORD,
+                host=settings.EMAIL_SMTP_SERVER,
+                port=settings.EMAIL_SMTP_PORT,
+            )
+            atexit.register(_shared_engine.close)
+        return _shared_engine
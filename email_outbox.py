@@ -0,0 +1,181 @@
+import email
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from email_delivery import DeliveryJob, SMTPDeliveryEngine, get_delivery_engine
+from email_template import CompiledTemplate
+from storage_manager import StorageManager
+
+
+class EmailOutbox:
+    """落盘的邮件发件箱：渲染好的邮件先写入 data/outbox，再由 drain 投递。
+
+    每个批次（日报按日期）一个目录：message.eml 存一份不含 To 头的 MIME 正文，
+    state.json 记录每位收件人的状态，幂等键即"批次 + 收件人"，已发送的收件人不会被重复投递。
+    失败的收件人按 EMAIL_OUTBOX_RETRY_DELAY 指数退避，超过 EMAIL_OUTBOX_MAX_ATTEMPTS 次后标记为 failed。
+    """
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    DEFAULT_CONTEXT_KEY = "*"  # contexts.json 中通用取值的键，用于没有专属取值的收件人
+
+    def __init__(self, outbox_dir: Optional[str] = None):
+        self.storage = StorageManager()
+        self.outbox_dir = outbox_dir or self.storage.get_outbox_dir()
+
+    def enqueue(
+        self,
+        batch_id: str,
+        message: str,
+        recipients: List[str],
+        contexts: Optional[Dict[str, Dict[str, str]]] = None,
+        default_context: Optional[Dict[str, str]] = None,
+    ) -> int:
+        """写入一个批次，返回新进入待发送状态的收件人数；重复入队会覆盖正文，但跳过已发送的收件人。
+
+        contexts 为收件人 -> 占位符取值，投递时填入正文各 text 部分中剩余的 {{...}} 占位符；
+        此时 text 部分应为 CompiledTemplate.escaped_source 的输出，合并时还原其中的转义。
+        default_context 为通用取值，填给 contexts 中没有的收件人（例如之前入队、已不在本次订阅者列表中的收件人）。
+        """
+        batch_dir = os.path.join(self.outbox_dir, batch_id)
+        os.makedirs(batch_dir, exist_ok=True)
+        message_path = os.path.join(batch_dir, "message.eml")
+        with open(message_path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(message)
+        os.replace(message_path + ".tmp", message_path)
+        contexts_path = os.path.join(batch_dir, "contexts.json")
+        if default_context is not None:
+            contexts = dict(contexts or {}, **{self.DEFAULT_CONTEXT_KEY: default_context})
+        if contexts:
+            self.storage.write_json(contexts_path, contexts)
+        elif os.path.exists(contexts_path):
+            os.remove(contexts_path)
+
+        state = self._read_state(batch_id)
+        queued = 0
+        for recipient in dict.fromkeys(recipients):
+            entry = state.get(recipient)
+            if entry and entry["status"] == self.SENT:
+                continue
+            state[recipient] = {
+                "status": self.PENDING,
+                "attempts": 0,
+                "next_attempt_at": 0,
+                "last_error": entry.get("last_error") if entry else None,
+            }
+            queued += 1
+        self._write_state(batch_id, state)
+        return queued
+
+    def has_batch(self, batch_id: str) -> bool:
+        return os.path.exists(self._state_path(batch_id))
+
+    def batches(self) -> List[str]:
+        if not os.path.exists(self.outbox_dir):
+            return []
+        return sorted(name for name in os.listdir(self.outbox_dir) if self.has_batch(name))
+
+    def drain(self, engine: Optional[SMTPDeliveryEngine] = None, force: bool = False) -> Dict[str, int]:
+        """投递所有到期的待发送收件人；force 为 True 时忽略退避时间，用于手动重发。"""
+        engine = engine or get_delivery_engine()
+        summary = {"sent": 0, "retry": 0, "failed": 0, "pending": 0}
+        now = time.time()
+        for batch_id in self.batches():
+            state = self._read_state(batch_id)
+            due = [
+                recipient
+                for recipient, entry in state.items()
+                if entry["status"] == self.PENDING and (force or entry["next_attempt_at"] <= now)
+            ]
+            if due:
+                self._deliver_batch(batch_id, state, due, engine, now)
+                self._write_state(batch_id, state)
+            for entry in state.values():
+                if entry["status"] == self.PENDING:
+                    summary["pending"] += 1
+            summary["sent"] += sum(1 for recipient in due if state[recipient]["status"] == self.SENT)
+            summary["failed"] += sum(1 for recipient in due if state[recipient]["status"] == self.FAILED)
+            summary["retry"] += sum(1 for recipient in due if state[recipient]["status"] == self.PENDING)
+        return summary
+
+    def pending_count(self, batch_id: str) -> int:
+        return sum(1 for entry in self._read_state(batch_id).values() if entry["status"] == self.PENDING)
+
+    def prune(self, retention_days: Optional[int] = None):
+        """删除超过保留期且已无待发送收件人的批次。"""
+        days = settings.EMAIL_OUTBOX_RETENTION_DAYS if retention_days is None else retention_days
+        cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        for batch_id in self.batches():
+            if batch_id < cutoff and not self.pending_count(batch_id):
+                shutil.rmtree(os.path.join(self.outbox_dir, batch_id), ignore_errors=True)
+
+    def _deliver_batch(
+        self,
+        batch_id: str,
+        state: Dict[str, Dict[str, Any]],
+        recipients: List[str],
+        engine: SMTPDeliveryEngine,
+        now: float,
+    ):
+        batch_dir = os.path.join(self.outbox_dir, batch_id)
+        with open(os.path.join(batch_dir, "message.eml"), "r", encoding="utf-8") as f:
+            message = f.read()
+        contexts = self.storage.read_json(os.path.join(batch_dir, "contexts.json"), default={})
+        merger = _MessageMerger(message) if contexts else None
+        default_context = contexts.get(self.DEFAULT_CONTEXT_KEY, {})
+        jobs = []
+        for recipient in recipients:
+            body = merger.render(contexts.get(recipient, default_context)) if merger else message
+            jobs.append(DeliveryJob([recipient], f"To: {recipient}\n{body}"))
+        result = engine.deliver(jobs)
+
+        for recipient in result.delivered:
+            state[recipient].update({"status": self.SENT, "sent_at": datetime.now().isoformat(), "last_error": None})
+        for recipient in recipients:
+            entry = state[recipient]
+            if entry["status"] == self.SENT:
+                continue
+            entry["attempts"] += 1
+            entry["last_error"] = result.failed.get(recipient, "未投递")
+            if entry["attempts"] >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                entry["status"] = self.FAILED
+            else:
+                entry["next_attempt_at"] = now + settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (entry["attempts"] - 1)
+
+    def _read_state(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        return self.storage.read_json(self._state_path(batch_id), default={})
+
+    def _write_state(self, batch_id: str, state: Dict[str, Dict[str, Any]]):
+        self.storage.write_json(self._state_path(batch_id), state)
+
+    def _state_path(self, batch_id: str) -> str:
+        return os.path.join(self.outbox_dir, batch_id, "state.json")
+
+
+class _MessageMerger:
+    """把批次正文中带占位符的 text 部分各编译一次，按收件人只做拼接与重新编码；未提供的字段填空。
+
+    text 部分按 CompiledTemplate.escaped_source 书写，报告或新闻正文里原有的 {{...}} 不会被当成占位符。
+    """
+
+    def __init__(self, message: str):
+        self.message = email.message_from_string(message)
+        self.parts = []
+        for part in self.message.walk():
+            if part.get_content_maintype() != "text":
+                continue
+            charset = part.get_content_charset() or "utf-8"
+            template = CompiledTemplate.from_escaped_source(part.get_payload(decode=True).decode(charset))
+            if template.names:
+                self.parts.append((part, template))
+
+    def render(self, context: Dict[str, str]) -> str:
+        for part, template in self.parts:
+            del part["Content-Transfer-Encoding"]
+            part.set_payload(template.render({name: context.get(name, "") for name in template.names}), "utf-8")
+        return self.message.as_string()
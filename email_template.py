@@ -0,0 +1,104 @@
+"""
+预编译的邮件模板
+
+模板只在首次使用（或文件 mtime 变化）时解析一次，拆成字面量与占位符交替的片段列表，
+渲染时按片段查表后一次 ''.join 输出，不再对整份 HTML 做多轮 str.replace。
+"""
+
+import os
+import re
+import threading
+from typing import Any, Dict, List, Tuple
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([\w.]+)\s*\}\}")
+# escaped_source 中字面量里的 "{{" 写作该标记；标记不符合占位符语法，重新解析时不会被当成占位符
+ESCAPED_OPEN = "{{!}}"
+
+
+class CompiledTemplate:
+    """字面量与占位符交替的片段序列：literals 比 names 多一个元素。"""
+
+    def __init__(self, source: str):
+        self.literals: List[str] = []
+        self.names: List[str] = []
+        self.raw_placeholders: List[str] = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.literals.append(source[position:match.start()])
+            self.names.append(match.group(1))
+            self.raw_placeholders.append(match.group(0))
+            position = match.end()
+        self.literals.append(source[position:])
+
+    def render(self, context: Dict[str, Any]) -> str:
+        """一次拼接输出；context 中缺失的占位符原样保留，便于发现漏填字段。"""
+        parts = [self.literals[0]]
+        for name, raw, literal in zip(self.names, self.raw_placeholders, self.literals[1:]):
+            value = context.get(name)
+            parts.append(raw if value is None else str(value))
+            parts.append(literal)
+        return "".join(parts)
+
+    def partial(self, context: Dict[str, Any]) -> "CompiledTemplate":
+        """先填入 context 中已有的字段，返回只剩其余占位符的模板。
+
+        已填入的值直接并入相邻字面量，不会被重新解析，值里即使含有 {{...}} 也不会被当成占位符。
+        """
+        template = CompiledTemplate("")
+        pending = [self.literals[0]]
+        template.literals = []
+        for name, raw, literal in zip(self.names, self.raw_placeholders, self.literals[1:]):
+            value = context.get(name)
+            if value is None:
+                template.literals.append("".join(pending))
+                template.names.append(name)
+                template.raw_placeholders.append(raw)
+                pending = [literal]
+            else:
+                pending.extend((str(value), literal))
+        template.literals.append("".join(pending))
+        return template
+
+    @property
+    def source(self) -> str:
+        """还原为模板文本，剩余占位符保持原样。"""
+        return self.render({})
+
+    @property
+    def escaped_source(self) -> str:
+        """可落盘后再解析的模板文本：字面量中的 "{{" 转义为 ESCAPED_OPEN，只有剩余占位符保持 {{...}} 形式。"""
+        parts = [self.literals[0].replace("{{", ESCAPED_OPEN)]
+        for raw, literal in zip(self.raw_placeholders, self.literals[1:]):
+            parts.extend((raw, literal.replace("{{", ESCAPED_OPEN)))
+        return "".join(parts)
+
+    @classmethod
+    def from_escaped_source(cls, source: str) -> "CompiledTemplate":
+        """解析 escaped_source 的输出并还原字面量中的转义，得到与原模板等价的 CompiledTemplate。"""
+        template = cls(source)
+        template.literals = [literal.replace(ESCAPED_OPEN, "{{") for literal in template.literals]
+        return template
+
+
+_cache: Dict[str, Tuple[float, CompiledTemplate]] = {}
+_cache_lock = threading.Lock()
+
+
+def get_template(template_path: str) -> CompiledTemplate:
+    """按路径缓存编译结果，文件 mtime 变化时重新解析。"""
+    mtime = os.path.getmtime(template_path)
+    cached = _cache.get(template_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with _cache_lock:
+        cached = _cache.get(template_path)
+        if cached is None or cached[0] != mtime:
+            with open(template_path, "r", encoding="utf-8") as f:
+                cached = (mtime, CompiledTemplate(f.read()))
+            _cache[template_path] = cached
+    return cached[1]
+
+
+def clear_template_cache():
+    with _cache_lock:
+        _cache.clear()
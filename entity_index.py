@@ -0,0 +1,163 @@
+import os
+import re
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from config import settings
+from storage_manager import StorageManager
+from theme_keywords import THEME_KEYWORDS
+
+
+class EntityExtractor:
+    """从新闻标题和正文中抽取公司、产品、模型等实体与主题关键词。
+
+    种子词表由内置实体名单和 theme_keywords.THEME_KEYWORDS 组成；
+    另用正则（不区分大小写）识别 "GPT-5"、"llama 3.1" 这类带版本号的模型名。英文词按单词边界匹配，避免 "ai" 命中 "said"。
+    """
+
+    ENTITY_SEEDS = {
+        "company": (
+            "OpenAI", "Anthropic", "Google", "DeepMind", "Microsoft", "Meta", "Apple", "Amazon", "NVIDIA",
+            "xAI", "Mistral", "Hugging Face", "DeepSeek", "字节跳动", "阿里巴巴", "阿里云", "腾讯", "百度",
+            "月之暗面", "智谱", "MiniMax", "小米", "华为",
+        ),
+        "product": (
+            "ChatGPT", "Claude", "Gemini", "Copilot", "Cursor", "Codex", "Windsurf", "Perplexity", "Midjourney",
+            "Figma", "Notion", "Sora", "Kimi", "豆包", "通义", "文心一言", "元宝",
+        ),
+        "model": ("GPT", "Llama", "Qwen", "GLM", "Stable Diffusion", "o1", "o3"),
+    }
+    MODEL_VERSION_PATTERN = re.compile(
+        r"\b(?:GPT|Llama|Qwen|GLM|Claude|Gemini|DeepSeek|Mistral|Kimi)[- ]?v?\d+(?:\.\d+)?(?:[- ]?(?:mini|pro|turbo|max|flash|ultra|plus|o))?\b",
+        re.IGNORECASE,
+    )
+
+    def __init__(self, content_chars: int = 1000):
+        self.content_chars = content_chars
+        seeds: Dict[str, str] = {}
+        for entity_type, names in self.ENTITY_SEEDS.items():
+            for name in names:
+                seeds[name.lower()] = entity_type
+        for keywords in THEME_KEYWORDS.values():
+            for keyword in keywords:
+                seeds.setdefault(keyword.lower(), "keyword")
+        self.term_types = seeds
+
+        alternatives = []
+        for term in sorted(seeds, key=len, reverse=True):
+            escaped = re.escape(term)
+            if term.isascii():
+                escaped = rf"(?<![a-z0-9]){escaped}(?![a-z0-9])"
+            alternatives.append(escaped)
+        self._pattern = re.compile("|".join(alternatives))
+
+    def extract(self, item: Dict[str, Any]) -> List[str]:
+        text = f"{item.get('title', '')} {(item.get('content') or '')[:self.content_chars]}"
+        terms: Set[str] = {self.normalize_term(match) for match in self._pattern.findall(text.lower())}
+        terms.update(self.normalize_term(match) for match in self.MODEL_VERSION_PATTERN.findall(text))
+        return sorted(terms)
+
+    def normalize_term(self, term: str) -> str:
+        """统一小写，空格与连字符归一为连字符："GPT 5"、"gpt-5" 都记为 "gpt-5"。"""
+        return " ".join(term.strip().lower().replace("-", " ").split()).replace(" ", "-")
+
+
+class EntityIndex:
+    """按词项哈希分片的磁盘倒排索引：term -> [(date, news_id)]。
+
+    查询只读取一个分片文件；每天的写入先按 manifest 清掉该日旧倒排再追加，重跑幂等。
+    """
+
+    def __init__(self, index_dir: Optional[str] = None, shards: Optional[int] = None):
+        self.storage = StorageManager()
+        self.index_dir = index_dir or self.storage.get_entity_index_dir()
+        self.shards = shards or settings.ENTITY_INDEX_SHARDS
+        self.extractor = EntityExtractor()
+
+    def update(self, filter_payload: Dict[str, Any]) -> Dict[str, List[str]]:
+        """索引一天的 filter_news，返回 news_id -> 实体列表，供趋势索引等下游复用。"""
+        date_str = filter_payload.get("date")
+        entity_map = {
+            item.get("id", ""): self.extractor.extract(item)
+            for item in filter_payload.get("news", [])
+            if item.get("id")
+        }
+        if not date_str:
+            return entity_map
+
+        manifest = self.storage.read_json(self._manifest_path(), default={})
+        new_postings: Dict[str, List[List[str]]] = {}
+        for news_id, terms in entity_map.items():
+            for term in terms:
+                new_postings.setdefault(term, []).append([date_str, news_id])
+
+        touched_terms = set(manifest.get(date_str, [])) | set(new_postings)
+        for shard, terms in self._group_by_shard(touched_terms).items():
+            shard_path = self._shard_path(shard)
+            postings = self.storage.read_json(shard_path, default={})
+            for term in terms:
+                kept = [posting for posting in postings.get(term, []) if posting[0] != date_str]
+                kept.extend(new_postings.get(term, []))
+                if kept:
+                    postings[term] = sorted(kept)
+                else:
+                    postings.pop(term, None)
+            self.storage.write_json(shard_path, postings)
+
+        manifest[date_str] = sorted(new_postings)
+        self.storage.write_json(self._manifest_path(), manifest)
+        return entity_map
+
+    def query(self, term: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, str]]:
+        normalized = self.extractor.normalize_term(term)
+        postings = self.storage.read_json(self._shard_path(self._shard_of(normalized)), default={}).get(normalized, [])
+        return [
+            {"date": date_str, "news_id": news_id}
+            for date_str, news_id in postings
+            if (not start_date or date_str >= start_date) and (not end_date or date_str <= end_date)
+        ]
+
+    def prune(self, retention_days: Optional[int] = None) -> int:
+        """删除超过保留期的倒排，保留期与新闻存档一致（NEWS_RETENTION_DAYS），返回清理的天数。"""
+        days = settings.NEWS_RETENTION_DAYS if retention_days is None else retention_days
+        cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        manifest = self.storage.read_json(self._manifest_path(), default={})
+        expired = [date_str for date_str in manifest if date_str < cutoff]
+        if not expired:
+            return 0
+
+        touched_terms = {term for date_str in expired for term in manifest[date_str]}
+        for shard, terms in self._group_by_shard(touched_terms).items():
+            shard_path = self._shard_path(shard)
+            postings = self.storage.read_json(shard_path, default={})
+            for term in terms:
+                kept = [posting for posting in postings.get(term, []) if posting[0] >= cutoff]
+                if kept:
+                    postings[term] = kept
+                else:
+                    postings.pop(term, None)
+            self.storage.write_json(shard_path, postings)
+
+        for date_str in expired:
+            del manifest[date_str]
+        self.storage.write_json(self._manifest_path(), manifest)
+        return len(expired)
+
+    def indexed_dates(self) -> List[str]:
+        return sorted(self.storage.read_json(self._manifest_path(), default={}))
+
+    def _group_by_shard(self, terms: Iterable[str]) -> Dict[int, List[str]]:
+        grouped: Dict[int, List[str]] = {}
+        for term in terms:
+            grouped.setdefault(self._shard_of(term), []).append(term)
+        return grouped
+
+    def _shard_of(self, term: str) -> int:
+        return zlib.crc32(term.encode("utf-8")) % self.shards
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.index_dir, f"terms_{shard:03d}.json")
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.index_dir, "manifest.json")
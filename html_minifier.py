@@ -0,0 +1,134 @@
+"""
+邮件 HTML 压缩
+
+minify_html 去掉注释、折叠空白，并去掉块级标签两侧的空白；<pre>/<textarea>/<script> 原样保留，<style> 只做 CSS 级压缩。
+collect_style_classes / apply_style_classes 把多处重复的 style 属性提取为 <style> 中的 class 规则，声明带 !important 以保持与内联样式相同的优先级。
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List
+
+PRESERVE_PATTERN = re.compile(r"(<(pre|textarea|script|style)\b[^>]*>.*?</\2\s*>)", re.IGNORECASE | re.DOTALL)
+COMMENT_PATTERN = re.compile(r"<!--(?!\[if|<!\[endif).*?-->", re.DOTALL)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+BLOCK_TAG_PATTERN = re.compile(
+    r"\s*(</?(?:html|head|body|meta|title|link|style|table|thead|tbody|tfoot|tr|td|th|div|p|h[1-6]|ul|ol|li|center|br|hr)\b[^>]*>)\s*",
+    re.IGNORECASE,
+)
+STYLE_ATTR_PATTERN = re.compile(r'\sstyle="([^"]*)"')
+CLASS_ATTR_PATTERN = re.compile(r'\sclass="([^"]*)"')
+TAG_PATTERN = re.compile(r"<[a-zA-Z][^<>]*>")
+CSS_COMMENT_PATTERN = re.compile(r"/\*.*?\*/", re.DOTALL)
+CSS_PUNCTUATION_PATTERN = re.compile(r"\s*([{}:;,])\s*")
+
+# Gmail 会整段丢弃超过 16KB 的 <style>，提取出的规则留足余量
+MAX_EXTRACTED_CSS_BYTES = 8 * 1024
+
+
+def minify_html(html: str) -> str:
+    if not html:
+        return html
+    parts = []
+    position = 0
+    for match in PRESERVE_PATTERN.finditer(html):
+        parts.append(_collapse(html[position:match.start()]))
+        block = match.group(1)
+        parts.append(_minify_style_block(block) if match.group(2).lower() == "style" else block)
+        position = match.end()
+    parts.append(_collapse(html[position:]))
+    return "".join(parts)
+
+
+def collect_style_classes(chunks: List[str], min_count: int = 3) -> Dict[str, str]:
+    """统计所有片段中的 style 属性，为出现至少 min_count 次且提取后更省字节的样式分配 class 名。
+
+    含模板占位符、!important 或 url() 的样式不提取；生成的规则总长不超过 MAX_EXTRACTED_CSS_BYTES。
+    """
+    counts = Counter(
+        match.group(1) for chunk in chunks for match in STYLE_ATTR_PATTERN.finditer(chunk)
+    )
+    candidates = []
+    for style, count in counts.items():
+        if count < min_count or "{{" in style or "!important" in style or "url(" in style:
+            continue
+        # 每处节省 style 值减去 class 名的长度，再扣掉一条 CSS 规则的开销
+        saving = count * (len(style) - 4) - (len(style) + 16)
+        if saving > 0:
+            candidates.append((saving, style))
+    candidates.sort(reverse=True)
+
+    classes: Dict[str, str] = {}
+    css_bytes = 0
+    for _, style in candidates:
+        class_name = f"s{len(classes)}"
+        css_bytes += len(_style_rule(class_name, style))
+        if css_bytes > MAX_EXTRACTED_CSS_BYTES:
+            break
+        classes[style] = class_name
+    return classes
+
+
+def apply_style_classes(html: str, classes: Dict[str, str]) -> str:
+    """把已分配 class 的 style 属性替换为 class；标签已有 class 时追加。"""
+    if not classes:
+        return html
+
+    def replace_tag(match: re.Match) -> str:
+        tag = match.group(0)
+        style_match = STYLE_ATTR_PATTERN.search(tag)
+        if not style_match or style_match.group(1) not in classes:
+            return tag
+        class_name = classes[style_match.group(1)]
+        tag = tag[:style_match.start()] + tag[style_match.end():]
+        class_match = CLASS_ATTR_PATTERN.search(tag)
+        if class_match:
+            return f"{tag[:class_match.end(1)]} {class_name}{tag[class_match.end(1):]}"
+        if tag.endswith("/>"):
+            return f'{tag[:-2].rstrip()} class="{class_name}"/>'
+        return f'{tag[:-1]} class="{class_name}">'
+
+    return TAG_PATTERN.sub(replace_tag, html)
+
+
+def build_style_rules(classes: Dict[str, str]) -> str:
+    return "".join(_style_rule(class_name, style) for style, class_name in classes.items())
+
+
+def inject_style_block(html: str, css: str) -> str:
+    """把 CSS 放进 </head> 前的独立 <style>；没有 </head> 时原样返回。"""
+    if not css or "</head>" not in html:
+        return html
+    return html.replace("</head>", f"<style>{css}</style></head>", 1)
+
+
+def normalize_style(style: str) -> str:
+    """统一 style 属性的写法，便于去重：去掉声明间多余空白与末尾分号"""
+    if "url(" in style:
+        return WHITESPACE_PATTERN.sub(" ", style).strip()
+    declarations = []
+    for declaration in style.split(";"):
+        name, _, value = declaration.partition(":")
+        if name.strip() and value.strip():
+            declarations.append(f"{name.strip()}:{WHITESPACE_PATTERN.sub(' ', value.strip())}")
+    return ";".join(declarations)
+
+
+def _collapse(html: str) -> str:
+    html = COMMENT_PATTERN.sub("", html)
+    html = WHITESPACE_PATTERN.sub(" ", html)
+    html = BLOCK_TAG_PATTERN.sub(r"\1", html)
+    return STYLE_ATTR_PATTERN.sub(lambda match: f' style="{normalize_style(match.group(1))}"', html)
+
+
+def _minify_style_block(block: str) -> str:
+    open_end = block.index(">") + 1
+    close_start = block.lower().rindex("</style")
+    css = CSS_COMMENT_PATTERN.sub("", block[open_end:close_start])
+    css = CSS_PUNCTUATION_PATTERN.sub(r"\1", WHITESPACE_PATTERN.sub(" ", css)).replace(";}", "}")
+    return f"{block[:open_end]}{css.strip()}</style>"
+
+
+def _style_rule(class_name: str, style: str) -> str:
+    declarations = ";".join(f"{declaration} !important" for declaration in style.split(";") if declaration)
+    return f".{class_name}{{{declarations}}}"
@@ -0,0 +1,107 @@
+import json
+from typing import Any, Callable, List, Optional
+
+
+class MalformedJSONError(ValueError):
+    """流式输出已确定无法构成合法 JSON，调用方应尽早放弃本次响应并重试。"""
+
+
+class JSONStreamParser:
+    """增量解析 LLM 流式输出的 JSON，在目标数组的元素闭合时立即回调。
+
+    item_key 为空时目标数组是顶层数组，否则是顶层对象中该字段对应的数组。
+    允许前置少量说明文字或 Markdown 代码块标记，超过 PREAMBLE_LIMIT 仍未出现 JSON 视为格式异常。
+    """
+
+    PREAMBLE_LIMIT = 200
+    CLOSERS = {"}": "{", "]": "["}
+
+    def __init__(self, item_key: Optional[str] = None, on_item: Optional[Callable[[Any], None]] = None):
+        self.item_key = item_key
+        self.on_item = on_item
+        self.items: List[Any] = []
+        self._buffer = ""
+        self._pos = 0
+        self._root_start: Optional[int] = None
+        self._root_end: Optional[int] = None
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None
+        self._target_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str):
+        self._buffer += chunk
+        buffer = self._buffer
+        while self._pos < len(buffer) and self._root_end is None:
+            char = buffer[self._pos]
+            if self._root_start is None:
+                if char in "{[":
+                    self._root_start = self._pos
+                    self._open(char)
+                elif self._pos >= self.PREAMBLE_LIMIT:
+                    raise MalformedJSONError("输出开头未找到 JSON")
+            elif self._in_string:
+                self._consume_string_char(char)
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif char in "{[":
+                self._open(char)
+            elif char in "}]":
+                self._close(char)
+            self._pos += 1
+
+    def finish(self) -> Optional[Any]:
+        """输出结束后返回完整解析结果；被截断时返回 None。"""
+        if self._root_start is None or self._root_end is None:
+            return None
+        try:
+            return json.loads(self._buffer[self._root_start:self._root_end + 1])
+        except json.JSONDecodeError:
+            return None
+
+    def _consume_string_char(self, char: str):
+        if self._escaped:
+            self._escaped = False
+        elif char == "\\":
+            self._escaped = True
+        elif char == '"':
+            self._in_string = False
+            if self._stack and self._stack[-1] == "{":
+                self._last_key = self._buffer[self._string_start + 1:self._pos]
+
+    def _open(self, char: str):
+        depth = len(self._stack)
+        if self._target_depth is None and char == "[" and self._is_target_array(depth):
+            self._target_depth = depth + 1
+        elif self._target_depth is not None and depth == self._target_depth and self._item_start is None:
+            self._item_start = self._pos
+        self._stack.append(char)
+
+    def _close(self, char: str):
+        if not self._stack or self._stack[-1] != self.CLOSERS[char]:
+            raise MalformedJSONError(f"位置 {self._pos} 的括号不匹配")
+        self._stack.pop()
+        depth = len(self._stack)
+        if self._item_start is not None and depth == self._target_depth:
+            self._emit(self._buffer[self._item_start:self._pos + 1])
+            self._item_start = None
+        if not self._stack:
+            self._root_end = self._pos
+
+    def _is_target_array(self, depth: int) -> bool:
+        if self.item_key is None:
+            return depth == 0
+        return depth == 1 and self._stack[0] == "{" and self._last_key == self.item_key
+
+    def _emit(self, text: str):
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise MalformedJSONError(f"数组元素无法解析：{exc}") from exc
+        self.items.append(item)
+        if self.on_item is not None:
+            self.on_item(item)
@@ -0,0 +1,37 @@
+import re
+from typing import Dict, Iterable, Set
+
+
+class KeywordMatcher:
+    """把多组关键词预编译为一个正则，一次扫描返回命中的全部分组。
+
+    语义与逐个 `keyword in text` 的子串判断一致：零宽前瞻保证每个起始位置都会尝试匹配，
+    而较短关键词若是某个较长关键词的子串，其分组会并入较长关键词，避免被最长匹配遮蔽。
+    """
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        keyword_groups: Dict[str, Set[str]] = {}
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                keyword_groups.setdefault(keyword.lower(), set()).add(group)
+
+        self._groups_by_keyword: Dict[str, frozenset] = {}
+        for keyword in keyword_groups:
+            covered = set()
+            for other, other_groups in keyword_groups.items():
+                if other in keyword:
+                    covered.update(other_groups)
+            self._groups_by_keyword[keyword] = frozenset(covered)
+
+        alternation = "|".join(re.escape(keyword) for keyword in sorted(keyword_groups, key=len, reverse=True))
+        self._pattern = re.compile(f"(?=({alternation}))") if alternation else None
+
+    def scan(self, text: str) -> Set[str]:
+        """返回 text（需已小写）命中的分组集合。"""
+        if self._pattern is None or not text:
+            return set()
+        groups_by_keyword = self._groups_by_keyword
+        hits: Set[str] = set()
+        for keyword in set(self._pattern.findall(text)):
+            hits.update(groups_by_keyword[keyword])
+        return hits
@@ -0,0 +1,263 @@
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional
+
+import httpx
+
+from config import settings
+from json_stream import JSONStreamParser, MalformedJSONError
+
+
+class LLMClient:
+    """共享的 LLM 调用客户端：复用 keep-alive 连接池，统一重试策略，支持同步与异步调用。"""
+
+    RETRYABLE_STATUS_CODES = (408, 409, 425, 429, 500, 502, 503, 504)
+    MAX_RETRY_AFTER_SECONDS = 60
+
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        retry_delay: Optional[float] = None,
+    ):
+        self.api_url = api_url or settings.AI_API_URL
+        self.api_key = api_key if api_key is not None else settings.AI_API_KEY
+        self.model = model or settings.AI_MODEL
+        self.timeout = timeout or settings.THIRD_LAYER_TIMEOUT
+        self.retries = max(1, retries or settings.THIRD_LAYER_RETRIES)
+        self.retry_delay = retry_delay if retry_delay is not None else settings.THIRD_LAYER_RETRY_DELAY
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_guard: Optional[AsyncIterator[None]] = None
+        self._lock = threading.Lock()
+
+    def complete(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        parser: Optional[Callable[[str], Any]] = None,
+    ) -> Optional[Any]:
+        """同步调用 chat completion；提供 parser 时解析失败也会触发重试。"""
+        payload = self._build_payload(system_prompt, user_prompt)
+        for attempt in range(self.retries):
+            wait = None
+            try:
+                response = self._get_client().post(self.api_url, headers=self._headers(), json=payload)
+                result, retryable, wait = self._handle_response(response, parser)
+                if result is not None or not retryable:
+                    return result
+            except Exception as exc:
+                print(f"AI 调用异常：{exc}")
+
+            if attempt < self.retries - 1:
+                time.sleep(self._backoff(attempt, wait))
+        return None
+
+    def complete_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        parser_factory: Callable[[], JSONStreamParser],
+    ) -> Optional[Any]:
+        """以 SSE 流式调用 chat completion，边接收边交给增量解析器。
+
+        解析器判定输出格式异常时立即断开本次响应并重试，不必等待完整输出。
+        """
+        payload = self._build_payload(system_prompt, user_prompt, stream=True)
+        for attempt in range(self.retries):
+            wait = None
+            parser = parser_factory()
+            try:
+                with self._get_client().stream("POST", self.api_url, headers=self._headers(), json=payload) as response:
+                    if response.status_code != 200:
+                        response.read()
+                        _, retryable, wait = self._handle_response(response, None)
+                        if not retryable:
+                            return None
+                    else:
+                        for delta in self._iter_sse_deltas(response.iter_lines()):
+                            parser.feed(delta)
+                        result = parser.finish()
+                        if result is not None:
+                            return result
+                        print("AI 流式输出不完整，准备重试")
+            except MalformedJSONError as exc:
+                print(f"AI 流式输出格式异常，提前重试：{exc}")
+            except Exception as exc:
+                print(f"AI 调用异常：{exc}")
+
+            if attempt < self.retries - 1:
+                time.sleep(self._backoff(attempt, wait))
+        return None
+
+    async def acomplete(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        parser: Optional[Callable[[str], Any]] = None,
+    ) -> Optional[Any]:
+        """异步版本的 complete，供并发场景使用。"""
+        payload = self._build_payload(system_prompt, user_prompt)
+        for attempt in range(self.retries):
+            wait = None
+            try:
+                client = await self._get_async_client()
+                response = await client.post(self.api_url, headers=self._headers(), json=payload)
+                result, retryable, wait = self._handle_response(response, parser)
+                if result is not None or not retryable:
+                    return result
+            except Exception as exc:
+                print(f"AI 调用异常：{exc}")
+
+            if attempt < self.retries - 1:
+                await asyncio.sleep(self._backoff(attempt, wait))
+        return None
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
+
+    def _handle_response(self, response: httpx.Response, parser: Optional[Callable[[str], Any]]):
+        if response.status_code == 200:
+            content = response.json()["choices"][0]["message"]["content"]
+            if parser is None:
+                return content, True, None
+            parsed = parser(content)
+            if parsed is None:
+                print("AI 返回内容无法解析为 JSON，准备重试")
+            return parsed, True, None
+
+        print(f"AI 调用失败：{response.status_code} {response.text[:300]}")
+        retryable = response.status_code in self.RETRYABLE_STATUS_CODES
+        return None, retryable, self._parse_retry_after(response.headers.get("Retry-After"))
+
+    def _iter_sse_deltas(self, lines: Iterable[str]) -> Iterator[str]:
+        for line in lines:
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                return
+            choices = json.loads(data).get("choices") or [{}]
+            content = (choices[0].get("delta") or {}).get("content")
+            if content:
+                yield content
+
+    def _build_payload(self, system_prompt: str, user_prompt: str, stream: bool = False) -> Dict[str, Any]:
+        messages: List[Dict[str, str]] = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+        return {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            "max_tokens": 4096,
+        }
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        }
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.MAX_RETRY_AFTER_SECONDS)
+        base = self.retry_delay * (2 ** attempt)
+        return base / 2 + random.uniform(0, base / 2)
+
+    def _parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    def _get_client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(**self._client_options())
+            return self._client
+
+    async def _get_async_client(self) -> httpx.AsyncClient:
+        # AsyncClient 的连接池绑定在事件循环上，换了循环（如多次 asyncio.run）需要重建
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            stale_client = self._async_client
+            self._async_client = httpx.AsyncClient(**self._client_options())
+            self._async_loop = loop
+            # asyncio.run 退出前会 shutdown_asyncgens，借此在循环仍可用时关闭该循环上的客户端
+            self._async_guard = self._close_on_loop_shutdown(self._async_client)
+            await self._async_guard.__anext__()
+            if stale_client is not None and not stale_client.is_closed:
+                try:
+                    await stale_client.aclose()
+                except Exception as exc:
+                    print(f"关闭旧的异步 AI 客户端失败：{exc}")
+        return self._async_client
+
+    async def _close_on_loop_shutdown(self, client: httpx.AsyncClient) -> AsyncIterator[None]:
+        try:
+            yield
+        finally:
+            if self._async_client is client:
+                self._async_client = None
+                self._async_loop = None
+            await client.aclose()
+
+    def _client_options(self) -> Dict[str, Any]:
+        return {
+            "proxy": self._http_proxy(),
+            "trust_env": False,
+            "http2": settings.AI_HTTP2 and importlib.util.find_spec("h2") is not None,
+            "timeout": httpx.Timeout(self.timeout, connect=min(self.timeout, 10)),
+            "limits": httpx.Limits(
+                max_connections=settings.AI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AI_MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+        }
+
+    def _http_proxy(self) -> Optional[str]:
+        return os.environ.get("https_proxy") or os.environ.get("http_proxy") or None
+
+
+_shared_client: Optional[LLMClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """返回进程内共享的 LLMClient，使 NewsProcessor 与 AIAnalyzerV3 复用同一连接池。"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = LLMClient()
+        return _shared_client
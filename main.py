@@ -1,30 +1,54 @@
-import sys
+"""
+命令行入口：python main.py <command> [options]，不带命令时执行每日任务。
+
+各子命令只在执行时才导入自己用到的模块，订阅管理等轻量命令不会加载抓取、AI 分析和邮件推送的依赖。
+"""
+
+import argparse
 import logging
-from subscription_manager import SubscriptionManager
-from workflow_runner import WorkflowRunner
-from daily_report_service import DailyReportService
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('rss_tool.log'),
-        logging.StreamHandler()
-    ]
-)
+import sys
+
 logger = logging.getLogger(__name__)
 
+
+def configure_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('rss_tool.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
 def main():
+    from workflow_runner import WorkflowRunner
+
     WorkflowRunner().run_daily()
 
 
+def send_v3_daily(date_str=None):
+    """按已保存的日报补发 V3 邮件"""
+    from workflow_runner import WorkflowRunner
+
+    WorkflowRunner().send_v3_daily_email(date_str)
+
+
+def reindex():
+    """用历史 raw_news 与 filter_news 重建全文检索、实体与趋势索引"""
+    from workflow_runner import WorkflowRunner
+
+    WorkflowRunner().reindex()
+
 
 def add_subscription(url, name=None):
     """添加订阅源"""
     logger.info(f"添加订阅源：{url}")
 
     try:
+        from subscription_manager import SubscriptionManager
+
         subscription_manager = SubscriptionManager()
         success = subscription_manager.add_subscription(url, name)
 
@@ -42,6 +66,8 @@ def remove_subscription(subscription_id):
     logger.info(f"删除订阅源：{subscription_id}")
 
     try:
+        from subscription_manager import SubscriptionManager
+
         subscription_manager = SubscriptionManager()
         success = subscription_manager.remove_subscription(subscription_id)
 
@@ -59,6 +85,8 @@ def list_subscriptions():
     logger.info("列出所有订阅源")
 
     try:
+        from subscription_manager import SubscriptionManager
+
         subscription_manager = SubscriptionManager()
         subscriptions = subscription_manager.get_subscriptions()
 
@@ -104,6 +132,7 @@ def test_ai_analysis():
 
         print(f"模拟了 {len(mock_news)} 条新闻用于测试")
 
+        from daily_report_service import DailyReportService
         from news_processor import NewsProcessor
 
         processor = NewsProcessor()
@@ -120,36 +149,140 @@ def test_ai_analysis():
     except Exception as e:
         logger.error(f"测试 AI 分析功能失败：{e}", exc_info=True)
 
+
+def train_scorer():
+    """用历史 LLM 评分样本训练兜底评分模型。"""
+    from score_model import load_training_samples, train_score_model
+
+    samples = load_training_samples()
+    print(f"读取到 {len(samples)} 条 LLM 评分样本")
+    try:
+        model, metrics = train_score_model(samples)
+    except ValueError as e:
+        logger.error(f"训练兜底评分模型失败：{e}")
+        return
+    model.save(metadata=metrics)
+    print(f"模型已保存，留出集 MAE {metrics['mae']}（均值基线 {metrics['baseline_mae']}），权重 {len(model.weights)} 项")
+
+
+def query_entity(term, start_date=None, end_date=None):
+    """查询某个实体或关键词出现在哪些日期的哪些新闻中。"""
+    from entity_index import EntityIndex
+
+    postings = EntityIndex().query(term, start_date, end_date)
+    if not postings:
+        print(f"未找到与 {term} 相关的新闻")
+        return
+
+    by_date = {}
+    for posting in postings:
+        by_date.setdefault(posting["date"], []).append(posting["news_id"])
+    print(f"{term} 共出现在 {len(by_date)} 天的 {len(postings)} 条新闻中：")
+    for date_str, news_ids in sorted(by_date.items(), reverse=True):
+        print(f"- {date_str}：{len(news_ids)} 条")
+        for news_id in news_ids:
+            print(f"  {news_id}")
+
+
+def search_news(terms, start_date=None, end_date=None):
+    """全文检索新闻存档：python main.py search <query> [--from YYYY-MM-DD] [--to YYYY-MM-DD]"""
+    from news_search import NewsSearchIndex
+
+    query = " ".join(terms)
+    search_index = NewsSearchIndex()
+    try:
+        results = search_index.search(query, start_date=start_date, end_date=end_date)
+    finally:
+        search_index.close()
+
+    if not results:
+        print(f"未找到与 {query} 相关的新闻")
+        return
+    for result in results:
+        score = result["final_score"] if result["final_score"] is not None else "-"
+        print(f"[{result['date']}] {result['title']}（{result['source']}，评分 {score}）")
+        print(f"  {result['url']}")
+
+
+def build_site(force=False, workers=None):
+    """生成日报静态归档站：python main.py build-site [--force] [--workers N]"""
+    from site_builder import SiteBuilder
+
+    builder = SiteBuilder()
+    stats = builder.build(force=force, workers=workers)
+    print(
+        f"归档站已生成：{builder.site_dir}/index.html（共 {stats['total']} 份，"
+        f"渲染 {stats['rendered']}，未变 {stats['unchanged']}，删除 {stats['removed']}）"
+    )
+
+
+def serve_preview(port=None):
+    """本地预览日报渲染：python main.py serve [--port N]"""
+    from preview_server import serve
+
+    serve(port=port)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python main.py", description="Daily RSS：抓取、分析并推送 AI 日报；不带命令时执行每日任务")
+    subparsers = parser.add_subparsers(dest="command", metavar="<command>")
+
+    command = subparsers.add_parser("add", help="添加订阅源")
+    command.add_argument("url")
+    command.add_argument("name", nargs="?")
+    command.set_defaults(handler=lambda args: add_subscription(args.url, args.name))
+
+    command = subparsers.add_parser("remove", help="删除订阅源")
+    command.add_argument("subscription_id")
+    command.set_defaults(handler=lambda args: remove_subscription(args.subscription_id))
+
+    command = subparsers.add_parser("list", help="列出所有订阅源")
+    command.set_defaults(handler=lambda args: list_subscriptions())
+
+    command = subparsers.add_parser("ai-test", help="用模拟新闻测试 V3 分析")
+    command.set_defaults(handler=lambda args: test_ai_analysis())
+
+    command = subparsers.add_parser("daily", help="执行每日任务")
+    command.set_defaults(handler=lambda args: main())
+
+    command = subparsers.add_parser("send-v3-daily", help="按已保存的日报补发 V3 邮件")
+    command.add_argument("date", nargs="?", help="YYYY-MM-DD，默认今天")
+    command.set_defaults(handler=lambda args: send_v3_daily(args.date))
+
+    command = subparsers.add_parser("train-scorer", help="训练兜底评分模型")
+    command.set_defaults(handler=lambda args: train_scorer())
+
+    command = subparsers.add_parser("entity", help="查询实体或关键词出现的日期与新闻")
+    command.add_argument("term")
+    command.add_argument("start_date", nargs="?")
+    command.add_argument("end_date", nargs="?")
+    command.set_defaults(handler=lambda args: query_entity(args.term, args.start_date, args.end_date))
+
+    command = subparsers.add_parser("search", help="全文检索新闻存档")
+    command.add_argument("terms", nargs="+", metavar="query")
+    command.add_argument("--from", dest="start_date", metavar="YYYY-MM-DD")
+    command.add_argument("--to", dest="end_date", metavar="YYYY-MM-DD")
+    command.set_defaults(handler=lambda args: search_news(args.terms, args.start_date, args.end_date))
+
+    command = subparsers.add_parser("reindex", help="重建全文检索、实体与趋势索引")
+    command.set_defaults(handler=lambda args: reindex())
+
+    command = subparsers.add_parser("build-site", help="生成日报静态归档站")
+    command.add_argument("--force", action="store_true", help="忽略内容哈希，全量重渲染")
+    command.add_argument("--workers", type=int, help="渲染进程数，默认取 SITE_BUILD_WORKERS")
+    command.set_defaults(handler=lambda args: build_site(args.force, args.workers))
+
+    command = subparsers.add_parser("serve", help="启动本地日报预览服务")
+    command.add_argument("--port", type=int, help="默认取 PREVIEW_PORT")
+    command.set_defaults(handler=lambda args: serve_preview(args.port))
+    return parser
+
+
 if __name__ == "__main__":
-    runner = WorkflowRunner()
-    # 解析命令行参数
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
-
-        if command == "add":
-            if len(sys.argv) > 2:
-                url = sys.argv[2]
-                name = sys.argv[3] if len(sys.argv) > 3 else None
-                add_subscription(url, name)
-            else:
-                print("用法：python main.py add <url> [name]")
-        elif command == "remove":
-            if len(sys.argv) > 2:
-                subscription_id = sys.argv[2]
-                remove_subscription(subscription_id)
-            else:
-                print("用法：python main.py remove <subscription_id>")
-        elif command == "list":
-            list_subscriptions()
-        elif command == "ai-test":
-            test_ai_analysis()
-        elif command == "daily":
-            runner.run_daily()
-        elif command == "send-v3-daily":
-            runner.send_v3_daily_email(sys.argv[2] if len(sys.argv) > 2 else None)
-        else:
-            print(f"未知命令：{command}")
-            print("可用命令：add, remove, list, ai-test, daily, send-v3-daily")
+    args = build_parser().parse_args(sys.argv[1:])
+    configure_logging()
+    if args.command:
+        args.handler(args)
     else:
         # 执行默认的每日任务
         main()
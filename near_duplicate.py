@@ -0,0 +1,104 @@
+import hashlib
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from config import settings
+
+
+class NearDuplicateClusterer:
+    """基于 MinHash-LSH 的近似重复新闻聚类，复杂度随条目数近似线性增长。
+
+    中文按单字切分、英文与数字按单词切分，再取连续 token 的 shingle，
+    使同一事件被不同站点轻微改写后的标题和正文仍能落入同一个桶。
+    """
+
+    DENSIFY_OFFSET = 1 << 60
+    TOKEN_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]|[a-z0-9]+(?:[.\-_][a-z0-9]+)*")
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        content_chars: int = 400,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.threshold = threshold if threshold is not None else settings.NEAR_DUPLICATE_THRESHOLD
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.content_chars = content_chars
+
+    def cluster(self, items: List[Dict[str, Any]]) -> List[List[int]]:
+        """返回按首个成员出现顺序排列的簇，每个簇是 items 的下标列表。"""
+        signatures = [self.signature(self._item_text(item)) for item in items]
+        parents = list(range(len(items)))
+
+        def find(index: int) -> int:
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+            return index
+
+        buckets: Dict[tuple, List[int]] = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            for band in range(self.bands):
+                key = (band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+                for other in buckets[key]:
+                    root_a, root_b = find(index), find(other)
+                    if root_a != root_b and self.similarity(signature, signatures[other]) >= self.threshold:
+                        parents[max(root_a, root_b)] = min(root_a, root_b)
+                buckets[key].append(index)
+
+        clusters: Dict[int, List[int]] = {}
+        for index in range(len(items)):
+            clusters.setdefault(find(index), []).append(index)
+        return sorted(clusters.values(), key=lambda members: members[0])
+
+    def signature(self, text: str) -> Optional[List[int]]:
+        """One Permutation Hashing：每个 shingle 只哈希一次并分桶取最小值，空桶按旋转规则加密填充。"""
+        shingles = self.shingles(text)
+        if not shingles:
+            return None
+        bins: List[Optional[int]] = [None] * self.num_perm
+        for shingle in shingles:
+            value = self._hash64(shingle)
+            slot, rank = value % self.num_perm, value // self.num_perm
+            current = bins[slot]
+            if current is None or rank < current:
+                bins[slot] = rank
+
+        signature = list(bins)
+        for slot in range(self.num_perm):
+            if signature[slot] is not None:
+                continue
+            for distance in range(1, self.num_perm):
+                borrowed = bins[(slot + distance) % self.num_perm]
+                if borrowed is not None:
+                    signature[slot] = borrowed + distance * self.DENSIFY_OFFSET
+                    break
+        return signature
+
+    def similarity(self, left: List[int], right: List[int]) -> float:
+        return sum(1 for a, b in zip(left, right) if a == b) / self.num_perm
+
+    def shingles(self, text: str) -> Set[str]:
+        tokens = self.TOKEN_PATTERN.findall(text.lower())
+        if len(tokens) < self.shingle_size:
+            return {" ".join(tokens)} if tokens else set()
+        return {
+            " ".join(tokens[index:index + self.shingle_size])
+            for index in range(len(tokens) - self.shingle_size + 1)
+        }
+
+    def _hash64(self, text: str) -> int:
+        return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def _item_text(self, item: Dict[str, Any]) -> str:
+        return f"{item.get('title', '')} {(item.get('content') or '')[:self.content_chars]}"
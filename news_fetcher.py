@@ -1,6 +1,7 @@
 import os
 import time
 import ssl
+import sqlite3
 import feedparser
 import requests
 from bs4 import BeautifulSoup
@@ -8,7 +9,9 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Any
 from subscription_manager import SubscriptionManager
 from config import settings
+from news_search import NewsSearchIndex
 from storage_manager import StorageManager
+from url_canonicalizer import canonicalize_url
 
 
 class NewsFetcher:
@@ -376,18 +379,19 @@ class NewsFetcher:
         return (datetime.now() + timedelta(hours=8) - timedelta(hours=25)).replace(tzinfo=None).isoformat()
     
     def _generate_id(self, url: str) -> str:
-        """根据URL生成唯一ID"""
+        """根据原始URL生成唯一ID；ID 已写入历史 filter_news、日报 referenced_news 等数据，不随规范化规则变化"""
         import hashlib
         return f"news_{hashlib.md5(url.encode()).hexdigest()}"
     
     def _deduplicate_news(self, news_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """去重新闻"""
-        seen_ids = set()
+        """去重新闻：按规范化后的 URL（与 NewsProcessor 的去重键一致），没有 URL 时按 ID"""
+        seen_keys = set()
         unique_news = []
         
         for news in news_items:
-            if news['id'] not in seen_ids:
-                seen_ids.add(news['id'])
+            key = canonicalize_url(news.get('url', '')) or news['id']
+            if key not in seen_keys:
+                seen_keys.add(key)
                 unique_news.append(news)
         
         return unique_news
@@ -437,6 +441,19 @@ class NewsFetcher:
             "news": unique_news,
         }
         self.storage.write_json(news_file, payload)
+        self._index_news(news_items, today)
+
+    def _index_news(self, news_items: List[Dict[str, Any]], date_str: str):
+        """把新抓取的条目增量写入全文索引，索引失败不影响主流程"""
+        if not settings.SEARCH_INDEX_ENABLED:
+            return
+        search_index = NewsSearchIndex()
+        try:
+            search_index.index_news(news_items, date_str, kind="raw")
+        except sqlite3.Error as e:
+            print(f"❌ 更新全文索引失败: {e}")
+        finally:
+            search_index.close()
 
     def get_recent_news(self, days: int = 1) -> List[Dict[str, Any]]:
         """获取最近几天的新闻"""
@@ -475,6 +492,17 @@ class NewsFetcher:
                         print(f"删除过期新闻文件: {filename}")
                 except Exception as e:
                     print(f"清理新闻文件失败 {filename}: {e}")
+
+        if settings.SEARCH_INDEX_ENABLED:
+            search_index = NewsSearchIndex()
+            try:
+                removed = search_index.delete_before(threshold_date.strftime('%Y-%m-%d'))
+                if removed:
+                    print(f"从全文索引中删除 {removed} 条过期新闻")
+            except sqlite3.Error as e:
+                print(f"清理全文索引失败: {e}")
+            finally:
+                search_index.close()
     
     def _is_rsshub_url(self, url: str) -> bool:
         """检测URL是否是RSSHub URL"""
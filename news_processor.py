@@ -1,66 +1,85 @@
 import hashlib
 import json
-import os
-import time
+import sqlite3
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
-import httpx
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，缺失时只走逐条计算路径
+    np = None
 
 from config import settings
+from json_stream import JSONStreamParser
+from keyword_matcher import KeywordMatcher
+from llm_client import get_llm_client
+from near_duplicate import NearDuplicateClusterer
+from news_ranking import SORTED_BY_FINAL_SCORE, SORTED_BY_KEY
+from news_search import NewsSearchIndex
+from relevance_ranker import RelevanceRanker
+from score_cache import ScoreCache
+from score_model import SCORE_DIMENSIONS, ScoreModel, record_training_samples
 from storage_manager import StorageManager
+from theme_keywords import HIGH_SIGNAL_KEYWORDS, THEME_KEYWORDS
+from url_canonicalizer import canonicalize_url
 
 
 class NewsProcessor:
     """将 raw_news 处理为 AI 评分驱动的 filter_news。"""
 
-    TRACKING_QUERY_PREFIXES = (
-        "utm_",
-        "spm",
-        "from",
-        "source",
-        "ref",
-        "track",
-    )
-
-    THEME_KEYWORDS = {
-        "ai_model": ("模型", "llm", "gpt", "多模态", "推理模型", "foundation model"),
-        "ai_product": ("产品", "agent", "助手", "copilot", "应用", "工作流"),
-        "workflow": ("workflow", "自动化", "效率", "协作", "办公"),
-        "design": ("设计", "交互", "ui", "ux", "体验"),
-        "coding": ("编程", "代码", "开发", "codex", "cursor", "工程"),
-        "business": ("融资", "营收", "商业", "市场", "客户", "增长"),
-        "policy": ("监管", "政策", "合规", "安全", "版权"),
-        "research": ("研究", "论文", "benchmark", "评测", "数据集"),
-    }
-
-    HIGH_SIGNAL_KEYWORDS = (
-        "发布", "推出", "上线", "开源", "融资", "收购", "模型", "agent", "ai", "芯片",
-        "平台", "政策", "监管", "增长", "合作", "研究", "论文", "benchmark"
-    )
+    THEME_KEYWORDS = THEME_KEYWORDS
+    HIGH_SIGNAL_KEYWORDS = HIGH_SIGNAL_KEYWORDS
+    SCORE_DIMENSIONS = SCORE_DIMENSIONS
+
+    HIGH_SIGNAL_GROUP = "__high_signal__"
+    KEYWORD_MATCHER = KeywordMatcher({**THEME_KEYWORDS, HIGH_SIGNAL_GROUP: HIGH_SIGNAL_KEYWORDS})
 
     def __init__(self):
         self.storage = StorageManager()
+        self.score_cache = ScoreCache() if settings.AI_SCORE_CACHE_ENABLED else None
+        self.llm_client = get_llm_client()
+        self.near_duplicate_clusterer = NearDuplicateClusterer() if settings.NEAR_DUPLICATE_ENABLED else None
+        self.relevance_ranker = RelevanceRanker() if settings.AI_PREFILTER_ENABLED else None
+        self.score_model = ScoreModel.load() if settings.SCORE_MODEL_ENABLED else None
+        self.score_weights = self._resolve_score_weights()
+        self._reset_normalization_cache()
 
     def process_news(self, raw_news: List[Dict[str, Any]], date_str: Optional[str] = None) -> Dict[str, Any]:
         deduplicated = self._deduplicate(raw_news)
+        if self.near_duplicate_clusterer is not None:
+            deduplicated = self._merge_near_duplicates(deduplicated)
         ai_scores = self._score_news_with_ai(deduplicated)
-        processed_news = []
-        for index, item in enumerate(deduplicated):
-            processed_item = self._build_filter_item(item, ai_scores.get(index))
-            if processed_item["final_score"] >= settings.AI_SCORE_THRESHOLD:
-                processed_news.append(processed_item)
-
-        processed_news.sort(key=lambda item: item["final_score"], reverse=True)
+        filter_items = [
+            self._build_filter_item(item, ai_scores.get(index))
+            for index, item in enumerate(deduplicated)
+        ]
+        date_value = date_str or datetime.now().strftime("%Y-%m-%d")
+        if settings.SCORE_SAMPLE_LOG_ENABLED and ai_scores:
+            # filter_news 只保留过阈值的条目，兜底评分模型需要全部 LLM 评分结果才不会偏高
+            record_training_samples([filter_items[index] for index in sorted(ai_scores)], date_value, self.storage)
+        processed_news = self._rank_filter_items(filter_items)
+        self._reset_normalization_cache()
 
         payload = {
-            "date": date_str or datetime.now().strftime("%Y-%m-%d"),
+            "date": date_value,
             "news": processed_news,
+            SORTED_BY_KEY: SORTED_BY_FINAL_SCORE,
         }
         self.storage.write_json(self.storage.get_filter_news_path(payload["date"]), payload)
+        self._index_filter_news(payload)
         return payload
 
+    def _index_filter_news(self, payload: Dict[str, Any]):
+        if not settings.SEARCH_INDEX_ENABLED:
+            return
+        search_index = NewsSearchIndex()
+        try:
+            search_index.index_news(payload["news"], payload["date"], kind="filter")
+        except sqlite3.Error as exc:
+            print(f"更新全文索引失败：{exc}")
+        finally:
+            search_index.close()
+
     def _deduplicate(self, raw_news: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         seen_keys = set()
         result = []
@@ -73,17 +92,37 @@ class NewsProcessor:
             result.append(item)
         return result
 
+    def _merge_near_duplicates(self, news_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """同一事件的多家报道只保留正文最完整的一条，其余来源记入 sibling_sources。"""
+        result = []
+        for members in self.near_duplicate_clusterer.cluster(news_items):
+            if len(members) == 1:
+                result.append(news_items[members[0]])
+                continue
+            lead_index = max(members, key=lambda index: (len(news_items[index].get("content", "")), -index))
+            representative = dict(news_items[lead_index])
+            representative["sibling_sources"] = [
+                {
+                    "id": news_items[index].get("id", ""),
+                    "title": news_items[index].get("title", ""),
+                    "source": news_items[index].get("source", ""),
+                    "url": news_items[index].get("url", ""),
+                }
+                for index in members
+                if index != lead_index
+            ]
+            result.append(representative)
+        return result
+
     def _build_filter_item(self, item: Dict[str, Any], ai_result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         normalized_url = self._normalize_url(item.get("url", ""))
-        theme_tags = self._normalize_theme_tags(ai_result.get("theme_tags")) if ai_result else self._infer_theme_tags(item)
-        ai_scores = self._normalize_ai_scores(ai_result, item, theme_tags)
-        final_score = round(
-            ai_scores["importance"] * 0.35
-            + ai_scores["relevance_to_me"] * 0.3
-            + ai_scores["signal_strength"] * 0.2
-            + ai_scores["actionability"] * 0.15,
-            2,
+        keyword_hits = None if ai_result else self._scan_keywords(item)
+        theme_tags = (
+            self._normalize_theme_tags(ai_result.get("theme_tags"))
+            if ai_result
+            else self._infer_theme_tags(item, keyword_hits)
         )
+        ai_scores = self._normalize_ai_scores(ai_result, item, theme_tags, keyword_hits)
 
         return {
             "id": item.get("id") or self._generate_news_id(normalized_url, item),
@@ -95,16 +134,72 @@ class NewsProcessor:
             "collected_at": item.get("collected_at"),
             "theme_tags": theme_tags,
             "ai_scores": ai_scores,
-            "final_score": final_score,
-            "signal_level": self._map_signal_level(final_score),
+            # final_score / signal_level 由 _rank_filter_items 统一计算
+            "final_score": None,
+            "signal_level": None,
             "score_reason": (ai_result or {}).get("reason", ""),
+            "sibling_sources": item.get("sibling_sources", []),
         }
 
-    def _infer_theme_tags(self, item: Dict[str, Any]) -> List[str]:
-        haystack = " ".join(
-            [item.get("title", "").lower(), item.get("content", "").lower(), item.get("source", "").lower()]
+    def _scan_keywords(self, item: Dict[str, Any]) -> Tuple[Set[str], Set[str]]:
+        """一次扫描同时得到主题标签与高信号关键词命中：(标题+正文命中, 来源命中)。"""
+        text_hits = self.KEYWORD_MATCHER.scan(f"{item.get('title', '')} {item.get('content', '')}".lower())
+        source_hits = self.KEYWORD_MATCHER.scan(item.get("source", "").lower())
+        return text_hits, source_hits
+
+    def _rank_filter_items(self, filter_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """计算 final_score 与 signal_level，按阈值过滤后按分数降序返回。"""
+        if np is not None and len(filter_items) >= settings.AI_BATCH_SCORING_MIN_ITEMS:
+            return self._rank_filter_items_batch(filter_items)
+
+        kept = []
+        for item in filter_items:
+            final_score = self._weighted_score(item["ai_scores"])
+            item["final_score"] = final_score
+            item["signal_level"] = self._map_signal_level(final_score)
+            if final_score >= settings.AI_SCORE_THRESHOLD:
+                kept.append(item)
+        kept.sort(key=lambda item: item["final_score"], reverse=True)
+        return kept
+
+    def _rank_filter_items_batch(self, filter_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """列式批量路径：一次完成加权、阈值过滤、稳定降序排序与信号等级映射。"""
+        matrix = np.array(
+            [[item["ai_scores"][dimension] for dimension in self.SCORE_DIMENSIONS] for item in filter_items],
+            dtype=float,
         )
-        tags = [tag for tag, keywords in self.THEME_KEYWORDS.items() if any(keyword in haystack for keyword in keywords)]
+        # 逐列累加而非矩阵乘法，保持与逐条计算相同的浮点运算顺序
+        raw_scores = np.zeros(len(filter_items))
+        for column, weight in enumerate(self.score_weights):
+            raw_scores = raw_scores + matrix[:, column] * weight
+        final_scores = np.round(raw_scores, 2)
+        signal_levels = np.select([final_scores >= 8, final_scores >= 6], ["S", "A"], default="B")
+
+        kept_indexes = np.flatnonzero(final_scores >= settings.AI_SCORE_THRESHOLD)
+        order = kept_indexes[np.argsort(-final_scores[kept_indexes], kind="stable")]
+        for index, item in enumerate(filter_items):
+            item["final_score"] = float(final_scores[index])
+            item["signal_level"] = str(signal_levels[index])
+        return [filter_items[index] for index in order]
+
+    def _weighted_score(self, ai_scores: Dict[str, int]) -> float:
+        total = 0.0
+        for dimension, weight in zip(self.SCORE_DIMENSIONS, self.score_weights):
+            total += ai_scores[dimension] * weight
+        return round(total, 2)
+
+    def _resolve_score_weights(self) -> Tuple[float, ...]:
+        configured = settings.AI_SCORE_WEIGHTS
+        return tuple(float(configured.get(dimension, 0.0)) for dimension in self.SCORE_DIMENSIONS)
+
+    def _infer_theme_tags(
+        self,
+        item: Dict[str, Any],
+        keyword_hits: Optional[Tuple[Set[str], Set[str]]] = None,
+    ) -> List[str]:
+        text_hits, source_hits = keyword_hits or self._scan_keywords(item)
+        hits = text_hits | source_hits
+        tags = [tag for tag in self.THEME_KEYWORDS if tag in hits]
         if not tags:
             tags = ["general_ai"]
         return tags[:3]
@@ -114,6 +209,7 @@ class NewsProcessor:
         ai_result: Optional[Dict[str, Any]],
         item: Dict[str, Any],
         theme_tags: List[str],
+        keyword_hits: Optional[Tuple[Set[str], Set[str]]] = None,
     ) -> Dict[str, int]:
         if ai_result:
             return {
@@ -123,7 +219,10 @@ class NewsProcessor:
                 "actionability": self._clamp_score(ai_result.get("actionability")),
             }
 
-        fallback_score = self._heuristic_score(item, theme_tags)
+        if self.score_model is not None:
+            return self.score_model.predict(item, theme_tags)
+
+        fallback_score = self._heuristic_score(item, theme_tags, keyword_hits)
         return {
             "importance": fallback_score,
             "relevance_to_me": min(10, fallback_score + (1 if "workflow" in theme_tags or "design" in theme_tags else 0)),
@@ -135,17 +234,77 @@ class NewsProcessor:
         if not news_items or not settings.AI_API_KEY:
             return {}
 
+        score_map: Dict[int, Dict[str, Any]] = {}
+        pending_keys: Dict[int, Optional[str]] = {}
         prompt_items = []
-        for index, item in enumerate(news_items[:30]):
+        for index in self._select_llm_candidates(news_items):
+            item = news_items[index]
+            content = self._clean_content(item.get("content", ""))
+            cache_key = None
+            if self.score_cache is not None:
+                cache_key = self.score_cache.make_key(
+                    self._normalize_url(item.get("url", "")),
+                    self._normalize_text(item.get("title", "")),
+                    content,
+                )
+                cached = self.score_cache.get(cache_key)
+                if cached is not None:
+                    score_map[index] = cached
+                    continue
+            pending_keys[index] = cache_key
             prompt_items.append({
                 "index": index,
                 "title": item.get("title", ""),
                 "source": item.get("source", ""),
-                "content": self._clean_content(item.get("content", ""))[:600],
+                "content": content[:600],
                 "published_at": item.get("published_at"),
             })
 
-        prompt = f"""
+        if prompt_items:
+            def accept(item: Any):
+                self._accept_scored_item(item, pending_keys, score_map)
+
+            prompt = self._build_scoring_prompt(prompt_items)
+            if settings.AI_STREAMING:
+                # 每个评分条目闭合即入库，流中途异常重试时同 index 会被覆盖
+                self._call_ai_json_stream(prompt, accept)
+            else:
+                result = self._call_ai_json(prompt)
+                for item in result.get("items", []) if isinstance(result, dict) else []:
+                    accept(item)
+
+        if self.score_cache is not None:
+            self.score_cache.save()
+        return score_map
+
+    def _select_llm_candidates(self, news_items: List[Dict[str, Any]]) -> List[int]:
+        """本地预排序后只让 top-K 进入 LLM 评分，其余条目由 _heuristic_score 兜底。"""
+        top_k = settings.AI_PREFILTER_TOP_K
+        if self.relevance_ranker is None:
+            return list(range(min(len(news_items), top_k)))
+        selected = self.relevance_ranker.select_top_k(news_items, top_k)
+        if len(selected) < len(news_items):
+            print(f"本地相关性预筛：{len(news_items)} 条候选中 {len(selected)} 条进入 AI 评分")
+        return selected
+
+    def _accept_scored_item(
+        self,
+        item: Any,
+        pending_keys: Dict[int, Optional[str]],
+        score_map: Dict[int, Dict[str, Any]],
+    ):
+        if not isinstance(item, dict):
+            return
+        index = item.get("index")
+        if not isinstance(index, int) or index not in pending_keys:
+            return
+        score_map[index] = item
+        cache_key = pending_keys[index]
+        if cache_key is not None:
+            self.score_cache.set(cache_key, {k: v for k, v in item.items() if k != "index"})
+
+    def _build_scoring_prompt(self, prompt_items: List[Dict[str, Any]]) -> str:
+        return f"""
 任务：你是 Trend Radar 的新闻预处理器。请对输入新闻做 AI 评分，只输出 JSON。
 
 目标用户：
@@ -178,59 +337,20 @@ class NewsProcessor:
 输入新闻：
 {json.dumps(prompt_items, ensure_ascii=False, indent=2)}
 """
-        result = self._call_ai_json(prompt)
-        if not isinstance(result, dict):
-            return {}
-
-        score_map: Dict[int, Dict[str, Any]] = {}
-        for item in result.get("items", []):
-            if not isinstance(item, dict):
-                continue
-            index = item.get("index")
-            if isinstance(index, int) and 0 <= index < len(news_items):
-                score_map[index] = item
-        return score_map
 
     def _call_ai_json(self, prompt: str) -> Optional[Dict[str, Any]]:
-        delay = settings.THIRD_LAYER_RETRY_DELAY
-        for attempt in range(settings.THIRD_LAYER_RETRIES):
-            try:
-                with httpx.Client(
-                    proxy=self._http_proxy(),
-                    trust_env=False,
-                ) as client:
-                    response = client.post(
-                        settings.AI_API_URL,
-                        headers={
-                            "Content-Type": "application/json",
-                            "Authorization": f"Bearer {settings.AI_API_KEY}",
-                        },
-                        json={
-                            "model": settings.AI_MODEL,
-                            "messages": [
-                                {"role": "system", "content": "你是一个严格输出 JSON 的新闻评分助手。"},
-                                {"role": "user", "content": prompt},
-                            ],
-                            "stream": False,
-                            "max_tokens": 4096,
-                        },
-                        timeout=settings.THIRD_LAYER_TIMEOUT,
-                    )
-                if response.status_code == 200:
-                    content = response.json()["choices"][0]["message"]["content"].strip()
-                    parsed = self._extract_json(content)
-                    if parsed is not None:
-                        return parsed
-            except Exception:
-                pass
-
-            if attempt < settings.THIRD_LAYER_RETRIES - 1:
-                time.sleep(delay)
-                delay *= 2
-        return None
+        return self.llm_client.complete(
+            "你是一个严格输出 JSON 的新闻评分助手。",
+            prompt,
+            parser=self._extract_json,
+        )
 
-    def _http_proxy(self) -> Optional[str]:
-        return os.environ.get("https_proxy") or os.environ.get("http_proxy") or None
+    def _call_ai_json_stream(self, prompt: str, on_item: Callable[[Any], None]) -> Optional[Dict[str, Any]]:
+        return self.llm_client.complete_stream(
+            "你是一个严格输出 JSON 的新闻评分助手。",
+            prompt,
+            parser_factory=lambda: JSONStreamParser(item_key="items", on_item=on_item),
+        )
 
     def _extract_json(self, text: str) -> Optional[Dict[str, Any]]:
         text = text.strip()
@@ -263,12 +383,17 @@ class NewsProcessor:
         cleaned = [tag for tag in tags if tag in self.THEME_KEYWORDS or tag == "general_ai"]
         return cleaned[:3] or ["general_ai"]
 
-    def _heuristic_score(self, item: Dict[str, Any], theme_tags: List[str]) -> int:
-        haystack = f"{item.get('title', '')} {item.get('content', '')}".lower()
+    def _heuristic_score(
+        self,
+        item: Dict[str, Any],
+        theme_tags: List[str],
+        keyword_hits: Optional[Tuple[Set[str], Set[str]]] = None,
+    ) -> int:
+        text_hits, _ = keyword_hits or self._scan_keywords(item)
         score = 4
         if len(item.get("content", "")) >= 120:
             score += 1
-        if any(keyword in haystack for keyword in self.HIGH_SIGNAL_KEYWORDS):
+        if self.HIGH_SIGNAL_GROUP in text_hits:
             score += 2
         if any(tag in theme_tags for tag in ("ai_model", "ai_product", "workflow", "coding", "design")):
             score += 1
@@ -281,20 +406,18 @@ class NewsProcessor:
             return "A"
         return "B"
 
+    def _reset_normalization_cache(self):
+        self._cleaned_contents: Dict[str, str] = {}
+
     def _clean_content(self, content: str) -> str:
-        return " ".join(content.split())
+        cleaned = self._cleaned_contents.get(content)
+        if cleaned is None:
+            cleaned = " ".join(content.split())
+            self._cleaned_contents[content] = cleaned
+        return cleaned
 
     def _normalize_url(self, url: str) -> str:
-        if not url:
-            return ""
-        parsed = urlparse(url.strip().lower())
-        filtered_query = [
-            (key, value)
-            for key, value in parse_qsl(parsed.query, keep_blank_values=True)
-            if not key.startswith(self.TRACKING_QUERY_PREFIXES)
-        ]
-        normalized_path = parsed.path.rstrip("/")
-        return urlunparse((parsed.scheme, parsed.netloc, normalized_path, "", urlencode(filtered_query), ""))
+        return canonicalize_url(url)
 
     def _normalize_text(self, text: str) -> str:
         return " ".join(text.strip().lower().split())
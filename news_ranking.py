@@ -0,0 +1,29 @@
+import heapq
+from typing import Any, Dict, List
+
+# filter_payload 中标记 news 已按 final_score 降序排列的字段
+SORTED_BY_KEY = "sorted_by"
+SORTED_BY_FINAL_SCORE = "final_score"
+
+
+def _final_score(item: Dict[str, Any]) -> float:
+    return item.get("final_score") or 0
+
+
+def is_sorted_by_score(filter_payload: Dict[str, Any]) -> bool:
+    return filter_payload.get(SORTED_BY_KEY) == SORTED_BY_FINAL_SCORE
+
+
+def ranked_news(filter_payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """返回按 final_score 降序的 news；payload 已带排序标记时直接复用，不再重排。"""
+    news_items = filter_payload.get("news", [])
+    if is_sorted_by_score(filter_payload):
+        return news_items
+    return sorted(news_items, key=_final_score, reverse=True)
+
+
+def top_by_score(news_items: List[Dict[str, Any]], limit: int, presorted: bool = False) -> List[Dict[str, Any]]:
+    """取分数最高的 limit 条：已排序时直接切片，否则用堆做部分选择（与稳定降序排序后切片结果一致）。"""
+    if presorted:
+        return news_items[:limit]
+    return heapq.nlargest(limit, news_items, key=_final_score)
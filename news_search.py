@@ -0,0 +1,182 @@
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from storage_manager import StorageManager
+
+
+class NewsSearchIndex:
+    """基于 SQLite FTS5 的新闻全文索引，覆盖 raw_news 与 filter_news。
+
+    FTS5 自带的 unicode61 分词器会把整段中文当成一个词，因此写入前先做切分：
+    中文连续片段切成二元组，英文与数字按单词切分，查询词用同样的规则切分后做短语匹配。
+    写入时另在末尾追加每个中文片段的最后一个字，使每个汉字都是某个词的首字，单字查询用前缀匹配即可命中。
+    排序分数为 BM25 相关度 × final_score（raw_news 没有 final_score，按 RAW_SCORE 计）。
+    """
+
+    RAW_SCORE = 5.0
+    TOKEN_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]+|[a-z0-9]+(?:[.\-_][a-z0-9]+)*")
+    CJK_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]")
+    CONTENT_CHARS = 2000
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.storage = StorageManager()
+        self.db_path = db_path or self.storage.get_search_index_path()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def index_news(self, news_items: List[Dict[str, Any]], date_str: str, kind: str):
+        """写入或覆盖一批新闻；kind 为 "raw" 或 "filter"，同一 news_id 在两类中各保留一份。"""
+        connection = self._connect()
+        with connection:
+            for item in news_items:
+                news_id = item.get("id")
+                if not news_id:
+                    continue
+                row = connection.execute(
+                    "SELECT doc_id FROM documents WHERE news_id = ? AND kind = ?", (news_id, kind)
+                ).fetchone()
+                values = (
+                    date_str,
+                    item.get("title", ""),
+                    item.get("source", ""),
+                    item.get("url", ""),
+                    item.get("final_score"),
+                )
+                if row:
+                    doc_id = row[0]
+                    connection.execute(
+                        "UPDATE documents SET date = ?, title = ?, source = ?, url = ?, final_score = ? WHERE doc_id = ?",
+                        values + (doc_id,),
+                    )
+                    connection.execute("DELETE FROM news_fts WHERE rowid = ?", (doc_id,))
+                else:
+                    doc_id = connection.execute(
+                        "INSERT INTO documents (news_id, kind, date, title, source, url, final_score) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (news_id, kind) + values,
+                    ).lastrowid
+                connection.execute(
+                    "INSERT INTO news_fts (rowid, title, content, source) VALUES (?, ?, ?, ?)",
+                    (
+                        doc_id,
+                        self.segment(item.get("title", ""), with_run_ends=True),
+                        self.segment((item.get("content") or "")[:self.CONTENT_CHARS], with_run_ends=True),
+                        self.segment(item.get("source", "")),
+                    ),
+                )
+
+    def search(
+        self,
+        query: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        match = self.build_match_query(query)
+        if not match:
+            return []
+
+        conditions = ["news_fts MATCH ?"]
+        params: List[Any] = [match]
+        if start_date:
+            conditions.append("documents.date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("documents.date <= ?")
+            params.append(end_date)
+        # bm25() 越小越相关，取负后与 final_score 相乘；同一 news_id 只保留分数最高的一份（通常是 filter）
+        sql = f"""
+            SELECT documents.news_id, documents.kind, documents.date, documents.title,
+                   documents.source, documents.url, documents.final_score,
+                   -bm25(news_fts, 3.0, 1.0, 0.5) * COALESCE(documents.final_score, ?) AS rank_score
+            FROM news_fts JOIN documents ON documents.doc_id = news_fts.rowid
+            WHERE {" AND ".join(conditions)}
+            ORDER BY rank_score DESC
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        for row in self._connect().execute(sql, [self.RAW_SCORE] + params):
+            news_id = row[0]
+            if news_id in results:
+                continue
+            results[news_id] = {
+                "news_id": news_id,
+                "kind": row[1],
+                "date": row[2],
+                "title": row[3],
+                "source": row[4],
+                "url": row[5],
+                "final_score": row[6],
+                "rank_score": round(row[7], 4),
+            }
+            if len(results) >= limit:
+                break
+        return list(results.values())
+
+    def clear(self):
+        """清空索引，reindex 回填历史存档前调用"""
+        connection = self._connect()
+        with connection:
+            connection.execute("DELETE FROM news_fts")
+            connection.execute("DELETE FROM documents")
+
+    def delete_before(self, date_str: str) -> int:
+        connection = self._connect()
+        with connection:
+            doc_ids = [row[0] for row in connection.execute("SELECT doc_id FROM documents WHERE date < ?", (date_str,))]
+            connection.executemany("DELETE FROM news_fts WHERE rowid = ?", [(doc_id,) for doc_id in doc_ids])
+            connection.execute("DELETE FROM documents WHERE date < ?", (date_str,))
+        return len(doc_ids)
+
+    def segment(self, text: str, with_run_ends: bool = False) -> str:
+        """with_run_ends 时把各中文片段的末字追加在全部词之后，不打断片段内二元组的相邻关系。"""
+        tokens = []
+        run_ends = []
+        for token in self.TOKEN_PATTERN.findall((text or "").lower()):
+            if self.CJK_PATTERN.match(token) and len(token) > 1:
+                tokens.extend(token[index:index + 2] for index in range(len(token) - 1))
+                if with_run_ends:
+                    run_ends.append(token[-1])
+            else:
+                tokens.append(token)
+        return " ".join(tokens + run_ends)
+
+    def build_match_query(self, query: str) -> str:
+        """每个查询词切分后作为一个短语，多个词之间为 AND；单个汉字按前缀匹配二元组与片段末字。"""
+        phrases = []
+        for word in query.split():
+            segmented = self.segment(word).replace('"', "")
+            if not segmented:
+                continue
+            if len(segmented) == 1 and self.CJK_PATTERN.match(segmented):
+                phrases.append('"%s"*' % segmented)
+            else:
+                phrases.append('"%s"' % segmented)
+        return " AND ".join(phrases)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.db_path)
+            connection.executescript(
+                """
+                PRAGMA journal_mode = WAL;
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_id INTEGER PRIMARY KEY,
+                    news_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    title TEXT,
+                    source TEXT,
+                    url TEXT,
+                    final_score REAL,
+                    UNIQUE (news_id, kind)
+                );
+                CREATE INDEX IF NOT EXISTS idx_documents_date ON documents (date);
+                CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(title, content, source);
+                """
+            )
+            self._connection = connection
+        return self._connection
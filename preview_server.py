@@ -0,0 +1,204 @@
+"""
+本地预览服务
+
+python main.py serve 启动一个只监听本机的 HTTP 服务，用 render_email 渲染 data/report/daily/ 下的任意日报，
+改模板后无需 send-v3-daily 再去邮箱查看：
+
+- /<date>.html            渲染后的日报，响应头 Server-Timing 带各模块渲染耗时
+- /timing/<date>.json     同一份日报各模块的渲染耗时（毫秒）
+- /designs/<file>         docs/designs/ 下的设计稿
+- /assets/header_bg.png   Header 背景图
+
+渲染结果按（日报内容哈希, 模板 mtime）缓存；页面内嵌的脚本轮询 /__version，模板、设计稿或日报变化时自动刷新。
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+import v3_email_renderer as renderer
+from config import settings
+from storage_manager import StorageManager
+
+DESIGN_DIR = os.path.join(os.path.dirname(__file__), "docs", "designs")
+REPORT_PATH_PATTERN = re.compile(r"^/(\d{4}-\d{2}-\d{2})\.html$")
+TIMING_PATH_PATTERN = re.compile(r"^/timing/(\d{4}-\d{2}-\d{2})\.json$")
+RELOAD_SCRIPT = """<script>
+(function () {
+    var version = null;
+    setInterval(function () {
+        fetch('/__version').then(function (response) { return response.text(); }).then(function (text) {
+            if (version !== null && text !== version) { location.reload(); }
+            version = text;
+        }).catch(function () {});
+    }, 1000);
+})();
+</script>"""
+
+Response = Tuple[int, str, bytes, Dict[str, str]]
+
+
+class ReportPreview:
+    """按请求路径生成响应，与 HTTP 服务解耦以便直接测试。"""
+
+    def __init__(self, report_dir: Optional[str] = None, design_dir: Optional[str] = None, cache_size: Optional[int] = None):
+        self.storage = StorageManager()
+        self.report_dir = report_dir or settings.DAILY_REPORT_DIR
+        self.design_dir = design_dir or DESIGN_DIR
+        self._render_cached = lru_cache(maxsize=cache_size or settings.PREVIEW_CACHE_SIZE)(self._render)
+
+    def handle(self, url: str) -> Response:
+        parsed = urlparse(url)
+        path = unquote(parsed.path)
+        minify = parse_qs(parsed.query).get("minify", ["0"])[0] == "1"
+
+        if path == "/":
+            return self._html(self._render_index())
+        if path == "/__version":
+            return 200, "text/plain; charset=utf-8", self.version().encode("utf-8"), {"Cache-Control": "no-store"}
+        if path == f"/{renderer.HEADER_BG_ASSET}":
+            data = renderer.get_header_bg_bytes()
+            return (200, "image/png", data, {}) if data else self._not_found()
+
+        match = REPORT_PATH_PATTERN.match(path) or TIMING_PATH_PATTERN.match(path)
+        if match:
+            result = self.render_report(match.group(1), minify)
+            if result is None:
+                return self._not_found()
+            page, timings = result
+            if path.startswith("/timing/"):
+                body = json.dumps(timings, ensure_ascii=False, indent=2).encode("utf-8")
+                return 200, "application/json; charset=utf-8", body, {}
+            server_timing = ", ".join(f"{name};dur={duration}" for name, duration in timings.items())
+            return self._html(_inject_reload_script(page), {"Server-Timing": server_timing})
+
+        if path.startswith("/designs/"):
+            design_path = os.path.join(self.design_dir, os.path.basename(path))
+            if not os.path.isfile(design_path):
+                return self._not_found()
+            with open(design_path, "r", encoding="utf-8") as file:
+                return self._html(_inject_reload_script(file.read()))
+        return self._not_found()
+
+    def render_report(self, date_str: str, minify: bool = False) -> Optional[Tuple[str, Dict[str, float]]]:
+        """渲染某天的日报，返回 (HTML, 各模块耗时)；日报不存在时返回 None"""
+        report_path = os.path.join(self.report_dir, f"{date_str}.json")
+        if not os.path.exists(report_path):
+            return None
+        with open(report_path, "rb") as file:
+            report_hash = hashlib.sha256(file.read()).hexdigest()
+        return self._render_cached(report_path, report_hash, os.path.getmtime(renderer.TEMPLATE_PATH), minify)
+
+    def _render(self, report_path: str, report_hash: str, template_mtime: float, minify: bool) -> Tuple[str, Dict[str, float]]:
+        # report_hash 与 template_mtime 只参与缓存键：日报或模板变化时缓存自然失效
+        report = self.storage.read_json(report_path, default={}) or {}
+        report.setdefault("meta", {}).setdefault("date", os.path.splitext(os.path.basename(report_path))[0])
+        news_map = self.storage.get_referenced_news(report)
+
+        timings = time_sections(report, news_map)
+        started_at = time.perf_counter()
+        page = renderer.render_email(report, news_map, header_image_mode="asset", minify=minify)
+        timings["render_email"] = _elapsed_ms(started_at)
+        print(f"渲染 {report['meta']['date']}：{timings['render_email']} ms")
+        return page, timings
+
+    def version(self) -> str:
+        """被监视文件的 mtime 指纹，任一文件变化即变化"""
+        watched = [renderer.TEMPLATE_PATH]
+        for directory in (self.design_dir, self.report_dir):
+            if os.path.isdir(directory):
+                watched += [os.path.join(directory, filename) for filename in sorted(os.listdir(directory))]
+        return hashlib.sha1(
+            "|".join(f"{path}:{os.path.getmtime(path)}" for path in watched if os.path.exists(path)).encode("utf-8")
+        ).hexdigest()
+
+    def _render_index(self) -> str:
+        dates = sorted(
+            (os.path.splitext(os.path.basename(path))[0] for path in self.storage.list_json_files(self.report_dir)),
+            reverse=True,
+        )
+        designs = sorted(os.listdir(self.design_dir)) if os.path.isdir(self.design_dir) else []
+        report_links = "".join(
+            f'<li><a href="/{date_str}.html">{date_str}</a> · <a href="/{date_str}.html?minify=1">压缩版</a>'
+            f' · <a href="/timing/{date_str}.json">耗时</a></li>'
+            for date_str in dates
+        )
+        design_links = "".join(
+            f'<li><a href="/designs/{html.escape(name)}">{html.escape(name)}</a></li>' for name in designs
+        )
+        return (
+            '<!DOCTYPE html><html lang="zh-CN"><head><meta charset="UTF-8"><title>日报预览</title></head><body>'
+            f"<h1>日报</h1><ul>{report_links or '<li>暂无日报</li>'}</ul>"
+            f"<h1>设计稿</h1><ul>{design_links or '<li>暂无设计稿</li>'}</ul>"
+            f"{RELOAD_SCRIPT}</body></html>"
+        )
+
+    @staticmethod
+    def _html(page: str, headers: Optional[Dict[str, str]] = None) -> Response:
+        return 200, "text/html; charset=utf-8", page.encode("utf-8"), headers or {}
+
+    @staticmethod
+    def _not_found() -> Response:
+        return 404, "text/plain; charset=utf-8", "Not Found".encode("utf-8"), {}
+
+
+def time_sections(report: Dict[str, Any], news_map: Dict[str, Dict]) -> Dict[str, float]:
+    """分别计时 V3 邮件各模块的渲染函数（毫秒）"""
+    signals = report.get("signal_interpretation", {})
+    sections = (
+        ("render_top_events", renderer.render_top_events, signals.get("top_events", [])),
+        ("render_six_dimensions", renderer.render_six_dimensions, signals.get("six_dimension_briefs", {})),
+        ("render_trend_watch", lambda trends: renderer.render_trend_watch(trends, news_map), report.get("deep_analysis", [])),
+        ("render_actions", renderer.render_actions, report.get("action_suggestions", {})),
+    )
+    timings = {}
+    for name, render, data in sections:
+        started_at = time.perf_counter()
+        render(data)
+        timings[name] = _elapsed_ms(started_at)
+    return timings
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None):
+    """启动预览服务，Ctrl+C 退出"""
+    preview = ReportPreview()
+
+    class PreviewHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, content_type, body, headers = preview.handle(self.path)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host or settings.PREVIEW_HOST, port or settings.PREVIEW_PORT), PreviewHandler)
+    print(f"预览服务已启动：http://{server.server_address[0]}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _inject_reload_script(page: str) -> str:
+    if "</body>" in page:
+        return page.replace("</body>", f"{RELOAD_SCRIPT}</body>", 1)
+    return page + RELOAD_SCRIPT
+
+
+def _elapsed_ms(started_at: float) -> float:
+    return round((time.perf_counter() - started_at) * 1000, 3)
@@ -0,0 +1,93 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from news_ranking import top_by_score
+
+
+class PromptBuilder:
+    """按 token 预算打包 prompt 中的新闻上下文，优先保留 final_score 高的条目。"""
+
+    # 粗略估算：中文约 0.6 token/字，英文与符号约 0.3 token/字符
+    CJK_TOKENS_PER_CHAR = 0.6
+    OTHER_TOKENS_PER_CHAR = 0.3
+    CJK_PATTERN = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+    MIN_CONTENT_TOKENS = 24
+
+    def __init__(self, token_budget: Optional[int] = None, max_items: Optional[int] = None):
+        self.token_budget = token_budget or settings.AI_PROMPT_TOKEN_BUDGET
+        self.max_items = max_items or settings.AI_PROMPT_MAX_ITEMS
+
+    def estimate_tokens(self, text: str) -> int:
+        cjk_count = len(self.CJK_PATTERN.findall(text))
+        other_count = len(text) - cjk_count
+        return int(cjk_count * self.CJK_TOKENS_PER_CHAR + other_count * self.OTHER_TOKENS_PER_CHAR) + 1
+
+    def dumps(self, data: Any) -> str:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    def pack_news(
+        self,
+        news_items: List[Dict[str, Any]],
+        token_budget: Optional[int] = None,
+        presorted: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """先按分数纳入尽可能多的条目元数据，再把剩余预算按需分配给正文。
+
+        正文较短的条目只占用实际所需，省下的预算留给更长的条目，而不是统一截断。
+        """
+        budget = token_budget or self.token_budget
+        ranked = top_by_score(news_items, self.max_items, presorted)
+
+        entries = []
+        contents = []
+        used = 2
+        for item in ranked:
+            entry = self._compact_entry(item)
+            cost = self.estimate_tokens(self.dumps(entry)) + 1
+            if entries and used + cost + self.MIN_CONTENT_TOKENS > budget:
+                break
+            entries.append(entry)
+            contents.append(" ".join((item.get("content") or "").split()))
+            used += cost
+
+        remaining = max(0, budget - used)
+        order = sorted(range(len(entries)), key=lambda index: self.estimate_tokens(contents[index]))
+        for position, index in enumerate(order):
+            share = remaining // (len(order) - position)
+            content = self._truncate_to_tokens(contents[index], share)
+            entries[index]["content"] = content
+            remaining -= self.estimate_tokens(content) if content else 0
+        return entries
+
+    def build_news_context(
+        self,
+        news_items: List[Dict[str, Any]],
+        token_budget: Optional[int] = None,
+        presorted: bool = False,
+    ) -> str:
+        return self.dumps(self.pack_news(news_items, token_budget, presorted))
+
+    def _compact_entry(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "news_id": item.get("id"),
+            "title": item.get("title"),
+            "source": item.get("source"),
+            "url": item.get("url"),
+            "content": "",
+            "theme_tags": item.get("theme_tags", []),
+            "final_score": item.get("final_score"),
+            "signal_level": item.get("signal_level"),
+        }
+
+    def _truncate_to_tokens(self, text: str, max_tokens: int) -> str:
+        if self.estimate_tokens(text) <= max_tokens:
+            return text
+        cost = 0.0
+        for index, char in enumerate(text):
+            cost += self.CJK_TOKENS_PER_CHAR if self.CJK_PATTERN.match(char) else self.OTHER_TOKENS_PER_CHAR
+            if cost > max_tokens - 1:
+                return text[:index].rstrip() + "…" if index else ""
+        return text
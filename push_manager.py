@@ -1,15 +1,17 @@
 import os
 import json
-import smtplib
 import re
 from email.mime.text import MIMEText
+from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.header import Header
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from config import settings
+from email_delivery import DeliveryJob, get_delivery_engine
+from email_outbox import EmailOutbox
 from storage_manager import StorageManager
-from v3_email_renderer import render_email
+from v3_email_renderer import HEADER_BG_CID, PreparedEmail, get_header_bg_bytes, prepare_email
 
 
 class PushManager:
@@ -20,15 +22,20 @@ class PushManager:
         self.email_smtp_server = settings.EMAIL_SMTP_SERVER
         self.email_smtp_port = settings.EMAIL_SMTP_PORT
         self.storage = StorageManager()
+        self.outbox = EmailOutbox()
     
-    def send_daily_analysis(self, analysis: Dict[str, Any]):
-        """发送每日分析报告"""
+    def send_daily_analysis(self, analysis: Dict[str, Any], news_map: Optional[Dict[str, Dict[str, Any]]] = None):
+        """发送每日分析报告；news_map 为调用方已在内存中的新闻 ID -> 新闻详情，仅 V3 日报使用"""
         if not analysis:
             print("无分析报告可发送")
             return False
 
         print("开始发送每日分析报告...")
 
+        # V3 日报发给订阅者列表，先写入发件箱再投递；V1/V2 与错误通知仍直接发给 EMAIL_RECEIVER
+        if 'meta' in analysis and 'signal_interpretation' in analysis:
+            return self._queue_v3_daily(analysis, news_map)
+
         # 生成邮件主题（兼容 V1 和 V2 格式）
         if 'date' in analysis:
             subject = f"News Daily - {analysis['date']}"
@@ -39,12 +46,8 @@ class PushManager:
             # V1 格式，尝试从 first_layer 提取日期
             subject = f"News Daily - {datetime.now().strftime('%Y-%m-%d')}"
 
-        # 判断是 V3 / V2 / V1 格式
-        if 'meta' in analysis and 'signal_interpretation' in analysis:
-            date_value = analysis.get("meta", {}).get("date", datetime.now().strftime('%Y-%m-%d'))
-            subject = f"News Daily V3 - {date_value}"
-            html_content = self._generate_v3_daily_html_content(analysis)
-        elif 'summary' in analysis:
+        # 判断是 V2 / V1 格式
+        if 'summary' in analysis:
             html_content = self._generate_v2_html_content(analysis)
         else:
             html_content = self._generate_html_content(analysis)
@@ -58,6 +61,62 @@ class PushManager:
             print(f"发送邮件失败: {e}")
             return False
     
+    def _queue_v3_daily(self, report: Dict[str, Any], news_map: Optional[Dict[str, Dict[str, Any]]] = None) -> bool:
+        """渲染 V3 日报写入发件箱并立即投递一轮；返回该批次是否已无待发送收件人"""
+        date_value = report.get("meta", {}).get("date", datetime.now().strftime('%Y-%m-%d'))
+        try:
+            self._check_email_config()
+            # 报告正文只渲染一次，问候语、退订链接、六维偏好留作占位符，投递时按收件人拼接
+            prepared = self._prepare_v3_daily(report, news_map)
+            subscribers = self.get_subscribers()
+            # 用转义后的模板文本落盘，报告正文中的 {{...}} 不会在投递时被当成占位符
+            text_content = prepared.text_template.escaped_source
+            msg = self._build_message(
+                f"News Daily V3 - {date_value}",
+                prepared.template.escaped_source,
+                self._v3_inline_images(),
+                text_content,
+            )
+            # To 头在投递时按收件人补上，发件箱只存一份正文
+            del msg['To']
+            message = msg.as_string()
+            html_before, html_after = prepared.html_size
+            print(
+                f"邮件体积：HTML {html_before / 1024:.1f} KB → {html_after / 1024:.1f} KB，"
+                f"纯文本 {len(text_content.encode('utf-8')) / 1024:.1f} KB，MIME 合计 {len(message) / 1024:.1f} KB"
+            )
+            contexts = {subscriber["email"]: prepared.recipient_context(subscriber) for subscriber in subscribers}
+            queued = self.outbox.enqueue(
+                date_value,
+                message,
+                [subscriber["email"] for subscriber in subscribers],
+                contexts,
+                default_context=prepared.recipient_context(),
+            )
+            print(f"V3 日报已写入发件箱：{queued} 个收件人待发送")
+        except Exception as e:
+            print(f"写入发件箱失败: {e}")
+            return False
+
+        self.drain_outbox()
+        pending = self.outbox.pending_count(date_value)
+        if pending:
+            print(f"仍有 {pending} 个收件人待发送，可稍后运行 send-v3-daily 重试")
+        return pending == 0
+
+    def drain_outbox(self, force: bool = False) -> Dict[str, int]:
+        """投递发件箱中到期的邮件"""
+        try:
+            summary = self.outbox.drain(force=force)
+        except Exception as e:
+            print(f"发件箱投递失败: {e}")
+            return {}
+        print(
+            f"发件箱投递：成功 {summary['sent']}，待重试 {summary['retry']}，"
+            f"放弃 {summary['failed']}，剩余待发送 {summary['pending']}"
+        )
+        return summary
+
     def _markdown_to_html(self, markdown: str) -> str:
         """将Markdown转换为HTML"""
         if not markdown:
@@ -313,41 +372,106 @@ class PushManager:
 
     def _generate_v3_daily_html_content(self, report: Dict[str, Any]) -> str:
         """Generate V3 HTML email content using the new Figma-designed template."""
-        # 获取新闻映射（用于引用文章）
-        meta = report.get("meta", {})
-        date_str = meta.get("date", datetime.now().strftime("%Y-%m-%d"))
-
-        # 从 filter_news 获取新闻详情
-        news_map = {}
-        try:
-            filter_payload = self.storage.read_json(self.storage.get_filter_news_path(date_str), default={})
-            for news in filter_payload.get("news", []):
-                news_map[news["id"]] = news
-        except Exception as e:
-            print(f"加载新闻映射失败: {e}")
+        return self._prepare_v3_daily(report).render()
+
+    def _prepare_v3_daily(
+        self, report: Dict[str, Any], news_map: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> PreparedEmail:
+        """渲染 V3 日报中与收件人无关的部分"""
+        # 引用文章的来源依次为：调用方传入的 news_map、日报自带的 referenced_news、按 ID 回查 filter_news（旧日报）
+        if news_map is None:
+            try:
+                news_map = self.storage.get_referenced_news(report)
+            except Exception as e:
+                print(f"加载新闻映射失败: {e}")
+                news_map = {}
 
         # 使用新的渲染器
-        return render_email(report, news_map)
-    
-    def _send_email(self, subject: str, html_content: str):
-        """发送邮件"""
-        if not self.email_sender or not self.email_receiver or not self.email_password:
+        return prepare_email(report, news_map)
+
+    def _v3_inline_images(self) -> Optional[Dict[str, bytes]]:
+        """CID 模式下随邮件附带的内嵌图片：Content-ID -> PNG 字节"""
+        if settings.EMAIL_HEADER_IMAGE_MODE != "cid":
+            return None
+        header_bg = get_header_bg_bytes()
+        return {HEADER_BG_CID: header_bg} if header_bg else None
+
+    def get_subscribers(self) -> List[Dict[str, Any]]:
+        """订阅者列表：EMAIL_RECIPIENTS 与 EMAIL_RECIPIENTS_FILE 合并去重，均未配置时回退到 EMAIL_RECEIVER
+
+        订阅者文件可以是每行一个地址的文本，也可以是 JSON 列表，
+        元素为地址字符串或 {"email", "name", "sections"}，sections 为想看的六维简报维度。
+        """
+        candidates: List[Any] = re.split(r"[,;\s]+", settings.EMAIL_RECIPIENTS or "")
+        recipients_file = settings.EMAIL_RECIPIENTS_FILE
+        if recipients_file and os.path.exists(recipients_file):
+            if recipients_file.endswith(".json"):
+                candidates.extend(self.storage.read_json(recipients_file, default=[]))
+            else:
+                with open(recipients_file, "r", encoding="utf-8") as f:
+                    candidates.extend(line.strip() for line in f if not line.lstrip().startswith("#"))
+
+        subscribers: Dict[str, Dict[str, Any]] = {}
+        for candidate in candidates:
+            subscriber = dict(candidate) if isinstance(candidate, dict) else {"email": candidate}
+            address = str(subscriber.get("email") or "").strip()
+            if "@" in address and address not in subscribers:
+                subscriber["email"] = address
+                subscribers[address] = subscriber
+        return list(subscribers.values()) or [{"email": self.email_receiver}]
+
+    def _send_email(
+        self,
+        subject: str,
+        html_content: str,
+        inline_images: Optional[Dict[str, bytes]] = None,
+    ):
+        """直接发送给 EMAIL_RECEIVER（错误通知等非日报邮件），经共享投递引擎复用 SMTP 连接"""
+        self._check_email_config(require_receiver=True)
+
+        msg = self._build_message(subject, html_content, inline_images)
+        result = get_delivery_engine().deliver([DeliveryJob([self.email_receiver], msg.as_string())])
+        for recipient, reason in result.failed.items():
+            print(f"投递失败 {recipient}: {reason}")
+        if not result.delivered:
+            raise Exception(f"邮件投递失败：{self.email_receiver}")
+        print(f"邮件已投递至 {self.email_receiver}")
+
+    def _check_email_config(self, require_receiver: bool = False):
+        """发件账号必填；EMAIL_RECEIVER 只在直接发给它（require_receiver）或未配置订阅者列表时必填"""
+        has_recipient_list = bool((settings.EMAIL_RECIPIENTS or "").strip() or settings.EMAIL_RECIPIENTS_FILE)
+        needs_receiver = require_receiver or not has_recipient_list
+        if not self.email_sender or not self.email_password or (needs_receiver and not self.email_receiver):
             raise Exception("邮箱配置未完成")
-        
-        # 创建邮件
-        msg = MIMEMultipart('alternative')
+
+    def _build_message(
+        self,
+        subject: str,
+        html_content: str,
+        inline_images: Optional[Dict[str, bytes]] = None,
+        text_content: Optional[str] = None,
+    ):
+        """构建邮件；有纯文本正文时作为 alternative 的第一部分，有内嵌图片时外层为 multipart/related，HTML 通过 cid: 引用图片"""
+        alternative = MIMEMultipart('alternative')
+        if text_content:
+            alternative.attach(MIMEText(text_content, 'plain', 'utf-8'))
+        alternative.attach(MIMEText(html_content, 'html', 'utf-8'))
+
+        if inline_images:
+            msg = MIMEMultipart('related')
+            msg.attach(alternative)
+            for content_id, data in inline_images.items():
+                image = MIMEImage(data, 'png')
+                image.add_header('Content-ID', f'<{content_id}>')
+                image.add_header('Content-Disposition', 'inline', filename=f'{content_id}.png')
+                msg.attach(image)
+        else:
+            msg = alternative
+
         msg['From'] = Header(self.email_sender, 'utf-8')
         msg['To'] = Header(self.email_receiver, 'utf-8')
         msg['Subject'] = Header(subject, 'utf-8')
-        
-        # 添加HTML内容
-        part = MIMEText(html_content, 'html', 'utf-8')
-        msg.attach(part)
-        
-        # 发送邮件
-        with smtplib.SMTP_SSL(self.email_smtp_server, self.email_smtp_port) as server:
-            server.login(self.email_sender, self.email_password)
-            server.sendmail(self.email_sender, self.email_receiver, msg.as_string())
+        return msg
 
     def _generate_v2_html_content(self, analysis: Dict[str, Any]) -> str:
         """生成 V2.0.0 格式的 HTML 邮件内容"""
@@ -0,0 +1,106 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from storage_manager import StorageManager
+
+
+class RelevanceRanker:
+    """用 BM25 把候选新闻与历史高相关条目构成的兴趣画像做本地预排序。
+
+    画像取最近 AI_PREFILTER_PROFILE_DAYS 个 filter_news 文件中 relevance_to_me 达标的条目，
+    词项权重为其在画像中出现的文档比例；IDF 则在当天候选池上计算，当天人人都提的词自然被压低。
+    """
+
+    CJK_RUN_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]+")
+    WORD_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-_][a-z0-9]+)*")
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(
+        self,
+        profile_days: Optional[int] = None,
+        min_relevance: Optional[int] = None,
+        min_profile_items: Optional[int] = None,
+        content_chars: int = 600,
+    ):
+        self.storage = StorageManager()
+        self.profile_days = profile_days or settings.AI_PREFILTER_PROFILE_DAYS
+        self.min_relevance = min_relevance or settings.AI_PREFILTER_MIN_RELEVANCE
+        self.min_profile_items = min_profile_items or settings.AI_PREFILTER_MIN_PROFILE_ITEMS
+        self.content_chars = content_chars
+        self._profile: Optional[Dict[str, float]] = None
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """中文按连续汉字切二元组，英文与数字按单词切分。"""
+        text = text.lower()
+        tokens = cls.WORD_PATTERN.findall(text)
+        for run in cls.CJK_RUN_PATTERN.findall(text):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[index:index + 2] for index in range(len(run) - 1))
+        return tokens
+
+    def build_profile(self, profile_items: List[Dict[str, Any]]) -> Dict[str, float]:
+        document_frequency: Counter = Counter()
+        for item in profile_items:
+            document_frequency.update(set(self.tokenize(self._item_text(item))))
+        total = len(profile_items) or 1
+        return {term: count / total for term, count in document_frequency.items()}
+
+    def load_profile(self) -> Dict[str, float]:
+        if self._profile is None:
+            profile_items = []
+            for file_path in self.storage.list_filter_news_files()[-self.profile_days:]:
+                for item in self.storage.read_date_bucket(file_path, "news"):
+                    scores = item.get("ai_scores") or {}
+                    if (scores.get("relevance_to_me") or 0) >= self.min_relevance:
+                        profile_items.append(item)
+            self._profile = self.build_profile(profile_items) if len(profile_items) >= self.min_profile_items else {}
+            if self._profile:
+                print(f"相关性画像：{len(profile_items)} 条历史高相关新闻，{len(self._profile)} 个词项")
+        return self._profile
+
+    def score(self, news_items: List[Dict[str, Any]], profile: Optional[Dict[str, float]] = None) -> List[float]:
+        """返回每条候选新闻相对画像的 BM25 得分；画像为空时全部为 0。"""
+        profile = self.load_profile() if profile is None else profile
+        if not profile or not news_items:
+            return [0.0] * len(news_items)
+
+        term_counts = [Counter(self.tokenize(self._item_text(item))) for item in news_items]
+        document_frequency: Counter = Counter()
+        for counts in term_counts:
+            document_frequency.update(counts.keys())
+        lengths = [sum(counts.values()) for counts in term_counts]
+        average_length = (sum(lengths) / len(lengths)) or 1.0
+        total = len(news_items)
+
+        scores = []
+        for counts, length in zip(term_counts, lengths):
+            norm = self.K1 * (1 - self.B + self.B * length / average_length)
+            value = 0.0
+            for term, frequency in counts.items():
+                weight = profile.get(term)
+                if weight is None:
+                    continue
+                idf = math.log(1 + (total - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+                value += weight * idf * frequency * (self.K1 + 1) / (frequency + norm)
+            scores.append(value)
+        return scores
+
+    def select_top_k(self, news_items: List[Dict[str, Any]], top_k: int) -> List[int]:
+        """返回最值得交给 LLM 的 top_k 个下标（保持原顺序）；画像不足时退化为前 top_k 条。"""
+        if len(news_items) <= top_k:
+            return list(range(len(news_items)))
+        scores = self.score(news_items)
+        if not any(scores):
+            return list(range(top_k))
+        ranked = sorted(range(len(news_items)), key=lambda index: (-scores[index], index))
+        return sorted(ranked[:top_k])
+
+    def _item_text(self, item: Dict[str, Any]) -> str:
+        return f"{item.get('title', '')} {item.get('source', '')} {(item.get('content') or '')[:self.content_chars]}"
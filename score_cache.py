@@ -0,0 +1,67 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from config import settings
+from storage_manager import StorageManager
+
+
+class ScoreCache:
+    """AI 评分结果的内容寻址缓存，同日重跑时避免重复调用 LLM。"""
+
+    def __init__(self, cache_path: Optional[str] = None, model: Optional[str] = None):
+        self.storage = StorageManager()
+        self.cache_path = cache_path or self.storage.get_ai_score_cache_path()
+        self.model = model or settings.AI_MODEL
+        self.prompt_version = settings.AI_SCORE_PROMPT_VERSION
+        self.ttl = timedelta(hours=settings.AI_SCORE_CACHE_TTL_HOURS)
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._dirty = False
+
+    def make_key(self, normalized_url: str, normalized_title: str, cleaned_content: str) -> str:
+        seed = "\x1f".join([normalized_url, normalized_title, cleaned_content, self.model, self.prompt_version])
+        return hashlib.sha256(seed.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._load().get(key)
+        if not entry or not self._is_fresh(entry):
+            return None
+        return entry.get("result")
+
+    def set(self, key: str, result: Dict[str, Any]):
+        self._load()[key] = {
+            "model": self.model,
+            "prompt_version": self.prompt_version,
+            "cached_at": datetime.now().isoformat(),
+            "result": result,
+        }
+        self._dirty = True
+
+    def save(self):
+        """清理过期或模型不一致的条目后落盘。"""
+        entries = self._load()
+        fresh = {key: entry for key, entry in entries.items() if self._is_fresh(entry)}
+        if not self._dirty and len(fresh) == len(entries):
+            return
+        self.storage.write_json(self.cache_path, {"entries": fresh})
+        self._entries = fresh
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            try:
+                payload = self.storage.read_json(self.cache_path, default={})
+            except ValueError:
+                payload = {}
+            entries = payload.get("entries", {}) if isinstance(payload, dict) else {}
+            self._entries = entries if isinstance(entries, dict) else {}
+        return self._entries
+
+    def _is_fresh(self, entry: Dict[str, Any]) -> bool:
+        if entry.get("model") != self.model or entry.get("prompt_version") != self.prompt_version:
+            return False
+        try:
+            cached_at = datetime.fromisoformat(entry.get("cached_at", ""))
+        except (TypeError, ValueError):
+            return False
+        return datetime.now() - cached_at <= self.ttl
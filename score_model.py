@@ -0,0 +1,195 @@
+import math
+import os
+import random
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from relevance_ranker import RelevanceRanker
+from storage_manager import StorageManager
+
+
+SCORE_DIMENSIONS = ("importance", "relevance_to_me", "signal_strength", "actionability")
+# 偏置初始化为训练集均值，只需小步微调；与特征权重同步长会让前几轮整体预测大幅振荡
+BIAS_LEARNING_RATE_SCALE = 0.1
+
+
+class ScoreModel:
+    """基于哈希特征的线性回归评分模型，作为 LLM 不可用或未入选时的兜底评分。
+
+    特征包括标题/正文的词项（中文二元组、英文单词）、来源和主题标签，
+    四个评分维度共享同一份特征，每个特征存一组 4 维权重。
+    """
+
+    VERSION = 1
+    CONTENT_CHARS = 600
+
+    def __init__(self, hash_bits: int, bias: List[float], weights: Dict[int, List[float]]):
+        self.hash_bits = hash_bits
+        self.bias = bias
+        self.weights = weights
+        self._mask = (1 << hash_bits) - 1
+
+    @classmethod
+    def load(cls, model_path: Optional[str] = None) -> Optional["ScoreModel"]:
+        storage = StorageManager()
+        data = storage.read_json(model_path or storage.get_score_model_path())
+        if not isinstance(data, dict) or data.get("version") != cls.VERSION:
+            return None
+        weights = {int(index): values for index, values in data.get("weights", {}).items()}
+        return cls(data["hash_bits"], data["bias"], weights)
+
+    def save(self, model_path: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None):
+        storage = StorageManager()
+        storage.write_json(
+            model_path or storage.get_score_model_path(),
+            {
+                "version": self.VERSION,
+                "hash_bits": self.hash_bits,
+                "trained_at": datetime.now().isoformat(),
+                **(metadata or {}),
+                "bias": [round(value, 4) for value in self.bias],
+                "weights": {
+                    str(index): [round(value, 4) for value in values]
+                    for index, values in self.weights.items()
+                    if any(abs(value) >= 1e-4 for value in values)
+                },
+            },
+        )
+
+    def featurize(self, item: Dict[str, Any], theme_tags: List[str]) -> List[Tuple[int, float]]:
+        text = f"{item.get('title', '')} {(item.get('content') or '')[:self.CONTENT_CHARS]}"
+        counts = Counter(self._hash(f"w:{token}") for token in RelevanceRanker.tokenize(text))
+        norm = math.sqrt(sum(count * count for count in counts.values())) or 1.0
+        features = [(index, count / norm) for index, count in counts.items()]
+
+        features.append((self._hash(f"src:{(item.get('source') or '').strip().lower()}"), 1.0))
+        if theme_tags:
+            tag_value = 1 / math.sqrt(len(theme_tags))
+            features.extend((self._hash(f"tag:{tag}"), tag_value) for tag in theme_tags)
+        return features
+
+    def predict_raw(self, features: List[Tuple[int, float]]) -> List[float]:
+        totals = list(self.bias)
+        for index, value in features:
+            weights = self.weights.get(index)
+            if weights is None:
+                continue
+            for dimension in range(len(totals)):
+                totals[dimension] += weights[dimension] * value
+        return totals
+
+    def predict(self, item: Dict[str, Any], theme_tags: List[str]) -> Dict[str, int]:
+        raw = self.predict_raw(self.featurize(item, theme_tags))
+        return {
+            dimension: max(1, min(int(round(value)), 10))
+            for dimension, value in zip(SCORE_DIMENSIONS, raw)
+        }
+
+    def _hash(self, feature: str) -> int:
+        return zlib.crc32(feature.encode("utf-8")) & self._mask
+
+
+def record_training_samples(items: List[Dict[str, Any]], date_str: str, storage: Optional[StorageManager] = None):
+    """保存当天所有由 LLM 打分的条目（不论是否过阈值），重跑同一天时覆盖。"""
+    storage = storage or StorageManager()
+    samples = [
+        {
+            "title": item.get("title", ""),
+            "content": (item.get("content") or "")[:ScoreModel.CONTENT_CHARS],
+            "source": item.get("source", ""),
+            "theme_tags": item.get("theme_tags", []),
+            "ai_scores": item.get("ai_scores", {}),
+            "score_reason": item.get("score_reason", ""),
+        }
+        for item in items
+    ]
+    storage.write_json(storage.get_score_samples_path(date_str), {"date": date_str, "samples": samples})
+
+
+def prune_training_samples(retention_days: Optional[int] = None, storage: Optional[StorageManager] = None):
+    storage = storage or StorageManager()
+    days = settings.SCORE_SAMPLE_RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    for file_path in storage.list_score_sample_files():
+        if os.path.splitext(os.path.basename(file_path))[0] < cutoff:
+            os.remove(file_path)
+
+
+def load_training_samples(storage: Optional[StorageManager] = None) -> List[Dict[str, Any]]:
+    """读取由 LLM 打分的历史条目（score_reason 非空，排除启发式兜底的条目）。
+
+    优先使用评分样本日志，其中包含未过 AI_SCORE_THRESHOLD 的条目；没有样本日志时退回历史 filter_news，
+    但 filter_news 只保存过阈值的条目，训练出的模型会整体偏高。
+    """
+    storage = storage or StorageManager()
+    sample_files = storage.list_score_sample_files()
+    if sample_files:
+        items = [item for file_path in sample_files for item in storage.read_date_bucket(file_path, "samples")]
+    else:
+        print("未找到评分样本日志，改用 filter_news 训练：其中只有过阈值的条目，预测会偏高")
+        items = [item for file_path in storage.list_filter_news_files() for item in storage.read_date_bucket(file_path, "news")]
+
+    samples = []
+    for item in items:
+        scores = item.get("ai_scores") or {}
+        if item.get("score_reason") and all(isinstance(scores.get(dimension), (int, float)) for dimension in SCORE_DIMENSIONS):
+            samples.append(item)
+    return samples
+
+
+def train_score_model(
+    samples: List[Dict[str, Any]],
+    hash_bits: Optional[int] = None,
+    epochs: Optional[int] = None,
+    learning_rate: Optional[float] = None,
+    l2: float = 1e-5,
+    seed: int = 0,
+) -> Tuple[ScoreModel, Dict[str, float]]:
+    """用带 L2 正则的 SGD 拟合四个维度，留出末尾 10% 样本评估，返回模型与 MAE 指标。"""
+    if not samples:
+        raise ValueError("没有可用于训练的历史评分样本")
+    hash_bits = hash_bits or settings.SCORE_MODEL_HASH_BITS
+    epochs = epochs or settings.SCORE_MODEL_EPOCHS
+    learning_rate = learning_rate or settings.SCORE_MODEL_LEARNING_RATE
+
+    targets = [[float(sample["ai_scores"][dimension]) for dimension in SCORE_DIMENSIONS] for sample in samples]
+    holdout = len(samples) // 10 if len(samples) >= 20 else 0
+    train_size = len(samples) - holdout
+    bias = [sum(row[dimension] for row in targets[:train_size]) / train_size for dimension in range(len(SCORE_DIMENSIONS))]
+    model = ScoreModel(hash_bits, list(bias), {})
+    features = [model.featurize(sample, sample.get("theme_tags") or []) for sample in samples]
+
+    order = list(range(train_size))
+    rng = random.Random(seed)
+    for epoch in range(epochs):
+        rng.shuffle(order)
+        rate = learning_rate / (1 + epoch)
+        for position in order:
+            prediction = model.predict_raw(features[position])
+            errors = [predicted - actual for predicted, actual in zip(prediction, targets[position])]
+            for dimension, error in enumerate(errors):
+                model.bias[dimension] -= rate * error * BIAS_LEARNING_RATE_SCALE
+            for index, value in features[position]:
+                weights = model.weights.setdefault(index, [0.0] * len(SCORE_DIMENSIONS))
+                for dimension, error in enumerate(errors):
+                    weights[dimension] -= rate * (error * value + l2 * weights[dimension])
+
+    evaluation = range(train_size, len(samples)) if holdout else range(train_size)
+    model_error = 0.0
+    baseline_error = 0.0
+    for position in evaluation:
+        prediction = model.predict_raw(features[position])
+        for dimension in range(len(SCORE_DIMENSIONS)):
+            model_error += abs(prediction[dimension] - targets[position][dimension])
+            baseline_error += abs(bias[dimension] - targets[position][dimension])
+    count = len(evaluation) * len(SCORE_DIMENSIONS)
+    metrics = {
+        "samples": len(samples),
+        "holdout": holdout,
+        "mae": round(model_error / count, 4),
+        "baseline_mae": round(baseline_error / count, 4),
+    }
+    return model, metrics
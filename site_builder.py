@@ -0,0 +1,209 @@
+"""
+静态归档站
+
+把 data/report/daily/ 下的每份日报用 V3 渲染器输出为 <date>.html，并生成按日期（index.html）
+和按标签（tags/）浏览的索引页。manifest.json 记录每份日报的内容哈希，再次构建时只重渲染新增或
+内容变化的日报；模板或页面结构变化会改变所有哈希，从而触发全量重渲染。待渲染的日报较多（例如首次
+回填几个月的日报）时分发到进程池。
+"""
+
+import hashlib
+import html
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import v3_email_renderer as renderer
+from config import settings
+from email_template import CompiledTemplate
+from storage_manager import StorageManager
+
+PAGE_SHELL = CompiledTemplate("""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{{title}}</title>
+<style>
+body { background-color: #0D0D0F; color: #F5F5F5; font-family: 'PingFang SC', -apple-system, BlinkMacSystemFont, 'Helvetica Neue', sans-serif; margin: 0; }
+main { max-width: 800px; margin: 0 auto; padding: 48px 24px; }
+a { color: #3D7092; text-decoration: none; }
+h1 { font-size: 28px; font-weight: 500; margin: 0 0 8px 0; }
+.nav { color: #787878; font-size: 14px; margin: 0 0 32px 0; }
+.entry { border-top: 1px solid #2A2A2E; padding: 20px 0; }
+.date { color: #787878; font-size: 14px; margin: 0 0 6px 0; }
+.summary { color: #F5F5F5; font-size: 16px; line-height: 1.6; margin: 0 0 8px 0; }
+.tag { color: #B0B0B0; font-size: 12px; margin-right: 12px; }
+</style>
+</head>
+<body>
+<main>
+<h1>{{title}}</h1>
+<p class="nav">{{nav_html}}</p>
+{{body_html}}
+</main>
+</body>
+</html>
+""")
+
+# 插在日报页 <body> 之后的返回链接，日报页本身就是邮件 HTML
+REPORT_NAV_HTML = (
+    '<p style="max-width: 800px; margin: 0 auto; padding: 16px 24px; font-size: 14px;">'
+    '<a href="index.html" style="color: #787878; text-decoration: none;">← 全部日报</a></p>'
+)
+BODY_TAG_PATTERN = re.compile(r"<body\b[^>]*>", re.IGNORECASE)
+TAG_FILENAME_PATTERN = re.compile(r"[^\w-]")
+
+
+class SiteBuilder:
+    """增量构建日报静态归档站，manifest 的 pages 形如 {date: {"hash", "title", "tags", "filtered_count"}}。"""
+
+    VERSION = 1  # 页面结构变化时递增，使全部日报重渲染
+
+    def __init__(self, site_dir: Optional[str] = None, report_dir: Optional[str] = None):
+        self.storage = StorageManager()
+        self.site_dir = site_dir or self.storage.get_site_dir()
+        self.report_dir = report_dir or settings.DAILY_REPORT_DIR
+        self.manifest_path = os.path.join(self.site_dir, "manifest.json")
+
+    def build(self, force: bool = False, workers: Optional[int] = None) -> Dict[str, int]:
+        """渲染新增或变化的日报并重写索引页；force 时不复用哈希、全量重渲染，但仍按旧 manifest 清理已删除的页面与标签。"""
+        manifest = self.storage.read_json(self.manifest_path, default={}) or {}
+        previous = manifest.get("pages", {})
+        render_key = self._render_key()
+
+        pages: Dict[str, Dict[str, Any]] = {}
+        tasks = []
+        for report_path in self.storage.list_json_files(self.report_dir):
+            date_str = os.path.splitext(os.path.basename(report_path))[0]
+            with open(report_path, "rb") as file:
+                content_hash = hashlib.sha256(render_key + file.read()).hexdigest()
+            page_path = os.path.join(self.site_dir, f"{date_str}.html")
+            entry = previous.get(date_str)
+            if not force and entry and entry.get("hash") == content_hash and os.path.exists(page_path):
+                pages[date_str] = entry
+            else:
+                tasks.append((date_str, report_path, page_path, content_hash))
+
+        for date_str, entry in zip([task[0] for task in tasks], self._render_all(tasks, workers)):
+            pages[date_str] = entry
+
+        removed = [date_str for date_str in previous if date_str not in pages]
+        for date_str in removed:
+            page_path = os.path.join(self.site_dir, f"{date_str}.html")
+            if os.path.exists(page_path):
+                os.remove(page_path)
+
+        self._copy_header_asset()
+        self._write_indexes(pages, previous)
+        self.storage.write_json(self.manifest_path, {"version": self.VERSION, "pages": pages})
+        return {
+            "total": len(pages),
+            "rendered": len(tasks),
+            "unchanged": len(pages) - len(tasks),
+            "removed": len(removed),
+        }
+
+    def _render_all(self, tasks: List[tuple], workers: Optional[int]) -> List[Dict[str, Any]]:
+        workers = workers or settings.SITE_BUILD_WORKERS or os.cpu_count() or 1
+        if workers > 1 and len(tasks) >= settings.SITE_BUILD_PARALLEL_MIN:
+            print(f"使用 {workers} 个进程渲染 {len(tasks)} 份日报")
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(render_report_page, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+        return [render_report_page(task) for task in tasks]
+
+    def _render_key(self) -> bytes:
+        """模板与渲染选项的指纹，拼在日报内容前一起哈希"""
+        key = f"{self.VERSION}|{settings.EMAIL_HTML_MINIFY}|{settings.EMAIL_HTML_EXTRACT_STYLES}|{renderer.load_template()}"
+        return hashlib.sha256(key.encode("utf-8")).digest()
+
+    def _copy_header_asset(self):
+        data = renderer.get_header_bg_bytes()
+        if not data:
+            return
+        asset_path = os.path.join(self.site_dir, renderer.HEADER_BG_ASSET)
+        if os.path.exists(asset_path):
+            with open(asset_path, "rb") as file:
+                if file.read() == data:
+                    return
+        os.makedirs(os.path.dirname(asset_path), exist_ok=True)
+        with open(asset_path, "wb") as file:
+            file.write(data)
+
+    def _write_indexes(self, pages: Dict[str, Dict[str, Any]], previous: Dict[str, Dict[str, Any]]):
+        dates = sorted(pages, reverse=True)
+        by_tag: Dict[str, List[str]] = {}
+        for date_str in dates:
+            for tag in pages[date_str].get("tags", []):
+                by_tag.setdefault(tag, []).append(date_str)
+
+        self.storage.write_text(os.path.join(self.site_dir, "index.html"), PAGE_SHELL.render({
+            "title": "Trend Radar 日报归档",
+            "nav_html": f'共 {len(dates)} 份日报 · <a href="tags/index.html">按标签浏览</a>',
+            "body_html": "".join(_render_entry(date_str, pages[date_str], "") for date_str in dates),
+        }))
+
+        tag_dir = os.path.join(self.site_dir, "tags")
+        tags = sorted(by_tag, key=lambda tag: (-len(by_tag[tag]), tag))
+        self.storage.write_text(os.path.join(tag_dir, "index.html"), PAGE_SHELL.render({
+            "title": "按标签浏览",
+            "nav_html": '<a href="../index.html">← 全部日报</a>',
+            "body_html": "".join(
+                f'<div class="entry"><a href="{_tag_filename(tag)}">{html.escape(tag)}</a>'
+                f'<span class="date">（{len(by_tag[tag])} 天）</span></div>'
+                for tag in tags
+            ),
+        }))
+        for tag in tags:
+            self.storage.write_text(os.path.join(tag_dir, _tag_filename(tag)), PAGE_SHELL.render({
+                "title": f"标签：{html.escape(tag)}",
+                "nav_html": '<a href="../index.html">← 全部日报</a> · <a href="index.html">全部标签</a>',
+                "body_html": "".join(_render_entry(date_str, pages[date_str], "../") for date_str in by_tag[tag]),
+            }))
+
+        # 不再被任何日报引用的标签页一并删除
+        stale_tags = {tag for entry in previous.values() for tag in entry.get("tags", [])} - set(by_tag)
+        for tag in stale_tags:
+            tag_path = os.path.join(tag_dir, _tag_filename(tag))
+            if os.path.exists(tag_path):
+                os.remove(tag_path)
+
+
+def render_report_page(task: tuple) -> Dict[str, Any]:
+    """渲染一份日报并写出页面，返回 manifest 条目；在进程池中执行，因此是模块级函数且只回传摘要"""
+    date_str, report_path, page_path, content_hash = task
+    storage = StorageManager()
+    report = storage.read_json(report_path, default={}) or {}
+    report.setdefault("meta", {}).setdefault("date", date_str)
+
+    news_map = storage.get_referenced_news(report)
+
+    page = renderer.render_email(report, news_map, header_image_mode="asset")
+    page = BODY_TAG_PATTERN.sub(lambda match: match.group(0) + REPORT_NAV_HTML, page, count=1)
+    storage.write_text(page_path, page)
+
+    signals = report.get("signal_interpretation", {})
+    return {
+        "hash": content_hash,
+        "title": signals.get("main_conclusion", ""),
+        "tags": sorted({tag for news in news_map.values() for tag in news.get("theme_tags", [])}),
+        "filtered_count": report["meta"].get("filtered_count", 0),
+    }
+
+
+def _render_entry(date_str: str, entry: Dict[str, Any], prefix: str) -> str:
+    tags_html = "".join(
+        f'<a class="tag" href="{prefix}tags/{_tag_filename(tag)}">#{html.escape(tag)}</a>'
+        for tag in entry.get("tags", [])
+    )
+    return (
+        f'<div class="entry"><p class="date">{date_str} {renderer.get_day_of_week(date_str)} · '
+        f'{entry.get("filtered_count", 0)} Articles</p>'
+        f'<p class="summary"><a href="{prefix}{date_str}.html" style="color: #F5F5F5;">{html.escape(entry.get("title") or "（无主结论）")}</a></p>'
+        f"<p>{tags_html}</p></div>"
+    )
+
+
+def _tag_filename(tag: str) -> str:
+    return f"{TAG_FILENAME_PATTERN.sub('_', tag)}.html"
@@ -20,6 +20,9 @@ class StorageManager:
             settings.FILTER_NEWS_DIR,
             settings.REPORT_DIR,
             settings.DAILY_REPORT_DIR,
+            settings.CACHE_DIR,
+            settings.INDEX_DIR,
+            settings.OUTBOX_DIR,
             settings.ANALYSIS_DIR,
             settings.DAILY_ANALYSIS_DIR,
         ]
@@ -35,10 +38,47 @@ class StorageManager:
     def get_daily_report_path(self, date_str: Optional[str] = None) -> str:
         return os.path.join(settings.DAILY_REPORT_DIR, f"{self._resolve_date(date_str)}.json")
 
+    def get_ai_score_cache_path(self) -> str:
+        return os.path.join(settings.CACHE_DIR, "ai_scores.json")
+
+    def get_trend_index_path(self) -> str:
+        return os.path.join(settings.INDEX_DIR, "trend_index.json")
+
+    def get_entity_index_dir(self) -> str:
+        return os.path.join(settings.INDEX_DIR, "entities")
+
+    def get_search_index_path(self) -> str:
+        return os.path.join(settings.INDEX_DIR, "news_search.db")
+
+    def get_score_model_path(self) -> str:
+        return os.path.join(settings.CACHE_DIR, "score_model.json")
+
+    def get_score_samples_dir(self) -> str:
+        return os.path.join(settings.CACHE_DIR, "score_samples")
+
+    def get_score_samples_path(self, date_str: Optional[str] = None) -> str:
+        return os.path.join(self.get_score_samples_dir(), f"{self._resolve_date(date_str)}.json")
+
+    def get_outbox_dir(self) -> str:
+        return settings.OUTBOX_DIR
+
+    def get_site_dir(self) -> str:
+        return settings.SITE_DIR
+
     def write_json(self, file_path: str, data: Any):
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "w", encoding="utf-8") as file:
+        # 先写临时文件再原子替换，中途崩溃不会留下半截 JSON
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
             json.dump(data, file, ensure_ascii=False, indent=2)
+        os.replace(temp_path, file_path)
+
+    def write_text(self, file_path: str, content: str):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(content)
+        os.replace(temp_path, file_path)
 
     def read_json(self, file_path: str, default: Optional[Any] = None) -> Any:
         if not os.path.exists(file_path):
@@ -67,6 +107,9 @@ class StorageManager:
     def list_daily_report_files(self) -> list[str]:
         return self.list_json_files(settings.DAILY_REPORT_DIR)
 
+    def list_score_sample_files(self) -> list[str]:
+        return self.list_json_files(self.get_score_samples_dir())
+
     def read_date_bucket(self, file_path: str, default_key: str) -> list[dict[str, Any]]:
         data = self.read_json(file_path, default={})
         if isinstance(data, dict):
@@ -77,5 +120,20 @@ class StorageManager:
             return data
         return []
 
+    def get_news_by_ids(self, news_ids: list[str], date_str: Optional[str] = None) -> dict[str, dict[str, Any]]:
+        """按 ID 取某天 filter_news 中的条目；没有要查的 ID 时不读盘。"""
+        wanted = set(news_ids)
+        if not wanted:
+            return {}
+        news_items = self.read_date_bucket(self.get_filter_news_path(date_str), "news")
+        return {item["id"]: item for item in news_items if item.get("id") in wanted}
+
+    def get_referenced_news(self, report: dict[str, Any]) -> dict[str, dict[str, Any]]:
+        """日报引用的新闻：优先用日报自带的 referenced_news，旧日报按 ID 回查当天的 filter_news。"""
+        if report.get("referenced_news") is not None:
+            return report["referenced_news"]
+        news_ids = [news_id for trend in report.get("deep_analysis", []) for news_id in trend.get("news_ids", [])]
+        return self.get_news_by_ids(news_ids, report.get("meta", {}).get("date"))
+
     def _resolve_date(self, date_str: Optional[str]) -> str:
         return date_str or datetime.now().strftime("%Y-%m-%d")
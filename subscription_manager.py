@@ -1,6 +1,5 @@
 import os
 import json
-import feedparser
 from typing import List, Dict, Any
 from config import settings
 
@@ -82,6 +81,9 @@ class SubscriptionManager:
     def _parse_opml(self) -> List[Dict[str, Any]]:
         """解析OPML文档"""
         try:
+            # 只有存在 OPML 文件时才需要 feedparser，list/add/remove 不必为它付出导入开销
+            import feedparser
+
             with open(self.opml_file, 'r', encoding='utf-8') as f:
                 opml_content = f.read()
             
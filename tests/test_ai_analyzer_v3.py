@@ -1,7 +1,9 @@
+import time
 import unittest
 from unittest.mock import patch
 
 from ai_analyzer_v3 import AIAnalyzerV3
+from llm_client import LLMClient
 
 
 class AIAnalyzerV3TestCase(unittest.TestCase):
@@ -9,6 +11,8 @@ class AIAnalyzerV3TestCase(unittest.TestCase):
 
     def setUp(self):
         self.analyzer = AIAnalyzerV3()
+        # 带测试用 key 的独立客户端，用例不依赖运行环境中的 AI_API_KEY
+        self.analyzer.llm_client = LLMClient(api_key="test")
         self.filter_payload = {
             "date": "2026-04-15",
             "news": [
@@ -161,6 +165,54 @@ class AIAnalyzerV3TestCase(unittest.TestCase):
         self.assertIn("this_week", action)
         self.assertIn("this_month", action)
 
+    def test_parallel_mode_is_faster_than_sequential(self):
+        """测试：parallel 模式下信号解读与深度分析并发，端到端耗时低于 sequential"""
+        signal_json = {"main_conclusion": "结论", "why_it_matters": "原因", "top_events": [], "six_dimension_briefs": {}}
+        deep_json = [{"title": "趋势", "evidence": "证据", "news_ids": ["news_1"], "reasoning": "推理", "so_what_for_me": "影响"}]
+        action_json = {"today": [], "this_week": [], "this_month": []}
+
+        def fake_call_json(prompt):
+            time.sleep(0.2)
+            if "生成行动建议" in prompt:
+                return action_json
+            if "深度分析" in prompt:
+                return deep_json
+            return signal_json
+
+        timings = {}
+        with patch.object(self.analyzer, "_call_json", side_effect=fake_call_json):
+            for mode in ("sequential", "parallel"):
+                report = self.analyzer.analyze_daily_report_v3(self.filter_payload, raw_news_count=3, mode=mode)
+                self.assertEqual(report["signal_interpretation"]["main_conclusion"], "结论")
+                self.assertEqual(report["deep_analysis"][0]["title"], "趋势")
+                timings[mode] = self.analyzer.last_timings["total"]
+
+        self.assertLess(timings["parallel"], timings["sequential"] * 0.85)
+
+    def test_parallel_refine_builds_actions_from_refined_analysis(self):
+        """测试：开启 AI_ANALYSIS_REFINE 时，行动建议基于精修后的深度分析生成"""
+        signal_json = {"main_conclusion": "AI 结论", "why_it_matters": "原因", "top_events": [], "six_dimension_briefs": {}}
+        action_prompts = []
+
+        def fake_call_json(prompt):
+            if "生成行动建议" in prompt:
+                action_prompts.append(prompt)
+                return {"today": [], "this_week": [], "this_month": []}
+            if "深度分析" in prompt:
+                title = "精修趋势" if "AI 结论" in prompt else "初版趋势"
+                return [{"title": title, "evidence": "证据", "news_ids": ["news_1"], "reasoning": "推理", "so_what_for_me": "影响"}]
+            return signal_json
+
+        with patch("ai_analyzer_v3.settings.AI_ANALYSIS_REFINE", True):
+            with patch.object(self.analyzer, "_call_json", side_effect=fake_call_json):
+                report = self.analyzer.analyze_daily_report_v3(self.filter_payload, raw_news_count=3, mode="parallel")
+
+        self.assertEqual(report["deep_analysis"][0]["title"], "精修趋势")
+        self.assertEqual(len(action_prompts), 1)
+        self.assertIn("精修趋势", action_prompts[0])
+        self.assertNotIn("初版趋势", action_prompts[0])
+        self.assertIn("deep_analysis_refine", self.analyzer.last_timings)
+
     def test_normalize_signal_interpretation(self):
         """测试：signal_interpretation 归一化逻辑"""
         result = {
@@ -226,9 +278,10 @@ class AIAnalyzerV3TestCase(unittest.TestCase):
 
     def test_ai_call_failure_returns_none(self):
         """测试：AI 调用失败时返回 None"""
-        with patch("ai_analyzer_v3.httpx.Client") as mocked_client:
-            mocked_client.return_value.__enter__.return_value.post.side_effect = Exception("network error")
-            with patch("ai_analyzer_v3.time.sleep"):
+        self.analyzer.llm_client = LLMClient()
+        with patch("llm_client.httpx.Client") as mocked_client:
+            mocked_client.return_value.post.side_effect = Exception("network error")
+            with patch("llm_client.time.sleep"):
                 result = self.analyzer._call_ai_api("test prompt")
 
         self.assertIsNone(result)
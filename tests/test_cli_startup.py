@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from main import build_parser
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 订阅管理命令不应加载的模块：抓取、AI 分析、邮件推送及其第三方依赖
+HEAVY_MODULES = {
+    "workflow_runner", "news_fetcher", "news_processor", "ai_analyzer_v3", "push_manager",
+    "feedparser", "httpx", "requests", "bs4", "smtplib",
+}
+# -X importtime 的累计耗时预算（微秒）；config 依赖的 pydantic-settings 单独计算
+MAIN_IMPORT_BUDGET_US = 50_000
+SUBSCRIPTION_IMPORT_BUDGET_US = 50_000
+
+
+def import_times(statement):
+    """在子进程中用 -X importtime 执行 statement，返回 模块名 -> 累计导入耗时（微秒）"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class CliStartupTestCase(unittest.TestCase):
+    def test_subscription_commands_stay_within_import_budget(self):
+        times = import_times("import main, subscription_manager")
+
+        self.assertEqual(HEAVY_MODULES & set(times), set())
+        self.assertLess(times["main"], MAIN_IMPORT_BUDGET_US)
+        self.assertLess(times["subscription_manager"] - times.get("config", 0), SUBSCRIPTION_IMPORT_BUDGET_US)
+
+    def test_dispatcher_parses_subcommand_options(self):
+        args = build_parser().parse_args(["search", "AI", "Agent", "--from", "2026-04-01"])
+
+        self.assertEqual((args.command, args.terms, args.start_date, args.end_date), ("search", ["AI", "Agent"], "2026-04-01", None))
+        self.assertEqual(build_parser().parse_args(["build-site", "--workers", "4"]).workers, 4)
+        self.assertIsNone(build_parser().parse_args([]).command)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -31,6 +31,14 @@ class DailyReportServiceTestCase(unittest.TestCase):
         self.assertIn("internal_candidates", report)
         self.assertIsInstance(report["internal_candidates"], dict)
 
+    def test_report_carries_only_referenced_news(self):
+        with patch.object(self.service.ai_analyzer, "analyze_daily_report_v3", return_value=None):
+            report = self.service.build(self.filter_payload, raw_news_count=1)
+
+        referenced_ids = {news_id for trend in report["deep_analysis"] for news_id in trend.get("news_ids", [])}
+        self.assertEqual(set(report["referenced_news"]), referenced_ids)
+        self.assertEqual(report["referenced_news"]["n1"]["url"], "https://example.com/1")
+
 
 if __name__ == "__main__":
     unittest.main()
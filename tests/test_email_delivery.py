@@ -0,0 +1,110 @@
+import smtplib
+import threading
+import unittest
+
+from email_delivery import DeliveryJob, SMTPDeliveryEngine
+
+
+class FakeSMTP:
+    def __init__(self, refusals):
+        self.refusals = refusals
+        self.sent = []
+        self.closed = False
+
+    def sendmail(self, sender, recipients, message):
+        self.sent.append(list(recipients))
+        refused = {}
+        for recipient in recipients:
+            codes = self.refusals.get(recipient)
+            if codes:
+                refused[recipient] = (codes.pop(0), b"refused")
+        if len(refused) == len(recipients):
+            raise smtplib.SMTPRecipientsRefused(refused)
+        return refused
+
+    def noop(self):
+        return (421, b"closed") if self.closed else (250, b"ok")
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class SMTPDeliveryEngineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.refusals = {}
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def make_engine(self, **kwargs):
+        def factory():
+            with self.lock:
+                connection = FakeSMTP(self.refusals)
+                self.connections.append(connection)
+                return connection
+
+        options = {"max_messages_per_connection": 3, "concurrency": 1, "max_retries": 2, "retry_delay": 0}
+        options.update(kwargs)
+        return SMTPDeliveryEngine("me@example.com", "pw", "smtp.example.com", 465, connection_factory=factory, **options)
+
+    def test_reuses_connection_and_rotates_at_message_limit(self):
+        engine = self.make_engine()
+        jobs = [DeliveryJob([f"user{index}@example.com"], "body") for index in range(7)]
+
+        result = engine.deliver(jobs)
+
+        self.assertTrue(result.ok)
+        self.assertEqual(len(result.delivered), 7)
+        self.assertEqual([len(connection.sent) for connection in self.connections], [3, 3, 1])
+
+        engine.deliver([DeliveryJob(["late@example.com"], "body")])
+        self.assertEqual(len(self.connections), 3)
+        self.assertEqual(self.connections[-1].sent[-1], ["late@example.com"])
+
+    def test_retries_only_transient_recipients(self):
+        self.refusals.update({"busy@example.com": [451], "gone@example.com": [550]})
+        engine = self.make_engine(max_messages_per_connection=50)
+
+        result = engine.deliver([DeliveryJob(["ok@example.com", "busy@example.com", "gone@example.com"], "body")])
+
+        self.assertEqual(sorted(result.delivered), ["busy@example.com", "ok@example.com"])
+        self.assertIn("gone@example.com", result.failed)
+        sent = self.connections[0].sent
+        self.assertEqual(sent[1], ["busy@example.com"])
+
+    def test_gives_up_after_retry_budget(self):
+        self.refusals["busy@example.com"] = [421, 421, 421]
+        engine = self.make_engine(concurrency=4)
+
+        result = engine.deliver([DeliveryJob(["busy@example.com"], "body"), DeliveryJob(["ok@example.com"], "body")])
+
+        self.assertEqual(result.delivered, ["ok@example.com"])
+        self.assertTrue(result.failed["busy@example.com"].startswith("421"))
+
+    def test_authentication_failure_stops_reconnecting(self):
+        logins = []
+
+        def factory():
+            logins.append(1)
+            raise smtplib.SMTPAuthenticationError(535, b"bad credentials")
+
+        engine = SMTPDeliveryEngine(
+            "me@example.com", "pw", "smtp.example.com", 465,
+            concurrency=1, max_retries=2, retry_delay=0, connection_factory=factory,
+        )
+        jobs = [DeliveryJob([f"user{index}@example.com"], "body") for index in range(3)]
+
+        result = engine.deliver(jobs)
+        result_again = engine.deliver([DeliveryJob(["late@example.com"], "body")])
+
+        self.assertEqual(len(logins), 1)
+        self.assertEqual(result.delivered, [])
+        self.assertEqual(len(result.failed), 3)
+        self.assertTrue(result.failed["user2@example.com"].startswith("535"))
+        self.assertIn("late@example.com", result_again.failed)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
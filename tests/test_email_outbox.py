@@ -0,0 +1,126 @@
+import email
+import os
+import tempfile
+import unittest
+from email.mime.text import MIMEText
+
+from email_delivery import DeliveryResult
+from email_outbox import EmailOutbox
+from email_template import CompiledTemplate
+
+
+class FakeEngine:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def deliver(self, jobs):
+        self.calls.append(jobs)
+        result = DeliveryResult()
+        for job in jobs:
+            recipient = job.recipients[0]
+            if recipient in self.failing:
+                result.failed[recipient] = "451 try later"
+            else:
+                result.delivered.append(recipient)
+        return result
+
+
+class EmailOutboxTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.outbox = EmailOutbox(os.path.join(self.temp_dir.name, "outbox"))
+
+    def test_failed_recipients_stay_queued_and_sent_ones_are_not_resent(self):
+        self.outbox.enqueue("2026-04-15", "Subject: hi\n\nbody", ["a@example.com", "b@example.com"])
+        engine = FakeEngine(failing={"b@example.com"})
+
+        summary = self.outbox.drain(engine)
+
+        self.assertEqual((summary["sent"], summary["retry"], summary["pending"]), (1, 1, 1))
+        self.assertTrue(engine.calls[0][0].message.startswith("To: a@example.com\nSubject: hi"))
+
+        # 退避期内不重投；force 时只重投失败的收件人
+        self.assertEqual(self.outbox.drain(engine)["sent"], 0)
+        engine.failing.clear()
+        self.assertEqual(self.outbox.drain(engine, force=True)["sent"], 1)
+        self.assertEqual([job.recipients for job in engine.calls[-1]], [["b@example.com"]])
+
+        # 同一天重复入队（例如重跑 daily）不会重复发送
+        self.assertEqual(self.outbox.enqueue("2026-04-15", "Subject: hi\n\nbody", ["a@example.com", "b@example.com"]), 0)
+        self.assertEqual(self.outbox.pending_count("2026-04-15"), 0)
+
+    def test_merges_recipient_fields_into_html_part(self):
+        message = MIMEText("<p>{{recipient.greeting_html}}正文</p>", "html", "utf-8").as_string()
+        self.outbox.enqueue(
+            "2026-04-15",
+            message,
+            ["a@example.com", "b@example.com"],
+            {"a@example.com": {"recipient.greeting_html": "A，你好"}},
+        )
+        engine = FakeEngine()
+
+        self.outbox.drain(engine)
+
+        bodies = {
+            job.recipients[0]: email.message_from_string(job.message).get_payload(decode=True).decode("utf-8")
+            for job in engine.calls[0]
+        }
+        self.assertEqual(bodies["a@example.com"], "<p>A，你好正文</p>")
+        self.assertEqual(bodies["b@example.com"], "<p>正文</p>")
+
+    def test_recipients_without_context_get_generic_fields(self):
+        message = MIMEText("<p>{{recipient.greeting_html}}{{six_dimensions_html}}</p>", "html", "utf-8").as_string()
+        self.outbox.enqueue("2026-04-15", message, ["old@example.com"])
+        self.outbox.enqueue(
+            "2026-04-15",
+            message,
+            ["a@example.com"],
+            {"a@example.com": {"recipient.greeting_html": "A，你好", "six_dimensions_html": "两维"}},
+            default_context={"recipient.greeting_html": "", "six_dimensions_html": "六维"},
+        )
+        engine = FakeEngine()
+
+        self.outbox.drain(engine)
+
+        bodies = {
+            job.recipients[0]: email.message_from_string(job.message).get_payload(decode=True).decode("utf-8")
+            for job in engine.calls[0]
+        }
+        self.assertEqual(bodies, {"old@example.com": "<p>六维</p>", "a@example.com": "<p>A，你好两维</p>"})
+
+    def test_literal_braces_in_report_text_survive_merge(self):
+        template = CompiledTemplate("<p>{{main_conclusion}}</p>{{recipient.greeting_html}}").partial(
+            {"main_conclusion": "Jinja 语法 {{user.name}} 示例"}
+        )
+        self.outbox.enqueue(
+            "2026-04-15",
+            MIMEText(template.escaped_source, "html", "utf-8").as_string(),
+            ["a@example.com"],
+            {"a@example.com": {"recipient.greeting_html": "你好"}},
+        )
+        engine = FakeEngine()
+
+        self.outbox.drain(engine)
+
+        body = email.message_from_string(engine.calls[0][0].message).get_payload(decode=True).decode("utf-8")
+        self.assertEqual(body, "<p>Jinja 语法 {{user.name}} 示例</p>你好")
+
+    def test_gives_up_after_max_attempts(self):
+        self.outbox.enqueue("2026-04-15", "body", ["b@example.com"])
+        engine = FakeEngine(failing={"b@example.com"})
+
+        for _ in range(10):
+            self.outbox.drain(engine, force=True)
+
+        state = self.outbox._read_state("2026-04-15")
+        self.assertEqual(state["b@example.com"]["status"], EmailOutbox.FAILED)
+        self.assertEqual(self.outbox.pending_count("2026-04-15"), 0)
+
+        self.outbox.prune(retention_days=0)
+        self.assertEqual(self.outbox.batches(), [])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
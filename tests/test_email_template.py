@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from email_template import CompiledTemplate, clear_template_cache, get_template
+
+
+class EmailTemplateTestCase(unittest.TestCase):
+    def test_single_pass_render_keeps_unknown_placeholders(self):
+        template = CompiledTemplate("<h1>{{title}}</h1><p>{{ meta.date }}</p>{{missing}}")
+
+        html = template.render({"title": "含 {{meta.date}} 的标题", "meta.date": "2026-04-14"})
+
+        # 单次拼接不会把已替换内容里的占位符再替换一遍
+        self.assertEqual(html, "<h1>含 {{meta.date}} 的标题</h1><p>2026-04-14</p>{{missing}}")
+
+    def test_partial_render_leaves_remaining_placeholders(self):
+        template = CompiledTemplate("<h1>{{title}}</h1>{{recipient.name}}<p>{{body}}</p>")
+
+        partial = template.partial({"title": "含 {{recipient.name}} 的标题", "body": "正文"})
+
+        self.assertEqual(partial.names, ["recipient.name"])
+        self.assertEqual(partial.render({"recipient.name": "A"}), "<h1>含 {{recipient.name}} 的标题</h1>A<p>正文</p>")
+        self.assertEqual(partial.source, "<h1>含 {{recipient.name}} 的标题</h1>{{recipient.name}}<p>正文</p>")
+
+    def test_escaped_source_round_trip_keeps_literal_braces(self):
+        template = CompiledTemplate("<p>{{body}}</p>{{recipient.name}}{{!}}").partial({"body": "Jinja {{user.name}} {{{x}}"})
+
+        restored = CompiledTemplate.from_escaped_source(template.escaped_source)
+
+        self.assertEqual(restored.names, ["recipient.name"])
+        self.assertEqual(restored.render({"recipient.name": "A"}), "<p>Jinja {{user.name}} {{{x}}</p>A{{!}}")
+
+    def test_cache_invalidated_on_mtime_change(self):
+        clear_template_cache()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "template.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("v1 {{name}}")
+            first = get_template(path)
+            self.assertIs(get_template(path), first)
+
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("v2 {{name}}")
+            os.utime(path, (os.path.getatime(path), os.path.getmtime(path) + 5))
+
+            self.assertEqual(get_template(path).render({"name": "x"}), "v2 x")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import tempfile
+import unittest
+from datetime import datetime
+
+from entity_index import EntityExtractor, EntityIndex
+
+
+class EntityIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.index = EntityIndex(index_dir=self.temp_dir.name, shards=4)
+
+    def test_extractor_respects_word_boundaries_and_versions(self):
+        terms = EntityExtractor().extract({"title": "OpenAI 发布 GPT 5", "content": "He said Cursor now ships agent mode."})
+
+        self.assertIn("openai", terms)
+        self.assertIn("gpt-5", terms)
+        self.assertIn("cursor", terms)
+        self.assertNotIn("ai", terms)
+
+    def test_model_versions_match_regardless_of_case(self):
+        extractor = EntityExtractor()
+
+        for title in ("gpt-5 上线", "GPT-5 上线", "Gpt 5 上线"):
+            self.assertIn("gpt-5", extractor.extract({"title": title}))
+        self.assertIn("llama-3.1", extractor.extract({"title": "llama 3.1 开源"}))
+        self.assertIn("qwen3-max", extractor.extract({"title": "QWEN3 MAX 发布"}))
+
+    def test_query_and_idempotent_daily_update(self):
+        self.index.update({"date": "2026-04-13", "news": [{"id": "n1", "title": "Cursor 融资"}]})
+        self.index.update({"date": "2026-04-14", "news": [{"id": "n2", "title": "Codex 与 Cursor 对比"}]})
+        self.index.update({"date": "2026-04-14", "news": [{"id": "n3", "title": "Codex 更新"}]})
+
+        self.assertEqual(self.index.query("Cursor"), [{"date": "2026-04-13", "news_id": "n1"}])
+        self.assertEqual(self.index.query("codex", start_date="2026-04-14"), [{"date": "2026-04-14", "news_id": "n3"}])
+        self.assertEqual(self.index.indexed_dates(), ["2026-04-13", "2026-04-14"])
+
+    def test_prune_drops_postings_past_retention(self):
+        today = datetime.now().strftime("%Y-%m-%d")
+        self.index.update({"date": "2020-01-01", "news": [{"id": "old", "title": "Cursor 融资"}, {"id": "o2", "title": "Sora 上线"}]})
+        self.index.update({"date": today, "news": [{"id": "new", "title": "Cursor 更新"}]})
+
+        self.assertEqual(self.index.prune(retention_days=30), 1)
+
+        self.assertEqual(self.index.query("cursor"), [{"date": today, "news_id": "new"}])
+        self.assertEqual(self.index.query("sora"), [])
+        self.assertEqual(self.index.indexed_dates(), [today])
+        self.assertEqual(self.index.prune(retention_days=30), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
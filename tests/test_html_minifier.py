@@ -0,0 +1,52 @@
+import unittest
+
+from html_minifier import apply_style_classes, build_style_rules, collect_style_classes, inject_style_block, minify_html
+
+
+class HtmlMinifierTestCase(unittest.TestCase):
+    def test_collapses_whitespace_and_keeps_preformatted_blocks(self):
+        html = """
+        <html><head>
+            <style>
+                /* reset */
+                a { color: #3D7092; }
+            </style>
+        </head><body>
+            <!-- 注释 -->
+            <table>
+                <tr>
+                    <td style="color: #FFF;  margin: 0;">
+                        <p>第一行
+                           第二行 <a href="#">链接</a> 结尾</p>
+                    </td>
+                </tr>
+            </table>
+            <pre>  保留
+  缩进</pre>
+        </body></html>
+        """
+
+        minified = minify_html(html)
+
+        self.assertIn("<style>a{color:#3D7092}</style>", minified)
+        self.assertIn('<tr><td style="color:#FFF;margin:0"><p>第一行 第二行 <a href="#">链接</a> 结尾</p></td></tr>', minified)
+        self.assertIn("<pre>  保留\n  缩进</pre>", minified)
+        self.assertNotIn("注释", minified)
+
+    def test_repeated_styles_become_important_class_rules(self):
+        style = "color:#B0B0B0;font-size:14px;font-weight:400;margin:0"
+        chunk = "".join(f'<p style="{style}">{index}</p>' for index in range(3))
+        chunk += f'<td class="cell" style="{style}"></td><p style="color:{{{{x}}}}">a</p>'
+
+        classes = collect_style_classes([chunk])
+        html = inject_style_block("<head></head>" + apply_style_classes(chunk, classes), build_style_rules(classes))
+
+        self.assertEqual(classes, {style: "s0"})
+        self.assertIn('<p class="s0">0</p>', html)
+        self.assertIn('<td class="cell s0"></td>', html)
+        self.assertIn('<p style="color:{{x}}">a</p>', html)
+        self.assertIn(".s0{color:#B0B0B0 !important;font-size:14px !important;", html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from json_stream import JSONStreamParser, MalformedJSONError
+
+
+class JSONStreamParserTestCase(unittest.TestCase):
+    def test_emits_items_as_each_element_closes(self):
+        received = []
+        parser = JSONStreamParser(item_key="items", on_item=received.append)
+        text = '```json\n{"items": [{"index": 0, "reason": "含 } 的 \\"理由\\""}, {"index": 1, "tags": ["a"]}]}\n```'
+
+        parser.feed(text[:45])
+        self.assertEqual(len(received), 0)
+        parser.feed(text[45:70])
+        self.assertEqual(received, [{"index": 0, "reason": '含 } 的 "理由"'}])
+        parser.feed(text[70:])
+
+        self.assertEqual([item["index"] for item in received], [0, 1])
+        self.assertEqual(parser.finish()["items"][1]["tags"], ["a"])
+
+    def test_top_level_array_and_truncated_output(self):
+        parser = JSONStreamParser()
+        parser.feed('[{"title": "a"}, {"title": "b"')
+
+        self.assertEqual(parser.items, [{"title": "a"}])
+        self.assertIsNone(parser.finish())
+
+    def test_detects_malformed_output_early(self):
+        with self.assertRaises(MalformedJSONError):
+            JSONStreamParser().feed("抱歉，" * 100)
+        with self.assertRaises(MalformedJSONError):
+            JSONStreamParser(item_key="items").feed('{"items": [{"index": 0]')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+from json_stream import JSONStreamParser
+from llm_client import LLMClient
+
+
+class Response:
+    def __init__(self, status_code, content="", headers=None):
+        self.status_code = status_code
+        self._content = content
+        self.text = content
+        self.headers = headers or {}
+
+    def json(self):
+        return {"choices": [{"message": {"content": self._content}}]}
+
+
+class LLMClientTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = LLMClient(api_key="test", retries=3, retry_delay=1)
+
+    def test_reuses_pooled_client_across_calls(self):
+        with patch("llm_client.httpx.Client") as mocked_client:
+            mocked_client.return_value.post.return_value = Response(200, "ok")
+            self.assertEqual(self.client.complete("system", "a"), "ok")
+            self.assertEqual(self.client.complete("system", "b"), "ok")
+
+        self.assertEqual(mocked_client.call_count, 1)
+        self.assertEqual(mocked_client.return_value.post.call_count, 2)
+
+    def test_honors_retry_after_header(self):
+        with patch("llm_client.httpx.Client") as mocked_client:
+            mocked_client.return_value.post.side_effect = [
+                Response(429, "rate limited", headers={"Retry-After": "7"}),
+                Response(200, '{"ok": true}'),
+            ]
+            with patch("llm_client.time.sleep") as mocked_sleep:
+                result = self.client.complete("system", "prompt")
+
+        self.assertEqual(result, '{"ok": true}')
+        mocked_sleep.assert_called_once_with(7.0)
+
+    def test_does_not_retry_client_errors(self):
+        with patch("llm_client.httpx.Client") as mocked_client:
+            mocked_client.return_value.post.return_value = Response(401, "unauthorized")
+            with patch("llm_client.time.sleep") as mocked_sleep:
+                result = self.client.complete("system", "prompt")
+
+        self.assertIsNone(result)
+        self.assertEqual(mocked_client.return_value.post.call_count, 1)
+        mocked_sleep.assert_not_called()
+
+    def test_stream_retries_early_on_malformed_output(self):
+        class StreamResponse:
+            status_code = 200
+
+            def __init__(self, deltas):
+                self.lines = [
+                    "data: " + json.dumps({"choices": [{"delta": {"content": delta}}]}) for delta in deltas
+                ] + ["data: [DONE]"]
+
+            def iter_lines(self):
+                return iter(self.lines)
+
+        received = []
+        with patch("llm_client.httpx.Client") as mocked_client:
+            mocked_stream = mocked_client.return_value.stream
+            mocked_stream.return_value.__enter__.side_effect = [
+                StreamResponse(['{"items": [{"index": 0]', "never read"]),
+                StreamResponse(['{"items": [{"index": 0}', ', {"index": 1}]}']),
+            ]
+            with patch("llm_client.time.sleep"):
+                result = self.client.complete_stream(
+                    "system",
+                    "prompt",
+                    parser_factory=lambda: JSONStreamParser(item_key="items", on_item=received.append),
+                )
+
+        self.assertEqual(mocked_stream.call_count, 2)
+        self.assertEqual(received, [{"index": 0}, {"index": 1}])
+        self.assertEqual(len(result["items"]), 2)
+
+    def test_async_client_closed_when_event_loop_ends(self):
+        clients = []
+
+        class FakeAsyncClient:
+            def __init__(self, **options):
+                self.is_closed = False
+                clients.append(self)
+
+            async def post(self, *args, **kwargs):
+                await asyncio.sleep(0)
+                return Response(200, "ok")
+
+            async def aclose(self):
+                self.is_closed = True
+
+        with patch("llm_client.httpx.AsyncClient", FakeAsyncClient):
+            self.assertEqual(asyncio.run(self.client.acomplete("system", "a")), "ok")
+            self.assertEqual(asyncio.run(self.client.acomplete("system", "b")), "ok")
+
+        self.assertEqual(len(clients), 2)
+        self.assertTrue(all(client.is_closed for client in clients))
+        self.assertIsNone(self.client._async_client)
+
+
+if __name__ == "__main__":
+    unittest.main()
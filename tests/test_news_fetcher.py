@@ -0,0 +1,27 @@
+import hashlib
+import unittest
+
+from news_fetcher import NewsFetcher
+
+
+class NewsFetcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.fetcher = NewsFetcher()
+
+    def test_id_keeps_raw_url_format(self):
+        url = "https://Example.com/news/42/?utm_source=rss"
+
+        self.assertEqual(self.fetcher._generate_id(url), f"news_{hashlib.md5(url.encode()).hexdigest()}")
+
+    def test_deduplicates_by_canonical_url(self):
+        urls = ["https://example.com/news/42?utm_source=rss", "https://m.example.com/news/42/", "https://example.com/news/43"]
+        news = [{"id": self.fetcher._generate_id(url), "url": url} for url in urls]
+        news.append({"id": "news_no_url", "url": ""})
+
+        unique = self.fetcher._deduplicate_news(news + [dict(news[-1])])
+
+        self.assertEqual([item["url"] for item in unique], [urls[0], urls[2], ""])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,30 @@
+import os
+import random
+import tempfile
 import unittest
 from unittest.mock import patch
 
+from llm_client import LLMClient
+import news_processor
 from news_processor import NewsProcessor
+from score_cache import ScoreCache
+from score_model import load_training_samples
 
 
 class NewsProcessorTestCase(unittest.TestCase):
     def setUp(self):
         self.processor = NewsProcessor()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        # 评分样本日志写入临时目录、不写全文索引，不改动工作区的 data/cache 与 data/index；
+        # 测试用 AI_API_KEY 使评分路径不依赖运行环境
+        settings_values = (("CACHE_DIR", self.cache_dir.name), ("SEARCH_INDEX_ENABLED", False), ("AI_API_KEY", "test"))
+        for name, value in settings_values:
+            settings_patch = patch.object(news_processor.settings, name, value)
+            settings_patch.start()
+            self.addCleanup(settings_patch.stop)
+        self.processor.score_cache = ScoreCache(cache_path=os.path.join(self.cache_dir.name, "ai_scores.json"))
+        self.processor.score_model = None
         self.raw_news = [
             {
                 "id": "n1",
@@ -44,6 +62,25 @@ class NewsProcessorTestCase(unittest.TestCase):
         self.assertEqual(item["score_reason"], "High value signal")
         self.assertGreaterEqual(item["final_score"], 5.5)
 
+    def test_low_scored_items_are_kept_as_training_samples(self):
+        low_scores = {
+            0: {
+                "importance": 2,
+                "relevance_to_me": 1,
+                "signal_strength": 2,
+                "actionability": 1,
+                "theme_tags": ["general_ai"],
+                "reason": "Low value",
+            }
+        }
+        with patch.object(self.processor, "_score_news_with_ai", return_value=low_scores):
+            payload = self.processor.process_news(self.raw_news, date_str="2026-04-14")
+
+        self.assertEqual(payload["news"], [])
+        samples = load_training_samples(self.processor.storage)
+        self.assertEqual([sample["ai_scores"]["importance"] for sample in samples], [2])
+        self.assertEqual(samples[0]["title"], "Agent workflow is reshaping product UX")
+
     def test_ai_scoring_retries_until_success(self):
         class Response:
             def __init__(self, status_code, content):
@@ -59,16 +96,96 @@ class NewsProcessorTestCase(unittest.TestCase):
             '{"items":[{"index":0,"importance":8,"relevance_to_me":8,"signal_strength":7,"actionability":7,"theme_tags":["workflow"],"reason":"retry ok"}]}',
         )
 
-        with patch("news_processor.httpx.Client") as mocked_client:
-            mocked_post = mocked_client.return_value.__enter__.return_value.post
+        self.processor.llm_client = LLMClient()
+        with patch("llm_client.httpx.Client") as mocked_client:
+            mocked_post = mocked_client.return_value.post
             mocked_post.side_effect = [Exception("fail 1"), Exception("fail 2"), response_success]
-            with patch("news_processor.time.sleep"):
+            with patch("llm_client.time.sleep"):
                 score_map = self.processor._score_news_with_ai(self.raw_news)
 
         self.assertEqual(mocked_post.call_count, 3)
+        self.assertEqual(mocked_client.call_count, 1)
         self.assertIn(0, score_map)
         self.assertEqual(score_map[0]["reason"], "retry ok")
 
+    def test_ai_scoring_reuses_cached_scores(self):
+        ai_json = {
+            "items": [
+                {
+                    "index": 0,
+                    "importance": 8,
+                    "relevance_to_me": 8,
+                    "signal_strength": 7,
+                    "actionability": 7,
+                    "theme_tags": ["workflow"],
+                    "reason": "cached",
+                }
+            ]
+        }
+
+        with patch.object(self.processor, "_call_ai_json", return_value=ai_json) as mocked_call:
+            first = self.processor._score_news_with_ai(self.raw_news)
+            rerun = NewsProcessor()
+            rerun.score_cache = ScoreCache(cache_path=self.processor.score_cache.cache_path)
+            with patch.object(rerun, "_call_ai_json", return_value=None) as rerun_call:
+                second = rerun._score_news_with_ai(self.raw_news)
+
+        self.assertEqual(mocked_call.call_count, 1)
+        rerun_call.assert_not_called()
+        self.assertEqual(first[0]["reason"], "cached")
+        self.assertEqual(second[0]["reason"], "cached")
+
+    def test_near_duplicates_merge_into_one_representative(self):
+        content = "OpenAI 今日正式发布 GPT-5 模型，在数学推理、代码生成和多模态理解方面均有大幅提升，API 同步开放。"
+        raw_news = [
+            {"id": "a", "title": "OpenAI 发布 GPT-5，推理能力大幅提升", "url": "https://ifanr.com/1", "content": content, "source": "ifanr"},
+            {"id": "b", "title": "OpenAI 正式发布 GPT-5：推理能力大幅提升", "url": "https://tmtpost.com/2", "content": content + "开发者可立即申请。", "source": "tmtpost"},
+            {"id": "c", "title": "全球经济增长预期上调", "url": "https://example.com/3", "content": "IMF 上调了全球经济增长预期。", "source": "经济时报"},
+        ]
+
+        merged = self.processor._merge_near_duplicates(raw_news)
+
+        self.assertEqual([item["id"] for item in merged], ["b", "c"])
+        self.assertEqual([sibling["source"] for sibling in merged[0]["sibling_sources"]], ["ifanr"])
+        self.assertNotIn("sibling_sources", merged[1])
+
+    def test_keyword_scan_matches_substring_semantics(self):
+        item = {"title": "新的推理模型发布", "content": "面向 builders 的 guide", "source": "AI 工作流日报"}
+
+        text_hits, source_hits = self.processor._scan_keywords(item)
+
+        self.assertIn("ai_model", text_hits)
+        self.assertIn("design", text_hits)  # "ui" 出现在 builders/guide 中
+        self.assertIn(self.processor.HIGH_SIGNAL_GROUP, text_hits)
+        self.assertIn("ai_product", source_hits)
+        self.assertEqual(self.processor._infer_theme_tags(item), ["ai_model", "ai_product", "design"])
+
+    def test_batch_ranking_matches_scalar_ranking(self):
+        if news_processor.np is None:
+            self.skipTest("numpy 未安装")
+        rng = random.Random(33)
+
+        def make_items():
+            rng.seed(33)
+            return [
+                {
+                    "id": f"n{index}",
+                    "ai_scores": {dimension: rng.randint(1, 10) for dimension in NewsProcessor.SCORE_DIMENSIONS},
+                }
+                for index in range(300)
+            ]
+
+        with patch.object(news_processor.settings, "AI_BATCH_SCORING_MIN_ITEMS", 10**9):
+            scalar = self.processor._rank_filter_items(make_items())
+        with patch.object(news_processor.settings, "AI_BATCH_SCORING_MIN_ITEMS", 1):
+            batch = self.processor._rank_filter_items(make_items())
+
+        self.assertEqual(
+            [(item["id"], item["final_score"], item["signal_level"]) for item in scalar],
+            [(item["id"], item["final_score"], item["signal_level"]) for item in batch],
+        )
+        self.assertIsInstance(batch[0]["final_score"], float)
+
 
 if __name__ == "__main__":
     unittest.main()
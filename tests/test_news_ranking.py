@@ -0,0 +1,26 @@
+import random
+import unittest
+
+from news_ranking import SORTED_BY_FINAL_SCORE, SORTED_BY_KEY, ranked_news, top_by_score
+
+
+class NewsRankingTestCase(unittest.TestCase):
+    def test_top_by_score_matches_stable_sort(self):
+        rng = random.Random(37)
+        news_items = [{"id": index, "final_score": rng.choice([5.5, 6.0, 7.25, 8.1])} for index in range(200)]
+
+        expected = sorted(news_items, key=lambda item: item["final_score"], reverse=True)[:20]
+
+        self.assertEqual(top_by_score(news_items, 20), expected)
+        self.assertEqual(top_by_score(expected + news_items, 5, presorted=True), expected[:5])
+
+    def test_ranked_news_skips_sort_when_flagged(self):
+        news_items = [{"id": "a", "final_score": 6}, {"id": "b", "final_score": 9}]
+
+        self.assertEqual([item["id"] for item in ranked_news({"news": news_items})], ["b", "a"])
+        flagged = ranked_news({"news": news_items, SORTED_BY_KEY: SORTED_BY_FINAL_SCORE})
+        self.assertIs(flagged, news_items)
+
+
+if __name__ == "__main__":
+    unittest.main()
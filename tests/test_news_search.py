@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from config import settings
+from news_search import NewsSearchIndex
+from workflow_runner import WorkflowRunner
+
+
+class NewsSearchIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.index = NewsSearchIndex(os.path.join(self.temp_dir.name, "news_search.db"))
+        self.addCleanup(self.index.close)
+
+    def test_cjk_phrase_search_ranks_by_score_and_filters_dates(self):
+        self.index.index_news(
+            [
+                {"id": "a", "title": "新推理模型发布", "content": "推理模型能力提升", "source": "36kr"},
+                {"id": "b", "title": "Cursor 接入推理模型", "content": "编程助手", "source": "ifanr"},
+            ],
+            "2026-04-13",
+            kind="raw",
+        )
+        self.index.index_news(
+            [{"id": "b", "title": "Cursor 接入推理模型", "content": "编程助手", "source": "ifanr", "final_score": 9.0}],
+            "2026-04-14",
+            kind="filter",
+        )
+
+        results = self.index.search("推理模型")
+        self.assertEqual([result["news_id"] for result in results], ["b", "a"])
+        self.assertEqual(results[0]["kind"], "filter")
+        self.assertEqual(self.index.search("cursor 模型")[0]["news_id"], "b")
+        self.assertEqual(self.index.search("推理模型", end_date="2026-04-13")[0]["kind"], "raw")
+        self.assertEqual(self.index.search("理模推"), [])
+
+    def test_single_cjk_character_matches_any_position(self):
+        self.index.index_news([{"id": "a", "title": "新推理模型发布", "content": "Agent 工作流"}], "2026-04-14", kind="raw")
+
+        for query in ("推", "布", "流", "理"):
+            self.assertEqual([result["news_id"] for result in self.index.search(query)], ["a"], query)
+        self.assertEqual(self.index.search("猫"), [])
+        self.assertEqual(self.index.search("模型 发布")[0]["news_id"], "a")
+
+    def test_reindex_replaces_and_prunes(self):
+        self.index.index_news([{"id": "a", "title": "旧标题"}], "2026-01-01", kind="raw")
+        self.index.index_news([{"id": "a", "title": "新标题"}], "2026-01-02", kind="raw")
+
+        self.assertEqual(self.index.search("旧标题"), [])
+        self.assertEqual(len(self.index.search("新标题")), 1)
+        self.assertEqual(self.index.delete_before("2026-02-01"), 1)
+        self.assertEqual(self.index.search("新标题"), [])
+
+
+class ReindexBackfillTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        for name in ("RAW_NEWS_DIR", "FILTER_NEWS_DIR", "INDEX_DIR"):
+            directory = os.path.join(self.temp_dir.name, name.lower())
+            os.makedirs(directory)
+            settings_patch = patch.object(settings, name, directory)
+            settings_patch.start()
+            self.addCleanup(settings_patch.stop)
+
+    def write_archive(self, directory, date_str, news):
+        with open(os.path.join(directory, f"{date_str}.json"), "w", encoding="utf-8") as file:
+            json.dump({"date": date_str, "news": news}, file, ensure_ascii=False)
+
+    def test_reindex_backfills_existing_archive(self):
+        self.write_archive(settings.RAW_NEWS_DIR, "2026-03-01", [{"id": "r1", "title": "脑机接口临床试验"}])
+        self.write_archive(
+            settings.FILTER_NEWS_DIR,
+            "2026-03-02",
+            [{"id": "f1", "title": "推理模型降价", "theme_tags": ["business"], "final_score": 8.0}],
+        )
+        index = NewsSearchIndex()
+        self.addCleanup(index.close)
+        index.index_news([{"id": "gone", "title": "推理模型旧条目"}], "2026-02-01", kind="raw")
+        index.close()
+
+        WorkflowRunner().reindex()
+
+        self.assertEqual([result["news_id"] for result in index.search("推理模型")], ["f1"])
+        self.assertEqual(index.search("推理模型")[0]["kind"], "filter")
+        self.assertEqual([result["news_id"] for result in index.search("脑机接口")], ["r1"])
+        self.assertTrue(os.path.exists(os.path.join(settings.INDEX_DIR, "trend_index.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from preview_server import ReportPreview
+
+
+class ReportPreviewTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.report_path = os.path.join(self.temp_dir.name, "2026-04-15.json")
+        self.write_report("预览结论")
+        self.preview = ReportPreview(report_dir=self.temp_dir.name, design_dir=self.temp_dir.name)
+
+    def write_report(self, conclusion):
+        report = {
+            "meta": {"date": "2026-04-15", "filtered_count": 3},
+            "signal_interpretation": {"main_conclusion": conclusion},
+            "deep_analysis": [],
+            "referenced_news": {},
+        }
+        with open(self.report_path, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False)
+
+    def test_renders_report_with_section_timings(self):
+        status, content_type, body, headers = self.preview.handle("/2026-04-15.html")
+
+        self.assertEqual(status, 200)
+        self.assertIn("预览结论", body.decode("utf-8"))
+        self.assertIn("/__version", body.decode("utf-8"))
+        for name in ("render_top_events", "render_six_dimensions", "render_trend_watch", "render_actions"):
+            self.assertIn(f"{name};dur=", headers["Server-Timing"])
+
+        status, _, body, _ = self.preview.handle("/timing/2026-04-15.json")
+        self.assertIn("render_email", json.loads(body))
+        self.assertEqual(self.preview.handle("/2026-04-16.html")[0], 404)
+
+    def test_cache_keyed_by_report_content(self):
+        with patch("preview_server.renderer.render_email", return_value="<body></body>") as render:
+            self.preview.handle("/2026-04-15.html")
+            self.preview.handle("/2026-04-15.html?minify=0")
+            self.assertEqual(render.call_count, 1)
+
+            version = self.preview.version()
+            self.write_report("修改后的结论")
+            os.utime(self.report_path, (0, os.path.getmtime(self.report_path) + 5))
+            self.preview.handle("/2026-04-15.html")
+
+        self.assertEqual(render.call_count, 2)
+        self.assertNotEqual(self.preview.version(), version)
+
+
+if __name__ == "__main__":
+    unittest.main()
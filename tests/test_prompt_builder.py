@@ -0,0 +1,32 @@
+import unittest
+
+from prompt_builder import PromptBuilder
+
+
+class PromptBuilderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = PromptBuilder(token_budget=600, max_items=30)
+        self.news_items = [
+            {"id": f"news_{index}", "title": f"标题 {index}", "content": "长正文" * 200, "final_score": index}
+            for index in range(10)
+        ]
+        self.news_items.append({"id": "news_short", "title": "短", "content": "短正文", "final_score": 9.5})
+
+    def test_packs_highest_scores_within_budget(self):
+        context = self.builder.build_news_context(self.news_items)
+        packed = self.builder.pack_news(self.news_items)
+
+        self.assertLessEqual(self.builder.estimate_tokens(context), 600)
+        self.assertEqual(packed[0]["news_id"], "news_short")
+        self.assertEqual(packed[1]["news_id"], "news_9")
+        self.assertNotIn("\n", context)
+
+    def test_short_content_is_kept_whole(self):
+        packed = {item["news_id"]: item for item in self.builder.pack_news(self.news_items)}
+
+        self.assertEqual(packed["news_short"]["content"], "短正文")
+        self.assertTrue(packed["news_9"]["content"].endswith("…"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,10 @@
 V3 邮件渲染模块的单元测试 - 测试 V3.5 schema 兼容性
 """
 import unittest
+from unittest.mock import patch
+
 from push_manager import PushManager
+from v3_email_renderer import get_header_bg_bytes, prepare_email, render_email
 
 
 class TestV3EmailRender(unittest.TestCase):
@@ -172,5 +175,119 @@ class TestV3EmailRender(unittest.TestCase):
         self.assertIn("旧格式摘要", html)
 
 
+class TestV3HeaderImageDelivery(unittest.TestCase):
+    """测试 Header 背景图的 CID 内嵌投递"""
+
+    def setUp(self):
+        self.push_manager = PushManager()
+        self.report = {"meta": {"date": "2026-04-15", "filtered_count": 1}, "signal_interpretation": {}}
+
+    def test_cid_mode_references_attachment_instead_of_data_uri(self):
+        html = render_email(self.report, header_image_mode="cid")
+
+        self.assertIn('src="cid:header_bg"', html)
+        self.assertNotIn("data:image/png;base64", html)
+
+    def test_related_message_carries_header_image_once(self):
+        image_bytes = get_header_bg_bytes()
+        msg = self.push_manager._build_message("subject", "<img src='cid:header_bg'>", {"header_bg": image_bytes})
+
+        self.assertEqual(msg.get_content_type(), "multipart/related")
+        parts = msg.get_payload()
+        self.assertEqual(parts[0].get_content_type(), "multipart/alternative")
+        self.assertEqual(parts[1]["Content-ID"], "<header_bg>")
+        self.assertEqual(parts[1].get_payload(decode=True), image_bytes)
+        self.assertIs(get_header_bg_bytes(), image_bytes)
+
+
+class TestV3NewsMapLoading(unittest.TestCase):
+    """测试引用文章只按 ID 加载"""
+
+    def setUp(self):
+        self.push_manager = PushManager()
+        self.report = {
+            "meta": {"date": "2026-04-15", "filtered_count": 1},
+            "signal_interpretation": {},
+            "deep_analysis": [{"title": "趋势", "news_ids": ["n1"]}],
+        }
+
+    def test_referenced_news_avoids_reading_filter_news(self):
+        report = dict(self.report, referenced_news={"n1": {"title": "引用标题", "url": "https://example.com/n1"}})
+        with patch.object(self.push_manager.storage, "get_news_by_ids", side_effect=AssertionError("不应读盘")):
+            html = self.push_manager._generate_v3_daily_html_content(report)
+
+        self.assertIn("引用标题", html)
+
+    def test_legacy_report_looks_up_only_cited_ids(self):
+        with patch.object(
+            self.push_manager.storage, "get_news_by_ids", return_value={"n1": {"title": "回查标题", "url": "#"}}
+        ) as lookup:
+            html = self.push_manager._generate_v3_daily_html_content(self.report)
+
+        lookup.assert_called_once_with(["n1"], "2026-04-15")
+        self.assertIn("回查标题", html)
+
+
+class TestV3Personalization(unittest.TestCase):
+    """测试渲染一次、按收件人拼接"""
+
+    def setUp(self):
+        self.report = {
+            "meta": {"date": "2026-04-15", "filtered_count": 1},
+            "signal_interpretation": {
+                "main_conclusion": "结论",
+                "six_dimension_briefs": {"model_and_capability": "模型简报", "policy_and_ethics": "政策简报"},
+            },
+        }
+
+    def test_prepared_render_matches_full_render(self):
+        prepared = prepare_email(self.report, header_image_mode="none")
+        recipient = {"email": "a@example.com", "name": "<Alice>", "sections": ["Models", "business"]}
+
+        html = prepared.render(recipient)
+
+        self.assertEqual(html, render_email(self.report, header_image_mode="none", recipient=recipient))
+        self.assertIn("&lt;Alice&gt;，你好", html)
+        self.assertIn("模型简报", html)
+        self.assertNotIn("政策简报", html)
+        self.assertEqual(prepared.render(), render_email(self.report, header_image_mode="none"))
+        self.assertIn("政策简报", prepared.render())
+        self.assertNotIn("{{", prepared.render())
+
+    def test_plain_text_alternative_follows_recipient_sections(self):
+        prepared = prepare_email(self.report, header_image_mode="none", minify=True)
+
+        text = prepared.render_text({"email": "a@example.com", "name": "Alice", "sections": ["policy"]})
+
+        self.assertTrue(text.startswith("Alice，你好\n\nTrend Radar · 2026-04-15"))
+        self.assertIn("Policy：政策简报", text)
+        self.assertNotIn("模型简报", text)
+        html_before, html_after = prepared.html_size
+        self.assertLess(html_after, html_before)
+
+        msg = PushManager()._build_message("subject", prepared.template.source, None, prepared.text_template.source)
+        self.assertEqual([part.get_content_type() for part in msg.get_payload()], ["text/plain", "text/html"])
+
+
+class TestEmailConfigCheck(unittest.TestCase):
+    """测试订阅者列表与 EMAIL_RECEIVER 的必填关系"""
+
+    def setUp(self):
+        self.push_manager = PushManager()
+        self.push_manager.email_sender = "me@example.com"
+        self.push_manager.email_password = "pw"
+        self.push_manager.email_receiver = ""
+
+    def test_receiver_optional_when_recipient_list_configured(self):
+        with patch("push_manager.settings.EMAIL_RECIPIENTS", "a@example.com, b@example.com"):
+            self.push_manager._check_email_config()
+            with self.assertRaises(Exception):
+                self.push_manager._check_email_config(require_receiver=True)
+
+        with patch("push_manager.settings.EMAIL_RECIPIENTS", ""), patch("push_manager.settings.EMAIL_RECIPIENTS_FILE", ""):
+            with self.assertRaises(Exception):
+                self.push_manager._check_email_config()
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
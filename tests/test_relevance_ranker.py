@@ -0,0 +1,39 @@
+import unittest
+
+from relevance_ranker import RelevanceRanker
+
+
+class RelevanceRankerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.ranker = RelevanceRanker(min_profile_items=1)
+        self.ranker._profile = self.ranker.build_profile(
+            [
+                {"title": "AI Agent 工作流产品发布", "content": "新的 agent 助手让编程和自动化更高效。"},
+                {"title": "推理模型 API 降价", "content": "大模型推理成本下降，开发者可以构建更多 AI 应用。"},
+            ]
+        )
+        self.candidates = [
+            {"title": "全球经济增长预期上调", "content": "IMF 上调了全球经济增长预期。", "source": "经济时报"},
+            {"title": "开源 Agent 框架发布", "content": "面向开发者的 agent 工作流框架，支持自动化编程。", "source": "ifanr"},
+            {"title": "体育赛事回顾", "content": "昨晚的比赛精彩纷呈。", "source": "体育"},
+            {"title": "新推理模型上线", "content": "推理模型 API 开放，成本大幅下降。", "source": "36kr"},
+        ]
+
+    def test_profile_related_items_rank_higher(self):
+        scores = self.ranker.score(self.candidates)
+
+        self.assertGreater(scores[1], scores[0])
+        self.assertGreater(scores[3], scores[2])
+
+    def test_select_top_k_keeps_original_order(self):
+        self.assertEqual(self.ranker.select_top_k(self.candidates, 2), [1, 3])
+        self.assertEqual(self.ranker.select_top_k(self.candidates, 10), [0, 1, 2, 3])
+
+    def test_empty_profile_falls_back_to_prefix(self):
+        self.ranker._profile = {}
+
+        self.assertEqual(self.ranker.select_top_k(self.candidates, 2), [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+from score_model import ScoreModel, train_score_model
+
+
+class ScoreModelTestCase(unittest.TestCase):
+    def setUp(self):
+        self.samples = []
+        for index in range(60):
+            relevant = index % 2 == 0
+            self.samples.append(
+                {
+                    "title": f"Agent 工作流产品更新 {index}" if relevant else f"体育赛事回顾 {index}",
+                    "content": "agent workflow automation 编程助手" if relevant else "比赛 比分 球队 赛季",
+                    "source": "ifanr" if relevant else "体育日报",
+                    "theme_tags": ["workflow"] if relevant else ["general_ai"],
+                    "ai_scores": {
+                        "importance": 7 if relevant else 4,
+                        "relevance_to_me": 9 if relevant else 2,
+                        "signal_strength": 7 if relevant else 3,
+                        "actionability": 8 if relevant else 2,
+                    },
+                    "score_reason": "x",
+                }
+            )
+
+    def test_model_beats_mean_baseline_and_round_trips(self):
+        model, metrics = train_score_model(self.samples, hash_bits=12, epochs=6)
+
+        self.assertLess(metrics["mae"], metrics["baseline_mae"])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            model_path = os.path.join(temp_dir, "score_model.json")
+            model.save(model_path, metadata=metrics)
+            loaded = ScoreModel.load(model_path)
+
+        item = {"title": "新的 Agent 工作流工具", "content": "agent workflow automation", "source": "ifanr"}
+        prediction = loaded.predict(item, ["workflow"])
+        self.assertGreaterEqual(prediction["relevance_to_me"], 7)
+        self.assertLessEqual(loaded.predict({"title": "赛季回顾", "content": "比赛 球队", "source": "体育日报"}, [])["relevance_to_me"], 4)
+
+    def test_empty_samples_rejected(self):
+        with self.assertRaises(ValueError):
+            train_score_model([])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from config import settings
+from site_builder import SiteBuilder
+
+
+def make_report(date_str, conclusion, tags):
+    return {
+        "meta": {"date": date_str, "filtered_count": 12},
+        "signal_interpretation": {"main_conclusion": conclusion, "why_it_matters": "", "top_events": []},
+        "deep_analysis": [{"title": "趋势", "news_ids": ["n1"]}],
+        "action_suggestions": {},
+        "referenced_news": {"n1": {"title": "引用", "url": "https://example.com/n1", "theme_tags": tags}},
+    }
+
+
+class SiteBuilderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.report_dir = os.path.join(self.temp_dir.name, "daily")
+        self.site_dir = os.path.join(self.temp_dir.name, "site")
+        os.makedirs(self.report_dir)
+        self.builder = SiteBuilder(site_dir=self.site_dir, report_dir=self.report_dir)
+
+    def write_report(self, date_str, conclusion, tags):
+        with open(os.path.join(self.report_dir, f"{date_str}.json"), "w", encoding="utf-8") as file:
+            json.dump(make_report(date_str, conclusion, tags), file, ensure_ascii=False)
+
+    def read_site(self, *parts):
+        with open(os.path.join(self.site_dir, *parts), encoding="utf-8") as file:
+            return file.read()
+
+    def test_builds_pages_and_indexes_then_only_rerenders_changed_reports(self):
+        self.write_report("2026-04-14", "第一天结论", ["workflow"])
+        self.write_report("2026-04-15", "第二天结论", ["workflow", "policy"])
+
+        self.assertEqual(self.builder.build(workers=1)["rendered"], 2)
+        self.assertIn("第二天结论", self.read_site("2026-04-15.html"))
+        index = self.read_site("index.html")
+        self.assertLess(index.index("2026-04-15"), index.index("2026-04-14"))
+        self.assertIn("../2026-04-14.html", self.read_site("tags", "workflow.html"))
+        self.assertNotIn("2026-04-14", self.read_site("tags", "policy.html"))
+
+        self.write_report("2026-04-15", "第二天结论（修订）", ["workflow"])
+        stats = self.builder.build(workers=1)
+
+        self.assertEqual((stats["rendered"], stats["unchanged"]), (1, 1))
+        self.assertIn("修订", self.read_site("2026-04-15.html"))
+        self.assertFalse(os.path.exists(os.path.join(self.site_dir, "tags", "policy.html")))
+
+        os.remove(os.path.join(self.report_dir, "2026-04-14.json"))
+        self.assertEqual(self.builder.build(workers=1)["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.site_dir, "2026-04-14.html")))
+
+    def test_force_rebuild_still_removes_stale_pages_and_tags(self):
+        self.write_report("2026-04-14", "第一天结论", ["policy"])
+        self.write_report("2026-04-15", "第二天结论", ["workflow"])
+        self.builder.build(workers=1)
+
+        os.remove(os.path.join(self.report_dir, "2026-04-14.json"))
+        stats = self.builder.build(force=True, workers=1)
+
+        self.assertEqual((stats["rendered"], stats["removed"]), (1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.site_dir, "2026-04-14.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.site_dir, "tags", "policy.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.site_dir, "tags", "workflow.html")))
+
+    def test_backfill_renders_in_process_pool(self):
+        for day in range(1, 5):
+            self.write_report(f"2026-04-0{day}", f"结论 {day}", ["research"])
+
+        with patch.object(settings, "SITE_BUILD_PARALLEL_MIN", 2):
+            stats = self.builder.build(workers=2)
+
+        self.assertEqual(stats["rendered"], 4)
+        self.assertIn("结论 3", self.read_site("2026-04-03.html"))
+        self.assertEqual(self.builder.build(workers=2)["rendered"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from daily_report_builder import DailyReportBuilder
+from trend_index import TrendIndex
+
+
+def make_payload(date_str, tag_counts):
+    news = []
+    for tag, count in tag_counts.items():
+        for index in range(count):
+            news.append({"id": f"{date_str}_{tag}_{index}", "title": tag, "theme_tags": [tag], "final_score": 6 + index})
+    return {"date": date_str, "news": news}
+
+
+class TrendIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.index_path = os.path.join(self.temp_dir.name, "trend_index.json")
+        self.index = TrendIndex(self.index_path)
+
+    def test_stats_cover_windows_and_reruns_are_idempotent(self):
+        self.index.update(make_payload("2026-04-01", {"workflow": 1}))
+        self.index.update(make_payload("2026-04-10", {"workflow": 2, "policy": 1}))
+        self.index.update(make_payload("2026-04-14", {"workflow": 3}))
+        self.index.update(make_payload("2026-04-14", {"workflow": 3}))
+
+        reloaded = TrendIndex(self.index_path)
+        stats = reloaded.stats("tag:workflow", "2026-04-14")
+
+        self.assertEqual(stats["today"], 3)
+        self.assertEqual(stats["count_7d"], 5)
+        self.assertEqual(stats["count_prev_7d"], 1)
+        self.assertEqual(stats["count_30d"], 6)
+        self.assertEqual(stats["active_days_30d"], 3)
+        self.assertEqual(reloaded.snapshot("2026-04-14")[0]["key"], "tag:workflow")
+        self.assertEqual(len(reloaded._load()["series"]["tag:workflow"]["2026-04-14"]["top"]), 3)
+
+    def test_reloads_after_another_instance_updates(self):
+        self.index.update(make_payload("2026-04-07", {"workflow": 1}))
+        reader = TrendIndex(self.index_path)
+        self.assertEqual(reader.stats("tag:workflow", "2026-04-14")["count_30d"], 1)
+
+        self.index.update(make_payload("2026-04-14", {"workflow": 3}))
+
+        self.assertEqual(reader.stats("tag:workflow", "2026-04-14")["count_30d"], 4)
+        self.assertTrue(reader.has_history("2026-04-14"))
+
+    def test_builder_cites_cross_day_velocity(self):
+        self.index.update(make_payload("2026-04-07", {"workflow": 1}))
+        today = make_payload("2026-04-14", {"workflow": 3})
+        self.index.update(today)
+
+        report = DailyReportBuilder(trend_index=self.index).build(today)
+
+        evidence = report["deep_analysis"][0]["evidence"]
+        self.assertIn("近 7 天出现 3 条", evidence)
+        self.assertIn("前 7 天 1 条", evidence)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from url_canonicalizer import URLCanonicalizer
+
+
+class URLCanonicalizerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.canonicalizer = URLCanonicalizer(cache_size=16)
+
+    def test_keeps_path_case_and_sorts_query(self):
+        canonical = self.canonicalizer.canonicalize("HTTPS://Example.COM:443/Docs/Page/?b=2&utm_source=x&a=1&fbclid=z#top")
+
+        self.assertEqual(canonical, "https://example.com/Docs/Page?a=1&b=2")
+
+    def test_unwraps_redirect_amp_and_mobile_hosts(self):
+        expected = "https://example.com/news/42"
+
+        self.assertEqual(self.canonicalizer.canonicalize("https://m.example.com/news/42/amp"), expected)
+        self.assertEqual(
+            self.canonicalizer.canonicalize("https://example-com.cdn.ampproject.org/c/s/example.com/news/42"),
+            expected,
+        )
+        self.assertEqual(
+            self.canonicalizer.canonicalize("https://link.zhihu.com/?target=https%3A%2F%2Fexample.com%2Fnews%2F42"),
+            expected,
+        )
+
+    def test_amp_path_only_stripped_for_amp_sources(self):
+        self.assertEqual(self.canonicalizer.canonicalize("https://example.com/guides/amp"), "https://example.com/guides/amp")
+        self.assertEqual(self.canonicalizer.canonicalize("https://example.com/amp/intro"), "https://example.com/amp/intro")
+        self.assertEqual(
+            self.canonicalizer.canonicalize("https://techcrunch.com/2026/04/15/agents/amp/"),
+            "https://techcrunch.com/2026/04/15/agents",
+        )
+
+    def test_redirect_target_is_decoded_once(self):
+        canonical = self.canonicalizer.canonicalize(
+            "https://link.zhihu.com/?target=https%3A%2F%2Fexample.com%2Fsearch%3Fq%3DR%2526D"
+        )
+
+        self.assertEqual(canonical, "https://example.com/search?q=R%26D")
+
+    def test_domain_allowlist_and_cache(self):
+        url = "https://mp.weixin.qq.com/s?__biz=MzA&mid=1&idx=1&sn=abc&chksm=zz&scene=21"
+
+        first = self.canonicalizer.canonicalize(url)
+        second = self.canonicalizer.canonicalize(url)
+
+        self.assertEqual(first, "https://mp.weixin.qq.com/s?__biz=MzA&idx=1&mid=1&sn=abc")
+        self.assertEqual(second, first)
+        self.assertEqual(self.canonicalizer.canonicalize.cache_info().hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
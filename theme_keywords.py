@@ -0,0 +1,22 @@
+"""
+主题关键词表
+
+NewsProcessor 用它打主题标签、EntityExtractor 用它作为实体种子词；单独成模块，
+使只需要词表的索引代码不必导入 NewsProcessor 及其 LLM、检索等依赖。
+"""
+
+THEME_KEYWORDS = {
+    "ai_model": ("模型", "llm", "gpt", "多模态", "推理模型", "foundation model"),
+    "ai_product": ("产品", "agent", "助手", "copilot", "应用", "工作流"),
+    "workflow": ("workflow", "自动化", "效率", "协作", "办公"),
+    "design": ("设计", "交互", "ui", "ux", "体验"),
+    "coding": ("编程", "代码", "开发", "codex", "cursor", "工程"),
+    "business": ("融资", "营收", "商业", "市场", "客户", "增长"),
+    "policy": ("监管", "政策", "合规", "安全", "版权"),
+    "research": ("研究", "论文", "benchmark", "评测", "数据集"),
+}
+
+HIGH_SIGNAL_KEYWORDS = (
+    "发布", "推出", "上线", "开源", "融资", "收购", "模型", "agent", "ai", "芯片",
+    "平台", "政策", "监管", "增长", "合作", "研究", "论文", "benchmark"
+)
@@ -0,0 +1,117 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import settings
+from storage_manager import StorageManager
+
+
+class TrendIndex:
+    """按天累积的主题时间序列索引，每次运行只合并当天的 filter_news。
+
+    series 的键形如 "tag:workflow"，值为 {date: {"count", "score_sum", "top"}}；
+    同一天重复写入会先清掉旧值，因此重跑是幂等的。索引文件被其他实例改写后（mtime 变化），下次读取时重新加载。
+    """
+
+    VERSION = 1
+
+    def __init__(self, index_path: Optional[str] = None):
+        self.storage = StorageManager()
+        self.index_path = index_path or self.storage.get_trend_index_path()
+        self._data: Optional[Dict[str, Any]] = None
+        self._mtime_ns: Optional[int] = None
+
+    def update(self, filter_payload: Dict[str, Any], extra_keys: Optional[Dict[str, Iterable[str]]] = None):
+        """合并一天的 filter_news；extra_keys 为 news_id -> 额外序列键（如实体），用于扩展标签以外的维度。"""
+        date_str = filter_payload.get("date")
+        if not date_str:
+            return
+        data = self._load()
+        series = data["series"]
+        for key in list(series):
+            series[key].pop(date_str, None)
+            if not series[key]:
+                del series[key]
+
+        top_limit = settings.TREND_INDEX_TOP_ITEMS
+        for item in filter_payload.get("news", []):
+            news_id = item.get("id", "")
+            score = float(item.get("final_score") or 0)
+            keys = {f"tag:{tag}" for tag in item.get("theme_tags", [])}
+            keys.update((extra_keys or {}).get(news_id, ()))
+            for key in keys:
+                bucket = series.setdefault(key, {}).setdefault(date_str, {"count": 0, "score_sum": 0.0, "top": []})
+                bucket["count"] += 1
+                bucket["score_sum"] = round(bucket["score_sum"] + score, 2)
+                bucket["top"].append([news_id, score])
+                bucket["top"].sort(key=lambda pair: pair[1], reverse=True)
+                del bucket["top"][top_limit:]
+
+        data["dates"] = sorted(set(data["dates"]) | {date_str})
+        self._prune(data, date_str)
+        self.save()
+
+    def stats(self, key: str, date_str: str) -> Dict[str, Any]:
+        """以 date_str 为截止日，返回当天、近 7 天、前 7 天、近 30 天的条数与近 7 天均分。"""
+        days = self._load()["series"].get(key, {})
+        end = datetime.strptime(date_str, "%Y-%m-%d")
+
+        def window(start_offset: int, length: int) -> List[Dict[str, Any]]:
+            dates = ((end - timedelta(days=start_offset + offset)).strftime("%Y-%m-%d") for offset in range(length))
+            return [days[day] for day in dates if day in days]
+
+        last_7 = window(0, 7)
+        count_7d = sum(bucket["count"] for bucket in last_7)
+        return {
+            "key": key,
+            "today": days.get(date_str, {}).get("count", 0),
+            "count_7d": count_7d,
+            "count_prev_7d": sum(bucket["count"] for bucket in window(7, 7)),
+            "count_30d": sum(bucket["count"] for bucket in window(0, 30)),
+            "active_days_30d": len(window(0, 30)),
+            "avg_score_7d": round(sum(bucket["score_sum"] for bucket in last_7) / count_7d, 2) if count_7d else 0.0,
+        }
+
+    def snapshot(self, date_str: str, prefix: str = "tag:", limit: int = 8) -> List[Dict[str, Any]]:
+        """返回某类序列中近 7 天最活跃的若干条统计，供 builder 与分析 prompt 引用。"""
+        keys = [key for key in self._load()["series"] if key.startswith(prefix)]
+        stats = [self.stats(key, date_str) for key in keys]
+        stats = [item for item in stats if item["count_7d"]]
+        stats.sort(key=lambda item: (item["count_7d"], item["avg_score_7d"]), reverse=True)
+        return stats[:limit]
+
+    def has_history(self, date_str: str) -> bool:
+        return any(day < date_str for day in self._load()["dates"])
+
+    def save(self):
+        if self._data is not None:
+            self.storage.write_json(self.index_path, self._data)
+            self._mtime_ns = self._file_mtime_ns()
+
+    def _load(self) -> Dict[str, Any]:
+        mtime_ns = self._file_mtime_ns()
+        if self._data is None or mtime_ns != self._mtime_ns:
+            data = self.storage.read_json(self.index_path, default=None)
+            if not isinstance(data, dict) or data.get("version") != self.VERSION:
+                data = {"version": self.VERSION, "dates": [], "series": {}}
+            self._data = data
+            self._mtime_ns = mtime_ns
+        return self._data
+
+    def _file_mtime_ns(self) -> Optional[int]:
+        try:
+            return os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _prune(self, data: Dict[str, Any], date_str: str):
+        cutoff = (
+            datetime.strptime(date_str, "%Y-%m-%d") - timedelta(days=settings.TREND_INDEX_RETENTION_DAYS)
+        ).strftime("%Y-%m-%d")
+        data["dates"] = [day for day in data["dates"] if day >= cutoff]
+        for key in list(data["series"]):
+            days = {day: bucket for day, bucket in data["series"][key].items() if day >= cutoff}
+            if days:
+                data["series"][key] = days
+            else:
+                del data["series"][key]
@@ -0,0 +1,133 @@
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from config import settings
+
+
+class URLCanonicalizer:
+    """把同一篇文章的不同 URL 形态归一为稳定的规范形式，供新闻 ID 与去重键共用。
+
+    只对 scheme 和域名做小写化，路径保持原样（很多站点路径大小写敏感）；
+    依次展开跳转链接、AMP/移动端域名，再按域名规则过滤查询参数并排序。
+    路径末尾的 /amp 只在 AMP 缓存、移动端域名或已知用 /amp 路径发布 AMP 页的站点上去除，
+    避免误伤本身以 amp 结尾的普通路径。
+    """
+
+    TRACKING_QUERY_PREFIXES = ("utm_", "spm", "from", "source", "ref", "track")
+    TRACKING_QUERY_KEYS = frozenset(
+        {"fbclid", "gclid", "dclid", "yclid", "msclkid", "igshid", "mc_cid", "mc_eid", "_hsenc", "_hsmi", "amp"}
+    )
+
+    # 跳转/中转域名 -> 承载真实地址的查询参数
+    REDIRECT_QUERY_KEYS: Dict[str, Tuple[str, ...]] = {
+        "link.zhihu.com": ("target",),
+        "www.google.com": ("url", "q"),
+        "l.facebook.com": ("u",),
+        "out.reddit.com": ("url",),
+        "feeds.feedblitz.com": ("url",),
+        "go.theregister.com": ("url",),
+    }
+
+    # 这些域名只保留白名单内的查询参数，其余均视为追踪或会话参数
+    QUERY_ALLOWLIST: Dict[str, FrozenSet[str]] = {
+        "mp.weixin.qq.com": frozenset({"__biz", "mid", "idx", "sn"}),
+        "www.youtube.com": frozenset({"v", "list"}),
+        "news.ycombinator.com": frozenset({"id"}),
+    }
+
+    MOBILE_HOST_PREFIXES = ("amp.", "m.", "mobile.", "wap.")
+    AMP_CACHE_SUFFIX = ".cdn.ampproject.org"
+    AMP_PATH_SUFFIXES = ("/amp", "/amp.html")
+    # 用 /amp 路径（而非 amp. 子域名）发布 AMP 页的站点，按需补充
+    AMP_PATH_HOSTS = frozenset({"techcrunch.com", "venturebeat.com", "www.cnbc.com"})
+    DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+    MAX_UNWRAP_DEPTH = 3
+
+    def __init__(self, cache_size: Optional[int] = None):
+        self.canonicalize = lru_cache(maxsize=cache_size or settings.URL_CANONICAL_CACHE_SIZE)(self._canonicalize)
+
+    def _canonicalize(self, url: str) -> str:
+        url = (url or "").strip()
+        if not url:
+            return ""
+
+        parsed = urlparse(url)
+        for _ in range(self.MAX_UNWRAP_DEPTH):
+            target = self._unwrap_redirect(parsed)
+            if target is None:
+                break
+            parsed = urlparse(target)
+
+        scheme = parsed.scheme.lower()
+        raw_host = parsed.netloc.lower()
+        host = self._canonical_host(scheme, raw_host)
+        path = parsed.path.rstrip("/")
+        amp_page = raw_host.startswith(self.MOBILE_HOST_PREFIXES)
+        if host.endswith(self.AMP_CACHE_SUFFIX):
+            host, path = self._unwrap_amp_cache(path)
+            amp_page = True
+        if amp_page or host in self.AMP_PATH_HOSTS:
+            path = self._strip_amp_path(path).rstrip("/")
+
+        query = sorted(
+            (key, value)
+            for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+            if self._keep_query_param(host, key)
+        )
+        return urlunparse((scheme, host, path, "", urlencode(query), ""))
+
+    def _unwrap_redirect(self, parsed) -> Optional[str]:
+        keys = self.REDIRECT_QUERY_KEYS.get(parsed.netloc.lower())
+        if not keys:
+            return None
+        # parse_qsl 已解码一次，再 unquote 会把目标地址自身的 %26、%2F 等转义错误还原
+        params = dict(parse_qsl(parsed.query))
+        for key in keys:
+            target = params.get(key, "")
+            if target.startswith(("http://", "https://")):
+                return target
+        return None
+
+    def _canonical_host(self, scheme: str, host: str) -> str:
+        default_port = self.DEFAULT_PORTS.get(scheme)
+        if default_port and host.endswith(default_port):
+            host = host[: -len(default_port)]
+        for prefix in self.MOBILE_HOST_PREFIXES:
+            if host.startswith(prefix) and host.count(".") >= 2:
+                return host[len(prefix):]
+        return host
+
+    def _unwrap_amp_cache(self, path: str) -> Tuple[str, str]:
+        # https://example-com.cdn.ampproject.org/c/s/example.com/a/b -> example.com/a/b
+        segments = path.lstrip("/").split("/")
+        while segments and segments[0] in ("c", "v", "s", "i"):
+            segments.pop(0)
+        if not segments:
+            return "", ""
+        return segments[0].lower(), "/" + "/".join(segments[1:])
+
+    def _strip_amp_path(self, path: str) -> str:
+        lowered = path.lower()
+        for suffix in self.AMP_PATH_SUFFIXES:
+            if lowered.endswith(suffix):
+                return path[: -len(suffix)]
+        return path[len("/amp"):] if lowered.startswith("/amp/") else path
+
+    def _keep_query_param(self, host: str, key: str) -> bool:
+        allowlist = self.QUERY_ALLOWLIST.get(host)
+        if allowlist is not None:
+            return key in allowlist
+        lowered = key.lower()
+        return lowered not in self.TRACKING_QUERY_KEYS and not lowered.startswith(self.TRACKING_QUERY_PREFIXES)
+
+
+_default_canonicalizer: Optional[URLCanonicalizer] = None
+
+
+def canonicalize_url(url: str) -> str:
+    """使用进程内共享的 LRU 缓存实例规范化 URL。"""
+    global _default_canonicalizer
+    if _default_canonicalizer is None:
+        _default_canonicalizer = URLCanonicalizer()
+    return _default_canonicalizer.canonicalize(url)
@@ -6,27 +6,99 @@ V3 Email Renderer - Production Module
 """
 
 import os
+import io
+import html
 import base64
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, Any, List
+from urllib.parse import quote
+
+from config import settings
+from email_template import CompiledTemplate, get_template
+from html_minifier import apply_style_classes, build_style_rules, collect_style_classes, inject_style_block, minify_html
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), 'email_template_v3.html')
+
+
+HEADER_BG_PATH = os.path.join(os.path.dirname(__file__), 'assets/images/header_bg.png')
+HEADER_BG_CID = 'header_bg'
+HEADER_BG_ASSET = 'assets/header_bg.png'  # 静态归档站与本地预览中 Header 背景图的相对路径
+
+
+@lru_cache(maxsize=4)
+def _load_header_bg(path: str, mtime: float, optimize: bool, width: int) -> bytes:
+    """读取并（可选）压缩 Header 背景图；参数即缓存键，文件 mtime 或压缩配置不变时进程内只处理一次"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if optimize:
+        data = _optimize_png(data, width)
+    return data
+
+
+def _optimize_png(data: bytes, max_width: int) -> bytes:
+    """按邮件展示宽度缩放并调色板量化，需要 Pillow；未安装或结果更大时返回原图"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return data
+    image = Image.open(io.BytesIO(data))
+    if image.width > max_width:
+        image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    output = io.BytesIO()
+    image.quantize(colors=256, method=Image.Quantize.FASTOCTREE).save(output, format='PNG', optimize=True)
+    optimized = output.getvalue()
+    return optimized if len(optimized) < len(data) else data
+
+
+def get_header_bg_bytes() -> bytes:
+    """获取 Header 背景图字节；文件不存在时返回空字节"""
+    if not os.path.exists(HEADER_BG_PATH):
+        return b""
+    return _load_header_bg(
+        HEADER_BG_PATH,
+        os.path.getmtime(HEADER_BG_PATH),
+        settings.EMAIL_HEADER_IMAGE_OPTIMIZE,
+        settings.EMAIL_HEADER_IMAGE_WIDTH,
+    )
+
+
+@lru_cache(maxsize=4)
+def _encode_data_uri(data: bytes) -> str:
+    return f"data:image/png;base64,{base64.b64encode(data).decode('utf-8')}"
 
 
 def get_header_bg_base64() -> str:
     """获取 Header 背景图的 base64 data URI"""
-    img_path = os.path.join(os.path.dirname(__file__), 'assets/images/header_bg.png')
-    if os.path.exists(img_path):
-        with open(img_path, 'rb') as f:
-            return f"data:image/png;base64,{base64.b64encode(f.read()).decode('utf-8')}"
+    data = get_header_bg_bytes()
+    return _encode_data_uri(data) if data else ""
+
+
+def get_header_bg_src(mode: str = None) -> str:
+    """按投递方式返回 Header 背景图的 src：cid 引用邮件内嵌附件，inline 为 data URI，asset 为网页旁的图片文件，none 不显示"""
+    mode = mode or settings.EMAIL_HEADER_IMAGE_MODE
+    if mode == 'cid':
+        return f"cid:{HEADER_BG_CID}" if get_header_bg_bytes() else ""
+    if mode == 'asset':
+        return HEADER_BG_ASSET if get_header_bg_bytes() else ""
+    if mode == 'inline':
+        return get_header_bg_base64()
     return ""
 
 
 def load_template() -> str:
     """加载 HTML 模板文件"""
-    template_path = os.path.join(os.path.dirname(__file__), 'email_template_v3.html')
-    with open(template_path, 'r', encoding='utf-8') as f:
+    with open(TEMPLATE_PATH, 'r', encoding='utf-8') as f:
         return f.read()
 
 
+def get_compiled_template() -> CompiledTemplate:
+    """获取预编译模板（进程内缓存，模板文件修改后自动重新解析）"""
+    return get_template(TEMPLATE_PATH)
+
+
 def get_day_of_week(date_str: str) -> str:
     """获取星期几英文"""
     date_obj = datetime.strptime(date_str, '%Y-%m-%d')
@@ -53,11 +125,9 @@ def render_top_events(events: List[Dict]) -> str:
     """
 
     # 事件列表
-    events_html = ""
-    for i, event in enumerate(events[:3], 1):
-        events_html += _render_top_event_item(i, event)
-
-    return title_html + events_html
+    parts = [title_html]
+    parts.extend(_render_top_event_item(i, event) for i, event in enumerate(events[:3], 1))
+    return "".join(parts)
 
 
 def _render_top_event_item(index: int, event: Dict) -> str:
@@ -111,33 +181,37 @@ def _render_top_event_item(index: int, event: Dict) -> str:
     """
 
 
+DIMENSION_LABELS = [
+    ("Models", "model_and_capability"),
+    ("AI Products", "ai_product_and_interaction"),
+    ("Design", "design_and_experience"),
+    ("Platform", "technology_and_platform"),
+    ("Business", "business_and_monetization"),
+    ("Policy", "policy_and_ethics"),
+]
+
+
 def render_six_dimensions(briefs: Dict[str, str]) -> str:
     """渲染六维简报模块"""
-    dimension_labels = [
-        ("Models", "model_and_capability"),
-        ("AI Products", "ai_product_and_interaction"),
-        ("Design", "design_and_experience"),
-        ("Platform", "technology_and_platform"),
-        ("Business", "business_and_monetization"),
-        ("Policy", "policy_and_ethics"),
-    ]
-
-    html = """<table role="presentation" cellspacing="0" cellpadding="0" border="0" width="100%">"""
+    cells = [(label, briefs.get(key, '')) for label, key in DIMENSION_LABELS]
+    return _render_dimension_grid([
+        (_render_dimension_cell(*cells[index], has_right_border=True),
+         _render_dimension_cell(*cells[index + 1], has_right_border=False))
+        for index in range(0, len(cells), 2)
+    ])
 
-    for row_idx in range(3):
-        row_items = dimension_labels[row_idx * 2 : row_idx * 2 + 2]
-        labels_briefs = [(item[0], briefs.get(item[1], '')) for item in row_items]
-        has_bottom = (row_idx == 2)
-        html += _render_dimension_row(row_idx + 1, labels_briefs, has_bottom)
 
-    html += """</table>"""
-    return html
+def _render_dimension_grid(row_cells: List[tuple]) -> str:
+    """按行拼接已渲染好的左右单元格，最后一行带下边框"""
+    parts = ["""<table role="presentation" cellspacing="0" cellpadding="0" border="0" width="100%">"""]
+    for row_idx, (left_cell, right_cell) in enumerate(row_cells):
+        parts.append(_render_dimension_row(left_cell, right_cell, row_idx == len(row_cells) - 1))
+    parts.append("""</table>""")
+    return "".join(parts)
 
 
-def _render_dimension_row(row_index: int, labels_briefs: List, has_bottom_border: bool) -> str:
+def _render_dimension_row(left_cell: str, right_cell: str, has_bottom_border: bool) -> str:
     """渲染一行两个维度"""
-    left_label, left_brief = labels_briefs[0]
-    right_label, right_brief = labels_briefs[1]
     border_bottom = "border-bottom: 1px solid #1A1A1D;" if has_bottom_border else ""
 
     return f"""
@@ -145,8 +219,8 @@ def _render_dimension_row(row_index: int, labels_briefs: List, has_bottom_border
         <td style="border-top: 1px solid #1A1A1D; {border_bottom}">
             <table role="presentation" cellspacing="0" cellpadding="0" border="0" width="100%">
                 <tr>
-                    {_render_dimension_cell(left_label, left_brief, has_right_border=True)}
-                    {_render_dimension_cell(right_label, right_brief, has_right_border=False)}
+                    {left_cell}
+                    {right_cell}
                 </tr>
             </table>
         </td>
@@ -186,11 +260,10 @@ ICON_IMPACT = "data:image/svg+xml;base64,PHN2ZyBwcmVzZXJ2ZUFzcGVjdFJhdGlvPSJub25
 
 def render_trend_watch(trends: List[Dict], news_map: Dict[str, Dict]) -> str:
     """渲染趋势观察模块"""
-    html = """<table role="presentation" cellspacing="0" cellpadding="0" border="0" width="100%">"""
-    for i, trend in enumerate(trends, 1):
-        html += _render_trend_item(i, trend, news_map)
-    html += """</table>"""
-    return html
+    parts = ["""<table role="presentation" cellspacing="0" cellpadding="0" border="0" width="100%">"""]
+    parts.extend(_render_trend_item(i, trend, news_map) for i, trend in enumerate(trends, 1))
+    parts.append("""</table>""")
+    return "".join(parts)
 
 
 def _render_trend_item(index: int, trend: Dict, news_map: Dict[str, Dict]) -> str:
@@ -201,16 +274,17 @@ def _render_trend_item(index: int, trend: Dict, news_map: Dict[str, Dict]) -> st
     news_ids = trend.get('news_ids', [])
     refs_html = ""
     if news_ids:
-        refs_html = "<p style='color: #787878; font-size: 12px; font-weight: 400; margin: 0 0 12px 0;'>引用文章</p>"
+        refs = ["<p style='color: #787878; font-size: 12px; font-weight: 400; margin: 0 0 12px 0;'>引用文章</p>"]
         for news_id in news_ids[:5]:
             news = news_map.get(news_id, {})
             title = news.get('title', '未命名')
             url = news.get('url', '#')
-            refs_html += f"""
+            refs.append(f"""
             <p style="color: #3D7092; font-size: 12px; font-weight: 400; margin: 0 0 8px 0;">
                 <a href="{url}" style="color: #3D7092; text-decoration: none;">{title}</a>
             </p>
-            """
+            """)
+        refs_html = "".join(refs)
     else:
         refs_html = "<p style='color: #787878; font-size: 12px; font-weight: 400; margin: 0;'>暂无引用</p>"
 
@@ -371,10 +445,10 @@ def render_actions(suggestions: Dict) -> tuple:
 
 def _render_action_card(title: str, items: List[Dict]) -> str:
     """渲染单个行动建议卡片"""
-    items_html = ""
+    item_parts = []
     for item in items[:3]:
         action_text = item.get('action', '')
-        items_html += f"""
+        item_parts.append(f"""
         <tr>
             <td style="padding: 8px;">
                 <table role="presentation" cellspacing="0" cellpadding="0" border="0" width="100%">
@@ -389,7 +463,8 @@ def _render_action_card(title: str, items: List[Dict]) -> str:
                 </table>
             </td>
         </tr>
-        """
+        """)
+    items_html = "".join(item_parts)
 
     if not items:
         items_html = """
@@ -413,56 +488,265 @@ def _render_action_card(title: str, items: List[Dict]) -> str:
     """
 
 
-def render_email(report_data: Dict[str, Any], news_map: Dict[str, Dict] = None) -> str:
+class PreparedEmail:
+    """报告正文只渲染一次的邮件：收件人相关字段留作占位符，按收件人用预生成的片段拼接。
+
+    收件人相关字段包括问候语、退订链接和六维简报（订阅者可只看部分维度）；
+    六维单元格在准备阶段全部渲染好，同一维度组合的网格只拼接一次。
+    minify 时正文与单元格在准备阶段压缩一次；extract_styles 时再把重复的内联样式提取为 class。
     """
-    完整渲染 V3 邮件 HTML
+
+    RECIPIENT_FIELDS = (
+        'recipient.greeting_html', 'six_dimensions_html', 'recipient.footer_html',
+        'recipient.greeting_text', 'six_dimensions_text', 'recipient.footer_text',
+    )
+
+    def __init__(
+        self,
+        template: CompiledTemplate,
+        briefs: Dict[str, str],
+        text_template: CompiledTemplate = None,
+        minify: bool = False,
+        extract_styles: bool = False,
+    ):
+        self.template = template
+        self.text_template = text_template
+        self.briefs = briefs
+        self.minify = minify
+        self._cells = {
+            (key, has_right_border): _render_dimension_cell(label, briefs.get(key, ''), has_right_border)
+            for label, key in DIMENSION_LABELS
+            for has_right_border in (True, False)
+        }
+        self._grids: Dict[tuple, str] = {}
+        self._style_classes: Dict[str, str] = {}
+        self._html_size_before = None
+
+        if minify:
+            self._html_size_before = self._generic_html_bytes()
+            template.literals = [minify_html(literal) for literal in template.literals]
+            self._cells = {key: minify_html(cell) for key, cell in self._cells.items()}
+            self._grids = {}
+            if extract_styles:
+                self._style_classes = collect_style_classes(template.literals + [self.six_dimensions_html()])
+                css = build_style_rules(self._style_classes)
+                template.literals = [
+                    inject_style_block(apply_style_classes(literal, self._style_classes), css)
+                    for literal in template.literals
+                ]
+                self._cells = {key: apply_style_classes(cell, self._style_classes) for key, cell in self._cells.items()}
+                self._grids = {}
+
+    @property
+    def html_size(self) -> tuple:
+        """正文（含通用版六维简报）压缩前后的字节数，用于跟踪邮件体积"""
+        html_after = self._generic_html_bytes()
+        return (self._html_size_before or html_after, html_after)
+
+    def _generic_html_bytes(self) -> int:
+        return len(self.template.source.encode('utf-8')) + len(self.six_dimensions_html().encode('utf-8'))
+
+    def render(self, recipient: Dict[str, Any] = None) -> str:
+        return self.template.render(self.recipient_context(recipient))
+
+    def render_text(self, recipient: Dict[str, Any] = None) -> str:
+        return self.text_template.render(self.recipient_context(recipient)) if self.text_template else ""
+
+    def recipient_context(self, recipient: Dict[str, Any] = None) -> Dict[str, str]:
+        """收件人字段的取值；recipient 形如 {"email", "name", "sections"}，缺省时为通用版本"""
+        recipient = recipient or {}
+        name = recipient.get('name')
+        sections = recipient.get('sections')
+        footer_html = _render_unsubscribe_footer(recipient.get('email'))
+        return {
+            'recipient.greeting_html': _render_greeting(name),
+            'six_dimensions_html': self.six_dimensions_html(sections),
+            'recipient.footer_html': minify_html(footer_html) if self.minify else footer_html,
+            'recipient.greeting_text': f"{name}，你好\n\n" if name else "",
+            'six_dimensions_text': self.six_dimensions_text(sections),
+            'recipient.footer_text': _render_unsubscribe_text(recipient.get('email')),
+        }
+
+    def six_dimensions_html(self, sections: List[str] = None) -> str:
+        keys = resolve_dimension_sections(sections)
+        grid = self._grids.get(keys)
+        if grid is None:
+            cells = list(keys)
+            if len(cells) % 2:
+                cells.append(None)
+            grid = _render_dimension_grid([
+                (self._cells[(cells[index], True)],
+                 self._cells[(cells[index + 1], False)] if cells[index + 1] else '<td width="50%"></td>')
+                for index in range(0, len(cells), 2)
+            ])
+            if self.minify:
+                grid = apply_style_classes(minify_html(grid), self._style_classes)
+            self._grids[keys] = grid
+        return grid
+
+    def six_dimensions_text(self, sections: List[str] = None) -> str:
+        labels = {key: label for label, key in DIMENSION_LABELS}
+        return "".join(
+            f"{labels[key]}：{self.briefs.get(key) or '今日无显著动态'}\n"
+            for key in resolve_dimension_sections(sections)
+        )
+
+
+def resolve_dimension_sections(sections: List[str] = None) -> tuple:
+    """把订阅者选择的维度（字段名或展示名，不区分大小写）映射为有序字段名；未指定时返回全部六维"""
+    if not sections:
+        return tuple(key for _, key in DIMENSION_LABELS)
+    wanted = {str(section).strip().lower() for section in sections}
+    return tuple(key for label, key in DIMENSION_LABELS if key in wanted or label.lower() in wanted)
+
+
+def _render_greeting(name: str = None) -> str:
+    if not name:
+        return ""
+    return f"""<p style="color: #B0B0B0; font-size: 14px; font-weight: 400; margin: 0 0 24px 0;">{html.escape(name)}，你好</p>"""
+
+
+def _render_unsubscribe_footer(email: str = None) -> str:
+    """EMAIL_UNSUBSCRIBE_URL 中的 {email} 替换为收件人地址；未配置或无收件人时不输出页脚"""
+    if not email or not settings.EMAIL_UNSUBSCRIBE_URL:
+        return ""
+    url = html.escape(settings.EMAIL_UNSUBSCRIBE_URL.replace('{email}', quote(email)))
+    return f"""
+    <tr>
+        <td align="center" style="padding: 48px;">
+            <p style="color: #787878; font-size: 12px; font-weight: 400; margin: 0;">不想再收到这封邮件？<a href="{url}" style="color: #787878;">退订</a></p>
+        </td>
+    </tr>
+    """
+
+
+def _render_unsubscribe_text(email: str = None) -> str:
+    if not email or not settings.EMAIL_UNSUBSCRIBE_URL:
+        return ""
+    return f"\n\n退订：{settings.EMAIL_UNSUBSCRIBE_URL.replace('{email}', quote(email))}\n"
+
+
+PLAIN_TEXT_SKELETON = CompiledTemplate(
+    "{{recipient.greeting_text}}{{body_head}}{{six_dimensions_text}}{{body_tail}}{{recipient.footer_text}}"
+)
+
+
+def render_plain_text_template(report_data: Dict[str, Any], news_map: Dict[str, Dict] = None) -> CompiledTemplate:
+    """从 report JSON 生成 text/plain 正文，收件人字段与六维简报留作占位符"""
+    news_map = news_map or {}
+    meta = report_data.get('meta', {})
+    signals = report_data.get('signal_interpretation', {})
+    date_str = meta.get('date', '')
+
+    head = [f"Trend Radar · {date_str} {get_day_of_week(date_str) if date_str else ''} · {meta.get('filtered_count', 0)} Articles", ""]
+    head += ["【关键洞察】", signals.get('main_conclusion', ''), f"这为什么重要：{signals.get('why_it_matters', '')}", ""]
+    head.append("【关键事件】")
+    for index, event in enumerate(signals.get('top_events', [])[:3], 1):
+        head += [
+            f"{index:02d} {event.get('title', '未命名事件')}",
+            f"   {event.get('description', '')}",
+            f"   对我意味什么：{event.get('so_what', '')}",
+        ]
+    head += ["", "【六维简报】", ""]  # 末尾空串使六维简报另起一行
+
+    tail = ["", "【趋势观察】"]
+    for index, trend in enumerate(report_data.get('deep_analysis', []), 1):
+        tail += [
+            f"{index:02d} {trend.get('title', '未命名趋势')}",
+            f"   证据：{trend.get('evidence', '')}",
+            f"   推理：{trend.get('reasoning', '')}",
+            f"   对我意味什么：{trend.get('so_what_for_me', '')}",
+        ]
+        for news_id in trend.get('news_ids', [])[:5]:
+            news = news_map.get(news_id, {})
+            tail.append(f"   - {news.get('title', '未命名')} {news.get('url', '')}".rstrip())
+    actions = report_data.get('action_suggestions', {})
+    tail += ["", "【行动建议】"]
+    for bucket, title in (('today', '今天'), ('this_week', '本周'), ('this_month', '本月')):
+        items = [item.get('action', '') for item in actions.get(bucket, [])[:3]]
+        tail.append(f"{title}：")
+        tail += [f"- {action}" for action in items] or ["- 暂无建议"]
+
+    return PLAIN_TEXT_SKELETON.partial({
+        'body_head': "\n".join(head),
+        'body_tail': "\n".join(tail),
+    })
+
+
+def prepare_email(
+    report_data: Dict[str, Any],
+    news_map: Dict[str, Dict] = None,
+    header_image_mode: str = None,
+    minify: bool = None,
+) -> PreparedEmail:
+    """
+    渲染 V3 邮件中与收件人无关的部分
 
     Args:
         report_data: V3 JSON report 数据
         news_map: 新闻 ID -> 新闻详情的映射（用于引用文章）
+        header_image_mode: Header 背景图投递方式（cid / inline / asset / none），默认取配置
+        minify: 是否压缩 HTML，默认取 EMAIL_HTML_MINIFY
 
     Returns:
-        渲染后的 HTML 字符串
+        只剩收件人字段待填的 PreparedEmail
     """
     if news_map is None:
         news_map = {}
 
-    template = load_template()
-
     meta = report_data.get('meta', {})
     signals = report_data.get('signal_interpretation', {})
     briefs = signals.get('six_dimension_briefs', {})
     trends = report_data.get('deep_analysis', [])
     actions = report_data.get('action_suggestions', {})
+    today_html, this_week_html, this_month_html = render_actions(actions)
 
-    # Header 背景
-    template = template.replace('{{header_bg}}', get_header_bg_base64())
-
-    # Meta
-    template = template.replace('{{meta.date}}', meta.get('date', ''))
-    template = template.replace('{{meta.day_of_week}}', get_day_of_week(meta.get('date', '')))
-    template = template.replace('{{meta.filtered_count}}', str(meta.get('filtered_count', 0)))
-
-    # Key Insight
-    template = template.replace('{{signal_interpretation.main_conclusion}}', signals.get('main_conclusion', ''))
-    template = template.replace('{{signal_interpretation.why_it_matters}}', signals.get('why_it_matters', ''))
-
-    # Top Events
-    top_events_html = render_top_events(signals.get('top_events', []))
-    template = template.replace('{{top_events_html}}', top_events_html)
-
-    # Six Dimensions
-    six_dimensions_html = render_six_dimensions(briefs)
-    template = template.replace('{{six_dimensions_html}}', six_dimensions_html)
-
-    # Trend Watch
-    trend_watch_html = render_trend_watch(trends, news_map)
-    template = template.replace('{{trend_watch_html}}', trend_watch_html)
+    template = get_compiled_template().partial({
+        # Header 背景
+        'header_bg': get_header_bg_src(header_image_mode),
+        # Meta
+        'meta.date': meta.get('date', ''),
+        'meta.day_of_week': get_day_of_week(meta.get('date', '')),
+        'meta.filtered_count': meta.get('filtered_count', 0),
+        # Key Insight
+        'signal_interpretation.main_conclusion': signals.get('main_conclusion', ''),
+        'signal_interpretation.why_it_matters': signals.get('why_it_matters', ''),
+        # 各模块
+        'top_events_html': render_top_events(signals.get('top_events', [])),
+        'trend_watch_html': render_trend_watch(trends, news_map),
+        'actions_today_html': today_html,
+        'actions_this_week_html': this_week_html,
+        'actions_this_month_html': this_month_html,
+    })
+    if minify is None:
+        minify = settings.EMAIL_HTML_MINIFY
+    return PreparedEmail(
+        template,
+        briefs,
+        text_template=render_plain_text_template(report_data, news_map),
+        minify=minify,
+        extract_styles=minify and settings.EMAIL_HTML_EXTRACT_STYLES,
+    )
+
+
+def render_email(
+    report_data: Dict[str, Any],
+    news_map: Dict[str, Dict] = None,
+    header_image_mode: str = None,
+    recipient: Dict[str, Any] = None,
+    minify: bool = None,
+) -> str:
+    """
+    完整渲染 V3 邮件 HTML；同一份报告发给多位收件人时应使用 prepare_email 只渲染一次
 
-    # Actions
-    today_html, this_week_html, this_month_html = render_actions(actions)
-    template = template.replace('{{actions_today_html}}', today_html)
-    template = template.replace('{{actions_this_week_html}}', this_week_html)
-    template = template.replace('{{actions_this_month_html}}', this_month_html)
+    Args:
+        report_data: V3 JSON report 数据
+        news_map: 新闻 ID -> 新闻详情的映射（用于引用文章）
+        header_image_mode: Header 背景图投递方式（cid / inline / asset / none），默认取配置
+        recipient: 收件人信息 {"email", "name", "sections"}，缺省时渲染通用版本
+        minify: 是否压缩 HTML，默认取 EMAIL_HTML_MINIFY
 
-    return template
\ No newline at end of file
+    Returns:
+        渲染后的 HTML 字符串
+    """
+    return prepare_email(report_data, news_map, header_image_mode, minify).render(recipient)
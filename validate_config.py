@@ -24,6 +24,9 @@ def check_environment_variables():
         "EMAIL_RECEIVER",
         "EMAIL_PASSWORD"
     ]
+    # 配置了订阅者列表时，日报发给列表中的地址，EMAIL_RECEIVER 仅用于错误通知，可不填
+    if (settings.EMAIL_RECIPIENTS or "").strip() or settings.EMAIL_RECIPIENTS_FILE:
+        required_vars.remove("EMAIL_RECEIVER")
     
     missing_vars = []
     for var in required_vars:
@@ -2,11 +2,16 @@ import logging
 import traceback
 from datetime import datetime
 
+from config import settings
 from daily_report_service import DailyReportService
+from entity_index import EntityIndex
 from news_fetcher import NewsFetcher
 from news_processor import NewsProcessor
+from news_search import NewsSearchIndex
 from push_manager import PushManager
+from score_model import prune_training_samples
 from storage_manager import StorageManager
+from trend_index import TrendIndex
 
 
 logger = logging.getLogger(__name__)
@@ -36,6 +41,9 @@ class WorkflowRunner:
                 logger.warning("处理后无有效新闻")
                 return
 
+            logger.info("更新实体索引与跨日趋势索引...")
+            self.update_indexes(filter_payload)
+
             logger.info("开始生成 V3 日报...")
             daily_report = self.daily_report_service.build(
                 filter_payload,
@@ -50,25 +58,62 @@ class WorkflowRunner:
 
             logger.info("开始推送 V3 日报...")
             push_manager = PushManager()
-            push_success = push_manager.send_daily_analysis(daily_report)
+            # filter_payload 已在内存中，直接复用，渲染时不再读盘
+            news_map = {item["id"]: item for item in filter_payload.get("news", []) if item.get("id")}
+            push_success = push_manager.send_daily_analysis(daily_report, news_map=news_map)
             if not push_success:
-                logger.warning("推送失败")
-                return
+                # 已渲染的邮件保留在发件箱中，之后运行 send-v3-daily 即可重投，无需重跑抓取与 AI 阶段
+                logger.warning("推送未完成，未送达的收件人已保留在发件箱")
 
             logger.info("开始清理过期数据...")
             news_fetcher.clean_old_news()
+            push_manager.outbox.prune()
+            prune_training_samples()
+            EntityIndex().prune()
             logger.info("Daily RSS 工具执行完成")
         except Exception as exc:
             logger.error("执行失败：%s", exc, exc_info=True)
             self._send_error_email(exc)
 
+    def update_indexes(self, filter_payload):
+        entity_map = EntityIndex().update(filter_payload)
+        extra_keys = {news_id: ["entity:%s" % term for term in terms] for news_id, terms in entity_map.items()}
+        TrendIndex().update(filter_payload, extra_keys=extra_keys)
+
+    def reindex(self):
+        """清空全文索引后回填 raw_news 与 filter_news，并按日期顺序重建实体索引与趋势索引，用于首次启用或历史数据回填。"""
+        search_index = NewsSearchIndex() if settings.SEARCH_INDEX_ENABLED else None
+        try:
+            if search_index:
+                search_index.clear()
+            archives = (("raw", self.storage.list_raw_news_files()), ("filter", self.storage.list_filter_news_files()))
+            for kind, files in archives:
+                for file_path in files:
+                    payload = self.storage.read_json(file_path, default={})
+                    if not isinstance(payload, dict) or not payload.get("date"):
+                        continue
+                    if search_index:
+                        search_index.index_news(payload.get("news", []), payload["date"], kind=kind)
+                    if kind == "filter":
+                        self.update_indexes(payload)
+                    logger.info("已索引 %s %s：%s 条新闻", kind, payload["date"], len(payload.get("news", [])))
+        finally:
+            if search_index:
+                search_index.close()
+
     def send_v3_daily_email(self, date_str=None):
+        """投递发件箱中的待发送邮件；指定日期尚未入队时，先从 daily report 渲染入队。"""
         push_manager = PushManager()
-        payload = self.storage.read_json(self.storage.get_daily_report_path(date_str), default={})
-        if not payload:
-            logger.warning("未找到 V3 daily report，无法发送结构化模板邮件")
-            return
-        push_manager.send_daily_analysis(payload)
+        batch_id = date_str or datetime.now().strftime("%Y-%m-%d")
+        if not push_manager.outbox.has_batch(batch_id):
+            payload = self.storage.read_json(self.storage.get_daily_report_path(date_str), default={})
+            if payload:
+                push_manager.send_daily_analysis(payload)
+                return
+            if date_str:
+                logger.warning("未找到 V3 daily report，无法发送结构化模板邮件")
+                return
+        push_manager.drain_outbox(force=True)
 
     def _send_error_email(self, exc):
         try: